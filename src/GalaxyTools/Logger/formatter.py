@@ -0,0 +1,142 @@
+import json
+import logging
+import datetime
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+"""
+结构化 JSON 日志：每条日志输出一行 JSON，日志采集端无需再用正则解析文本。
+
+logger = bind(logging.getLogger(__name__), model='qwen', provider='siliconflow')
+logger.info('调用完成', extra={'latency': 1.23, 'total_tokens': 512})
+# {"time": "...", "level": "INFO", "logger": "...", "message": "调用完成", "model": "qwen", ...}
+
+with log_context(request_id='abc-123'):   # 同一线程/协程中的所有日志都带上 request_id
+    ...
+
+bind 返回的 logger 只在创建时构造一次上下文字典，每条日志只附加一个属性；
+formatter 在写出时才合并各部分字段，未启用 JSON 输出时没有额外开销。
+"""
+
+# LogRecord 自带的属性，其余不以下划线开头的属性均视为通过 extra 传入的字段
+_RESERVED = frozenset(logging.LogRecord('', 0, '', 0, '', None, None).__dict__) | {
+    'message', 'asctime', 'context', 'log_context', 'taskName',
+}
+
+_CONTEXT: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar('galaxy_log_context', default=None)
+
+
+def current_context() -> Optional[Dict[str, Any]]:
+    """当前线程/协程中 log_context 设置的字段"""
+    return _CONTEXT.get()
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    在当前线程/协程中为之后的所有日志附加字段，可以嵌套。
+    """
+    current = _CONTEXT.get()
+    token = _CONTEXT.set({**current, **fields} if current else fields)
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
+class BoundLogger(logging.LoggerAdapter):
+    """
+    绑定了固定字段的 logger，字段在创建时合并一次，之后每条日志不再构造字典。
+    """
+
+    def __init__(self, logger: logging.Logger, context: Dict[str, Any]):
+        super().__init__(logger, {'context': context})
+        self.context = context
+
+    def bind(self, **fields) -> 'BoundLogger':
+        """返回追加了字段的新 logger"""
+        return BoundLogger(self.logger, {**self.context, **fields})
+
+    def process(self, msg, kwargs):
+        extra = kwargs.get('extra')
+        kwargs['extra'] = self.extra if extra is None else {**extra, 'context': self.context}
+        return msg, kwargs
+
+
+def bind(logger: logging.Logger = None, **fields) -> BoundLogger:
+    """
+    获取绑定了字段的 logger。
+
+    参数:
+        logger (logging.Logger): 原始 logger，默认为 None（root logger）。
+        **fields: 每条日志都附带的字段，如 model、provider。
+    """
+    if isinstance(logger, BoundLogger):
+        return logger.bind(**fields)
+    return BoundLogger(logger or logging.getLogger(), fields)
+
+
+def _json_dumps(backend: str = None):
+    if backend in (None, 'orjson'):
+        try:
+            import orjson
+            option = orjson.OPT_NON_STR_KEYS
+            return lambda obj: orjson.dumps(obj, default=str, option=option).decode('utf-8')
+        except ImportError:
+            if backend == 'orjson':
+                raise
+    elif backend != 'json':
+        raise ValueError(f"不支持的 JSON 后端: {backend}")
+    return lambda obj: json.dumps(obj, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    将日志记录格式化为一行 JSON。
+
+    固定字段为 time、level、logger、message、file、line，异常时附加 exc；
+    之后依次合并 log_context、bind 与单条日志 extra 中的字段，后者覆盖前者。
+    """
+
+    def __init__(self, backend: str = None, utc: bool = False, static_fields: Dict[str, Any] = None):
+        """
+        参数:
+            backend (str): 'orjson' 或 'json'，默认为 None（已安装 orjson 时使用 orjson）。
+            utc (bool): 时间是否使用 UTC，默认为 False（本地时间）。
+            static_fields (dict): 所有日志都附带的字段，如服务名、主机名。
+        """
+        super().__init__()
+        self._dumps = _json_dumps(backend)
+        self._tz = datetime.timezone.utc if utc else None
+        self.static_fields = static_fields or {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, self._tz).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'file': record.filename,
+            'line': record.lineno,
+        }
+        if self.static_fields:
+            entry.update(self.static_fields)
+        # 经过队列时上下文已在调用方线程中取出
+        current = record.__dict__.get('log_context') or _CONTEXT.get()
+        if current:
+            entry.update(current)
+        context = record.__dict__.get('context')
+        if context:
+            entry.update(context)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and key[0] != '_':
+                entry[key] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return self._dumps(entry)
@@ -0,0 +1,263 @@
+import os
+import time
+import gzip
+import queue
+import shutil
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+"""
+同时按大小和时间切分的日志文件 handler，可供多个进程（如 gunicorn/uvicorn 的多个 worker）共用同一个文件。
+
+handler = RotatingFileHandler('./logs/info.log', when='midnight', max_bytes=512 << 20,
+                              backup_count=14, compress='gzip')
+
+多进程安全：每次写入前对 <文件名>.lock 加 flock 排他锁，并检查文件是否已被其他进程切分（inode 变化），
+是则重新打开，因此切分只会由一个进程完成，也不会有日志写进已经切分出去的旧文件。
+切分出的文件在后台线程中压缩为 .gz（或安装了 zstandard 时的 .zst），写日志的线程不等待压缩。
+没有 fcntl 的平台（Windows）上只保证同一进程内的线程安全。
+"""
+
+COMPRESSORS = (None, 'gzip', 'zstd')
+_SECONDS = {'S': 1, 'M': 60, 'H': 3600, 'D': 86400}
+
+
+def _compress_file(path: str, method: str) -> str:
+    if method == 'gzip':
+        target = path + '.gz'
+        opener = lambda f: gzip.open(f, 'wb', compresslevel=6)
+    else:
+        import zstandard
+        target = path + '.zst'
+        opener = lambda f: zstandard.ZstdCompressor(level=3).stream_writer(open(f, 'wb'))
+    temp = target + '.tmp'
+    with open(path, 'rb') as src, opener(temp) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(temp, target)
+    os.remove(path)
+    return target
+
+
+class _Compressor:
+    """每个进程一个的后台压缩线程，按提交顺序依次处理"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def submit(self, job) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='log-compressor', daemon=True)
+                self._thread.start()
+            self._queue.put(job)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                job()
+            except Exception as e:
+                # 压缩失败时保留未压缩的文件
+                logging.getLogger(__name__).warning(f"日志压缩失败: {e}")
+            finally:
+                self._queue.task_done()
+
+
+_COMPRESSOR = _Compressor()
+
+
+class RotatingFileHandler(logging.FileHandler):
+    """
+    按大小和时间切分、后台压缩、多进程安全的文件 handler。
+    """
+
+    def __init__(self, filename: str, when: str = 'midnight', interval: int = 1, max_bytes: int = 0,
+                 backup_count: int = 7, compress: str = None, encoding: str = 'utf-8',
+                 process_safe: bool = True, utc: bool = False):
+        """
+        参数:
+            filename (str): 日志文件路径。
+            when (str): 按时间切分的单位，'midnight'、'D'、'H'、'M'、'S'，为 None 时不按时间切分。
+                切分时刻与整点（或零点）对齐，多个进程会在同一时刻切分。
+            interval (int): 时间间隔，when 为 'midnight' 时忽略。
+            max_bytes (int): 文件超过该大小时切分，默认为 0（不按大小切分）。
+            backup_count (int): 保留的历史文件数，默认为 7，0 表示全部保留。
+            compress (str): 历史文件的压缩方式，None、'gzip' 或 'zstd'（需要 zstandard）。
+            encoding (str): 文件编码，默认为 'utf-8'。
+            process_safe (bool): 是否用文件锁协调多个进程，默认为 True。
+            utc (bool): 切分时刻与文件名是否使用 UTC，默认为 False。
+        """
+        if compress not in COMPRESSORS:
+            raise ValueError(f"compress 必须是 {COMPRESSORS} 之一: {compress}")
+        if when is not None and when != 'midnight' and when.upper() not in _SECONDS:
+            raise ValueError(f"不支持的 when: {when}")
+        if compress == 'zstd':
+            import zstandard  # noqa: F401  尽早暴露缺失的依赖
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, mode='a', encoding=encoding)
+        self.when = when if when in (None, 'midnight') else when.upper()
+        self.interval = max(1, interval)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.process_safe = process_safe and fcntl is not None
+        self.utc = utc
+        self._lock_file = None
+        self._lock_pid = None
+        # 本 handler 提交的压缩任务 (pid, 完成事件)，close 时只等待这些
+        self._compressions = []
+        self._inode = self._stream_inode()
+        self.rollover_at = self._next_rollover(time.time())
+
+    def _now(self, timestamp: float) -> datetime.datetime:
+        tz = datetime.timezone.utc if self.utc else None
+        return datetime.datetime.fromtimestamp(timestamp, tz)
+
+    def _next_rollover(self, timestamp: float) -> float:
+        if self.when is None:
+            return float('inf')
+        now = self._now(timestamp)
+        if self.when == 'midnight':
+            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            return (start + datetime.timedelta(days=1)).timestamp()
+        step = _SECONDS[self.when] * self.interval
+        # 以当天零点为起点对齐，所有进程得到相同的切分时刻
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        return start + ((timestamp - start) // step + 1) * step
+
+    def _stream_inode(self):
+        if self.stream is None:
+            return None
+        return os.fstat(self.stream.fileno()).st_ino
+
+    @contextmanager
+    def _file_lock(self):
+        if not self.process_safe:
+            yield
+            return
+        # flock 属于打开的文件描述，fork 出的子进程需要重新打开才能与父进程互斥
+        if self._lock_file is None or self._lock_pid != os.getpid():
+            self._lock_file = open(self.baseFilename + '.lock', 'a')
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+        self._inode = self._stream_inode()
+
+    def _sync_with_disk(self) -> int:
+        """其他进程切分过文件时重新打开，返回当前文件大小"""
+        if self.stream is None:
+            self._reopen()
+        try:
+            st = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            st = None
+        if st is None or st.st_ino != self._inode:
+            self._reopen()
+            self.rollover_at = self._next_rollover(time.time())
+            return os.fstat(self.stream.fileno()).st_size
+        return st.st_size
+
+    def _rotated_name(self) -> str:
+        suffix = self._now(time.time()).strftime('%Y-%m-%d_%H-%M-%S')
+        name = f"{self.baseFilename}.{suffix}"
+        counter = 1
+        while any(os.path.exists(name + ext) for ext in ('', '.gz', '.zst')):
+            name = f"{self.baseFilename}.{suffix}.{counter}"
+            counter += 1
+        return name
+
+    def _purge(self) -> None:
+        if self.backup_count <= 0:
+            return
+        directory, base = os.path.split(self.baseFilename)
+        prefix = base + '.'
+        backups = []
+        for entry in os.scandir(directory or '.'):
+            name = entry.name
+            if not name.startswith(prefix) or name.endswith(('.lock', '.tmp')):
+                continue
+            # 开启压缩时只清理已压缩完成的文件，排队等待压缩的文件留给之后的清理
+            if self.compress and not name.endswith(('.gz', '.zst')):
+                continue
+            backups.append((entry.stat().st_mtime, entry.path))
+        backups.sort()
+        for _, path in backups[:-self.backup_count]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def do_rollover(self) -> None:
+        """切分当前文件，调用方需持有文件锁"""
+        self.stream.close()
+        self.stream = None
+        target = self._rotated_name()
+        os.replace(self.baseFilename, target)
+        self._reopen()
+        self.rollover_at = self._next_rollover(time.time())
+        if self.compress:
+            method = self.compress
+            done = threading.Event()
+
+            def job():
+                try:
+                    _compress_file(target, method)
+                    self._purge()
+                finally:
+                    done.set()
+            self._compressions = [item for item in self._compressions if not item[1].is_set()]
+            self._compressions.append((os.getpid(), done))
+            _COMPRESSOR.submit(job)
+        else:
+            self._purge()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            # 文件大小以字节计，非 ASCII 字符按编码后的长度计算
+            length = len(msg.encode(self.encoding or 'utf-8', 'replace')) if self.max_bytes else 0
+            with self._file_lock():
+                size = self._sync_with_disk() if self.process_safe else self.stream.tell()
+                if time.time() >= self.rollover_at or (
+                        self.max_bytes and size and size + length > self.max_bytes):
+                    self.do_rollover()
+                self.stream.write(msg)
+                self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        # 等待本 handler 已提交的压缩完成，避免退出时留下未压缩完的文件；
+        # 压缩线程由所有 handler 共用，不等待其他 handler 的任务。fork 之前提交的任务不在本进程中执行
+        pid = os.getpid()
+        for owner, done in self._compressions:
+            if owner == pid:
+                done.wait()
+        self._compressions = []
+        with self.lock:
+            if self._lock_file is not None and self._lock_pid == os.getpid():
+                self._lock_file.close()
+            self._lock_file = None
+        super().close()
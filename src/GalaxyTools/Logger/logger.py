@@ -1,9 +1,24 @@
 import logging
 import os
+import copy
+import time
+import queue
+import random
+import atexit
 import datetime 
-from logging.handlers import TimedRotatingFileHandler
+import threading
+from collections import OrderedDict
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
+from .formatter import JsonFormatter, current_context
+from .handlers import RotatingFileHandler
 
 _SETUP_DONE = False
+_LISTENER = None
+_QUEUE_HANDLER = None
+_RATE_FILTER = None
+
+OVERFLOW_POLICIES = ('block', 'drop', 'sample')
+_EXC_FORMATTER = logging.Formatter()
 
 class LevelFilter(logging.Filter):
     def __init__(self, level):
@@ -13,6 +28,226 @@ class LevelFilter(logging.Filter):
     def filter(self, record):
         return record.levelno == self.level  # 严格等于该级别
 
+class RateLimitFilter(logging.Filter):
+    """
+    按消息模板限流与按级别采样的过滤器，同一模板（logger 名 + 级别 + 未格式化的 msg）共享一个令牌桶。
+
+    被丢弃的日志按模板计数，该模板下一次通过时在消息末尾附上“此前 N 条相同日志被抑制”，
+    并设置 record.suppressed = N（JSON 日志中为 suppressed 字段）。
+    开始抑制后每隔 summary_interval 秒由定时器把尚未报告的计数按模板各写出一条汇总日志，
+    日志洪峰停止后计数也不会丢失；shutdown_logger 退出前会再写出一次。
+    每条日志的开销为一次字典查找与常数次运算，多个 handler 可以共用同一个实例，
+    同一条日志只会被判断一次。
+    """
+
+    def __init__(self, rate: float = None, burst: int = None, sample_rates: dict = None,
+                 max_keys: int = 10000, summary_interval: float = 60.0):
+        """
+        参数:
+            rate (float): 每个模板每秒允许的日志条数，默认为 None（不限流）。
+            burst (int): 令牌桶容量，即短时间内允许的突发条数，默认为 rate 的 2 倍（至少为 1）。
+            sample_rates (dict): 级别到保留概率的映射，如 {logging.DEBUG: 0.01, logging.INFO: 0.1}，
+                未列出的级别全部保留。
+            max_keys (int): 最多跟踪的模板数，超出时淘汰最久未出现的模板。
+            summary_interval (float): 定期写出抑制汇总的间隔（秒），默认为 60；None 表示不定期写出。
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int((rate or 0) * 2))
+        self.sample_rates = dict(sample_rates or {})
+        self.max_keys = max_keys
+        self.summary_interval = summary_interval
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+        self._attr = f"_rate_limit_{id(self)}"
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decided = record.__dict__.get(self._attr)
+        if decided is not None:
+            return decided
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else id(record.msg))
+        rate = self.sample_rates.get(record.levelno)
+        sampled_out = rate is not None and random.random() >= rate
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # [剩余令牌, 上次补充时间, 被抑制条数]
+                bucket = [float(self.burst), now, 0]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            allowed = not sampled_out
+            if allowed and self.rate is not None:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                if tokens >= 1:
+                    bucket[0] = tokens - 1
+                else:
+                    bucket[0] = tokens
+                    allowed = False
+            if allowed:
+                suppressed, bucket[2] = bucket[2], 0
+            else:
+                bucket[2] += 1
+                if self.summary_interval is not None and (self._timer is None or not self._timer.is_alive()):
+                    # fork 后子进程中的定时器对象不再存活，同样会重新创建
+                    self._timer = threading.Timer(self.summary_interval, self.emit_summary)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if allowed and suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg}（此前 {suppressed} 条相同日志被抑制）"
+        record.__dict__[self._attr] = allowed
+        return allowed
+
+    def pending_summary(self) -> dict:
+        """
+        取出尚未报告的抑制计数并清零，可在退出前记录。
+
+        返回:
+            dict: {(logger 名, 级别, msg 模板): 被抑制条数}
+        """
+        with self._lock:
+            summary = {key: bucket[2] for key, bucket in self._buckets.items() if bucket[2]}
+            for key in summary:
+                self._buckets[key][2] = 0
+        return summary
+
+    def emit_summary(self) -> None:
+        """把尚未报告的抑制计数按模板各写出一条日志（不受本过滤器限流），由定时器与 shutdown_logger 调用"""
+        for (name, levelno, msg), count in self.pending_summary().items():
+            template = msg if isinstance(msg, str) else '（非字符串消息）'
+            logging.getLogger(name).log(
+                levelno, "%d 条相同日志被抑制: %s", count, template,
+                extra={'suppressed': count, self._attr: True},
+            )
+
+    def cancel(self) -> None:
+        """停止定期汇总的定时器"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    把日志记录放入有界队列，由 QueueListener 在后台线程中写出。
+
+    队列满时的处理方式由 overflow 决定：
+        block: 等待队列有空位，不丢日志，但写盘跟不上时会拖慢调用方。
+        drop: 直接丢弃并计数，调用方永远不会阻塞。
+        sample: 队列超过一半时 WARNING 以下的日志只保留每 sample_every 条中的 1 条，
+            队列满时丢弃 WARNING 以下的日志；ERROR 及以上始终等待入队。
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = 'block', sample_every: int = 10):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow 必须是 {OVERFLOW_POLICIES} 之一: {overflow}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self.dropped = 0
+        self._seen = 0
+        self._high_water = max(1, log_queue.maxsize // 2) if log_queue.maxsize > 0 else 0
+        self._count_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 只合并 msg 与 args、提前生成异常文本，完整的格式化在后台线程中由各 handler 完成
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        context = current_context()
+        if context:
+            record.log_context = context
+        return record
+
+    def _drop(self) -> None:
+        with self._count_lock:
+            self.dropped += 1
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        if self.overflow == 'sample':
+            if record.levelno >= logging.ERROR:
+                self.queue.put(record)
+                return
+            if self._high_water and self.queue.qsize() >= self._high_water:
+                with self._count_lock:
+                    self._seen += 1
+                    keep = self._seen % self.sample_every == 0
+                if not keep:
+                    self._drop()
+                    return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+
+class _BlockingQueueListener(QueueListener):
+    # 默认的 enqueue_sentinel 使用 put_nowait，队列满时停止会抛出 queue.Full
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+def _hold_handlers():
+    # fork 前等待后台线程写完当前这条日志，避免子进程继承被持有的 handler 锁与流缓冲区锁
+    if _LISTENER is not None:
+        for handler in _LISTENER.handlers:
+            handler.acquire()
+
+def _release_handlers():
+    if _LISTENER is not None:
+        for handler in _LISTENER.handlers:
+            handler.release()
+
+def _restart_after_fork():
+    # 子进程中没有父进程的后台线程，换一个新队列并重新启动监听线程，否则 block 模式会永久阻塞
+    global _LISTENER
+    if _LISTENER is None:
+        return
+    for handler in _LISTENER.handlers:
+        handler.createLock()
+    log_queue = queue.Queue(maxsize=_QUEUE_HANDLER.queue.maxsize)
+    _QUEUE_HANDLER.queue = log_queue
+    _QUEUE_HANDLER.dropped = 0
+    _LISTENER = _BlockingQueueListener(log_queue, *_LISTENER.handlers, respect_handler_level=True)
+    _LISTENER.start()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_hold_handlers, after_in_parent=_release_handlers,
+                        after_in_child=_restart_after_fork)
+
+def shutdown_logger() -> None:
+    """
+    停止后台日志线程：写出限流的抑制汇总与队列中剩余的日志并关闭文件。解释器退出时会自动调用。
+    """
+    global _LISTENER, _QUEUE_HANDLER
+    if _RATE_FILTER is not None:
+        _RATE_FILTER.cancel()
+        _RATE_FILTER.emit_summary()
+    listener, handler = _LISTENER, _QUEUE_HANDLER
+    _LISTENER = _QUEUE_HANDLER = None
+    if listener is None:
+        return
+    logging.getLogger().removeHandler(handler)
+    listener.stop()
+    if handler.dropped:
+        record = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                   f"日志队列已满，共丢弃 {handler.dropped} 条日志", None, None)
+        listener.handle(record)
+    for h in listener.handlers:
+        h.flush()
+        h.close()
+
 def get_console_handler(format: logging.Formatter = None) -> None:
     """
     为给定的 logger 添加一个控制台处理器。
@@ -31,7 +266,8 @@ def get_console_handler(format: logging.Formatter = None) -> None:
     console_handler.setFormatter(format)
     return console_handler
 
-def get_file_handler(log_dir: str = None, format: logging.Formatter = None) -> None:
+def get_file_handler(log_dir: str = None, format: logging.Formatter = None, max_bytes: int = 0,
+                     compress: str = None, process_safe: bool = False, backup_count: int = 7) -> None:
     """
     为给定的 logger 添加一个文件处理器。
 
@@ -39,6 +275,10 @@ def get_file_handler(log_dir: str = None, format: logging.Formatter = None) -> N
         logger (logging.Logger): 需要添加文件处理器的 logger 实例。
         log_dir (str): 日志文件的路径。如果未提供，则默认为 './logs/info.log'和'./logs/error.log'。
         format (logging.Formatter): 用于格式化日志消息的格式化器。
+        max_bytes (int): 单个文件超过该大小时切分，默认为 0（只在每天零点切分）。
+        compress (str): 切分出的文件在后台压缩的方式，None、'gzip' 或 'zstd'。
+        process_safe (bool): 多个进程写同一目录时用文件锁协调写入与切分，默认为 False。
+        backup_count (int): 保留的历史文件数，默认为 7。
     """
     if not format:
         format = logging.Formatter(
@@ -49,29 +289,35 @@ def get_file_handler(log_dir: str = None, format: logging.Formatter = None) -> N
         log_dir = './logs'
     os.makedirs(log_dir, exist_ok=True)
     
-    def get_info_handler():
-        info_file_handler = TimedRotatingFileHandler(
-            os.path.join(log_dir,'info.log'), 
+    def build_handler(filename):
+        if max_bytes or compress or process_safe:
+            return RotatingFileHandler(
+                os.path.join(log_dir, filename),
+                when='midnight',
+                max_bytes=max_bytes,
+                backup_count=backup_count,
+                compress=compress,
+                encoding='utf-8',
+                process_safe=process_safe,
+            )
+        return TimedRotatingFileHandler(
+            os.path.join(log_dir, filename), 
             when='midnight',
             interval=1,
-            backupCount=7,
+            backupCount=backup_count,
             utc=False,
             encoding='utf-8'
         )
+    
+    def get_info_handler():
+        info_file_handler = build_handler('info.log')
         info_file_handler.setLevel(logging.INFO)
         info_file_handler.addFilter(LevelFilter(logging.INFO))
         info_file_handler.setFormatter(format)
         return info_file_handler
     
     def get_error_handler():
-        error_file_handler = TimedRotatingFileHandler(
-            os.path.join(log_dir,'error.log'), 
-            when='midnight',
-            interval=1,
-            backupCount=7,
-            utc=False,
-            encoding='utf-8'
-        )
+        error_file_handler = build_handler('error.log')
         error_file_handler.setLevel(logging.ERROR)
         error_file_handler.addFilter(LevelFilter(logging.ERROR))
         error_file_handler.setFormatter(format)
@@ -79,31 +325,66 @@ def get_file_handler(log_dir: str = None, format: logging.Formatter = None) -> N
     
     return get_info_handler(), get_error_handler()
 
-def setup_logger(logger_level: logging = logging.DEBUG, log_dir: str = None) -> None:
+def setup_logger(logger_level: logging = logging.DEBUG, log_dir: str = None, use_queue: bool = False,
+                 queue_size: int = 10000, overflow: str = 'block', sample_every: int = 10,
+                 json_format: bool = False, json_fields: dict = None, max_bytes: int = 0,
+                 compress: str = None, process_safe: bool = False, rate_limit: float = None,
+                 rate_burst: int = None, sample_rates: dict = None) -> None:
     """
     设置全局 logger 。
 
     参数:
         name (str): 日志名
         log_dir (str): 日志文件的路径。如果未提供，则默认为 './logs/'。
+        use_queue (bool): 是否通过队列在后台线程中写控制台和文件，调用方只需把记录放入队列。默认为 False。
+        queue_size (int): 队列容量，use_queue 为 True 时有效。
+        overflow (str): 队列满时的处理方式，'block'、'drop' 或 'sample'，见 BoundedQueueHandler。
+        sample_every (int): overflow 为 'sample' 时低级别日志的保留间隔。
+        json_format (bool): 是否每条日志输出一行 JSON（见 JsonFormatter），默认为 False。
+        json_fields (dict): JSON 日志中所有记录都附带的字段，如 {'service': 'rag-api'}。
+        max_bytes (int): 日志文件超过该大小时切分，默认为 0（只在每天零点切分）。
+        compress (str): 切分出的文件在后台压缩的方式，None、'gzip' 或 'zstd'。
+        process_safe (bool): 多个进程共用日志目录时用文件锁协调写入与切分，默认为 False。
+        rate_limit (float): 每个消息模板每秒最多写出的条数，默认为 None（不限流），见 RateLimitFilter。
+        rate_burst (int): 每个消息模板允许的突发条数。
+        sample_rates (dict): 按级别采样的保留概率，如 {logging.DEBUG: 0.01}。
     """
-    global _SETUP_DONE
+    global _SETUP_DONE, _LISTENER, _QUEUE_HANDLER, _RATE_FILTER
     if _SETUP_DONE:
         return
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
     
-    format = logging.Formatter(
-        fmt='%(asctime)s,%(msecs)d %(levelname)-2s [%(filename)s:%(lineno)d] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if json_format:
+        format = JsonFormatter(static_fields=json_fields)
+    else:
+        format = logging.Formatter(
+            fmt='%(asctime)s,%(msecs)d %(levelname)-2s [%(filename)s:%(lineno)d] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     log_handlers: list[logging.Handler] = []
     
     log_handlers.append(get_console_handler(format))
-    info_handler, error_handler = get_file_handler(log_dir, format)
+    info_handler, error_handler = get_file_handler(log_dir, format, max_bytes=max_bytes,
+                                                   compress=compress, process_safe=process_safe)
     log_handlers.append(info_handler)
     log_handlers.append(error_handler)
 
+    if use_queue:
+        log_queue = queue.Queue(maxsize=queue_size)
+        _QUEUE_HANDLER = BoundedQueueHandler(log_queue, overflow=overflow, sample_every=sample_every)
+        _LISTENER = _BlockingQueueListener(log_queue, *log_handlers, respect_handler_level=True)
+        _LISTENER.start()
+        log_handlers = [_QUEUE_HANDLER]
+
+    if rate_limit is not None or sample_rates:
+        # 同一个实例挂在所有 handler 上，队列模式下只挂在入队的 handler 上，入队前就丢弃
+        _RATE_FILTER = RateLimitFilter(rate=rate_limit, burst=rate_burst, sample_rates=sample_rates)
+        for handler in log_handlers:
+            handler.addFilter(_RATE_FILTER)
+    if use_queue or _RATE_FILTER is not None:
+        atexit.register(shutdown_logger)
+
     logging.basicConfig(
         level=logger_level,
         handlers=log_handlers,
@@ -1,10 +1,63 @@
 __version__ = '0.1.0'
 
-from .bootstrap import *
-from .utils.tools import *
-from .llm import *
-from .Logger.logger import setup_logger
-
-__all__ = [
-    'setup_logger',
-]
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+"""
+子模块在第一次访问对应名称时才导入，import GalaxyTools 不会加载 openai、requests、httpx 等依赖，
+也不会修改时区等进程状态（需要时调用 configure_timezone）。
+"""
+
+# 公开名称 -> 所在子模块
+_LAZY = {
+    'configure_timezone': '.bootstrap',
+    'initialize_environment': '.utils.tools',
+    'call_dify': '.utils.tools',
+    'acall_dify': '.utils.tools',
+    'random_string': '.utils.tools',
+    'save_text': '.utils.tools',
+    'read_text': '.utils.tools',
+    'map_folder': '.utils.tools',
+    'imap_folder': '.utils.tools',
+    'setup_logger': '.Logger.logger',
+    'shutdown_logger': '.Logger.logger',
+    'RateLimitFilter': '.Logger.logger',
+    'JsonFormatter': '.Logger.formatter',
+    'bind': '.Logger.formatter',
+    'log_context': '.Logger.formatter',
+}
+for _name in (
+    'openai_invoke', 'openai_ainvoke', 'openai_stream', 'openai_astream',
+    'get_openai_client', 'get_async_openai_client', 'close_openai_clients', 'refresh_openai_client',
+    'siliconflow_invoke', 'siliconflow_ainvoke', 'siliconflow_stream', 'siliconflow_astream',
+    'BatchRunner', 'Router', 'Endpoint', 'openai_endpoint', 'siliconflow_endpoint',
+    'ReasoningDelta', 'ContentDelta', 'ToolCallDelta', 'UsageDelta', 'collect', 'acollect',
+):
+    _LAZY[_name] = '.llm'
+del _name
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if TYPE_CHECKING:
+    from .bootstrap import configure_timezone
+    from .utils.tools import (
+        initialize_environment, call_dify, acall_dify, random_string, save_text, read_text, map_folder, imap_folder,
+    )
+    from .llm import *
+    from .Logger.logger import setup_logger, shutdown_logger, RateLimitFilter
+    from .Logger.formatter import JsonFormatter, bind, log_context
@@ -1,11 +1,25 @@
 import os
 import time
 
-def _time_config():
-    os.environ['TZ'] = 'Asia/Shanghai'
-    time.tzset()
+"""
+进程级的可选配置。导入 GalaxyTools 不会修改任何全局状态，需要时显式调用：
 
-def _auto_config():
-    _time_config()
+from GalaxyTools import configure_timezone
+configure_timezone()                 # 默认 Asia/Shanghai
+configure_timezone('UTC')
+"""
+
+DEFAULT_TIMEZONE = 'Asia/Shanghai'
+
+
+def configure_timezone(tz: str = DEFAULT_TIMEZONE) -> None:
+    """
+    设置进程的本地时区（TZ 环境变量），影响 time.localtime、logging 时间戳等。
+
+    参数:
+        tz (str): IANA 时区名，默认为 'Asia/Shanghai'。
+    """
+    os.environ['TZ'] = tz
+    if hasattr(time, 'tzset'):  # Windows 上没有 tzset
+        time.tzset()
 
-_auto_config()
\ No newline at end of file
@@ -1,7 +1,61 @@
-from .openai_client import openai_invoke
-from .siliconflow import siliconflow_invoke
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-__all__ = [
-    'openai_invoke',
-    'siliconflow_invoke'
-]
+# 公开名称 -> 所在子模块，第一次访问时才导入（openai_client 会加载 openai，siliconflow 会加载 requests/httpx）
+_LAZY = {
+    'openai_invoke': '.openai_client',
+    'openai_ainvoke': '.openai_client',
+    'openai_stream': '.openai_client',
+    'openai_astream': '.openai_client',
+    'get_openai_client': '.openai_client',
+    'get_async_openai_client': '.openai_client',
+    'close_openai_clients': '.openai_client',
+    'refresh_openai_client': '.openai_client',
+    'siliconflow_invoke': '.siliconflow',
+    'siliconflow_ainvoke': '.siliconflow',
+    'siliconflow_stream': '.siliconflow',
+    'siliconflow_astream': '.siliconflow',
+    'BatchRunner': '.batch',
+    'Router': '.router',
+    'Endpoint': '.router',
+    'openai_endpoint': '.router',
+    'siliconflow_endpoint': '.router',
+    'ReasoningDelta': '.events',
+    'ContentDelta': '.events',
+    'ToolCallDelta': '.events',
+    'UsageDelta': '.events',
+    'collect': '.events',
+    'acollect': '.events',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if TYPE_CHECKING:
+    from .openai_client import (
+        openai_invoke,
+        openai_ainvoke,
+        openai_stream,
+        openai_astream,
+        get_openai_client,
+        get_async_openai_client,
+        close_openai_clients,
+        refresh_openai_client,
+    )
+    from .siliconflow import siliconflow_invoke, siliconflow_ainvoke, siliconflow_stream, siliconflow_astream
+    from .batch import BatchRunner
+    from .router import Router, Endpoint, openai_endpoint, siliconflow_endpoint
+    from .events import ReasoningDelta, ContentDelta, ToolCallDelta, UsageDelta, collect, acollect
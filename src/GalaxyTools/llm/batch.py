@@ -0,0 +1,373 @@
+import os
+import json
+import time
+import queue
+import random
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+"""
+批量 LLM 调用。
+
+按 (provider, model) 使用令牌桶同时限制每分钟请求数（rpm）与每分钟 token 数（tpm），
+遇到 429 限流或 502/503/504 过载时按 AIMD 收缩并发，可重试的错误（429/5xx、连接错误）指数退避后重试，结果按完成顺序连同输入下标返回，
+并可写入 JSONL 检查点文件，中断后重新运行会跳过已完成的下标。
+
+runner = BatchRunner(
+    siliconflow_invoke,
+    provider='siliconflow',
+    rpm=1000,
+    tpm=500000,
+    max_concurrency=64,
+    checkpoint='./eval.jsonl',
+)
+for index, result in runner.run(payloads):
+    think, answer = result
+"""
+
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+# 表示服务端限流或过载的状态码，遇到时收缩并发
+OVERLOAD_STATUS = frozenset({429, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶，rate 为每分钟补充的令牌数，capacity 默认与 rate 相同（允许一分钟的突发）。
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate / 60.0
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        阻塞直到取得 amount 个令牌，超过 capacity 的请求按 capacity 计算。
+
+        返回:
+            float: 等待的秒数。
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, amount: float) -> None:
+        """不等待地扣除令牌，余额可以为负，用于事后按实际用量补扣"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+
+
+class RateLimiter:
+    """
+    同时限制 rpm 与 tpm，任一为 None 表示不限制。
+    """
+
+    def __init__(self, rpm: float = None, tpm: float = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def acquire(self, tokens: int = 0) -> float:
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            waited += self.tokens.acquire(tokens)
+        return waited
+
+    def consume(self, tokens: int) -> None:
+        if self.tokens is not None and tokens > 0:
+            self.tokens.consume(tokens)
+
+
+_LIMITERS: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model: str = None, rpm: float = None, tpm: float = None) -> RateLimiter:
+    """
+    获取进程内共享的限流器，同一 (provider, model) 的多个 BatchRunner 共用一份额度。
+    首次创建时使用 rpm/tpm，之后传入的值会被忽略。
+    """
+    key = (provider, model)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = RateLimiter(rpm, tpm)
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制：每完成约 limit 个成功请求，上限加一；遇到限流时上限减半。
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = None):
+        self.minimum = max(1, minimum)
+        self.maximum = maximum or initial
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            # 同一波并发的请求会同时收到 429/503，一秒内只收缩一次
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """从 requests/httpx/openai 的异常中取出 HTTP 状态码"""
+    code = getattr(exc, 'status_code', None)
+    if code is None:
+        code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return code
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    # 没有状态码的连接错误、超时同样可以重试
+    return isinstance(exc, (ConnectionError, TimeoutError)) or \
+        type(exc).__name__ in {'ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout',
+                               'APIConnectionError', 'APITimeoutError', 'RemoteProtocolError'}
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """
+    是否为限流或过载错误（429、502/503/504 或 SDK 的 RateLimitError），这些错误收缩并发；
+    连接错误与其他可重试的错误只退避重试。
+    """
+    return status_code(exc) in OVERLOAD_STATUS or type(exc).__name__ == 'RateLimitError'
+
+
+def estimate_tokens(payload: dict) -> int:
+    """
+    粗略估计一次请求消耗的 token：ASCII 字符按 4 个一 token，其余字符按 1 个一 token，再加上 max_tokens。
+    """
+    chars = 0
+    wide = 0
+    for message in payload.get('messages') or ():
+        content = message.get('content')
+        if isinstance(content, list):
+            content = ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+        if isinstance(content, str):
+            chars += len(content)
+            wide += len(content) - len(content.encode('ascii', 'ignore'))
+    return (chars - wide) // 4 + wide + (payload.get('max_tokens') or 0)
+
+
+def _result_tokens(result: Any) -> int:
+    if isinstance(result, tuple):
+        return estimate_tokens({'messages': [{'content': part} for part in result if isinstance(part, str)]})
+    return 0
+
+
+class BatchRunner:
+    """
+    带限流、自适应并发与检查点的批量调用器。
+    """
+
+    def __init__(self, invoke: Callable[[dict], Any], provider: str = 'default',
+                 rpm: float = None, tpm: float = None, limits: Dict[str, dict] = None,
+                 max_concurrency: int = 32, min_concurrency: int = 1, initial_concurrency: int = None,
+                 max_retries: int = 5, backoff_factor: float = 1.0, max_backoff: float = 60.0,
+                 token_estimator: Callable[[dict], int] = estimate_tokens, checkpoint: str = None):
+        """
+        参数:
+            invoke (Callable): 单次调用函数，如 siliconflow_invoke、openai_invoke。
+            provider (str): 服务商名称，用于区分限流额度。
+            rpm (float): 默认每分钟请求数上限。
+            tpm (float): 默认每分钟 token 数上限。
+            limits (dict): 按模型覆盖限额，如 {'Qwen/QwQ-32B': {'rpm': 100, 'tpm': 20000}}。
+            max_concurrency (int): 并发上限。
+            min_concurrency (int): 收缩时的并发下限。
+            initial_concurrency (int): 初始并发，默认为 max_concurrency。
+            max_retries (int): 可重试错误的最大重试次数。
+            backoff_factor (float): 第 n 次重试前等待 backoff_factor * 2 ** n 秒（带抖动），响应中有 Retry-After 时以其为准。
+            max_backoff (float): 单次退避的最长等待时间。
+            token_estimator (Callable): 估算单个请求 token 数的函数。
+            checkpoint (str): JSONL 检查点文件路径，默认为 None（不记录）。
+        """
+        self.invoke = invoke
+        self.provider = provider
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = limits or {}
+        self.max_concurrency = max_concurrency
+        self.concurrency = AdaptiveConcurrency(initial_concurrency or max_concurrency,
+                                               min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.token_estimator = token_estimator
+        self.checkpoint = checkpoint
+        self._checkpoint_lock = threading.Lock()
+
+    def _limiter(self, model: Optional[str]) -> RateLimiter:
+        limit = self.limits.get(model) or {'rpm': self.rpm, 'tpm': self.tpm}
+        return get_rate_limiter(self.provider, model, limit.get('rpm'), limit.get('tpm'))
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        delay = retry_after(exc)
+        if delay is None:
+            delay = self.backoff_factor * (2 ** attempt) * (0.5 + random.random())
+        return min(delay, self.max_backoff)
+
+    def _execute(self, payload: dict) -> Any:
+        limiter = self._limiter(payload.get('model'))
+        tokens = self.token_estimator(payload)
+        attempt = 0
+        while True:
+            limiter.acquire(tokens)
+            try:
+                result = self.invoke(payload)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    return e
+                if is_throttled(e):
+                    self.concurrency.on_throttle()
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            self.concurrency.on_success()
+            # 输出超出预估部分事后补扣，使后续请求按实际用量限速
+            limiter.consume(_result_tokens(result) - (payload.get('max_tokens') or 0))
+            return result
+
+    def load_checkpoint(self) -> Dict[int, Any]:
+        """读取检查点中已完成的结果，结果经 JSON 往返，tuple 会变为 list"""
+        done = {}
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return done
+        with open(self.checkpoint, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程中断时最后一行可能不完整
+                    continue
+                done[record['index']] = record['result']
+        return done
+
+    def _save(self, index: int, result: Any) -> None:
+        if not self.checkpoint or isinstance(result, BaseException):
+            return
+        line = json.dumps({'index': index, 'result': result}, ensure_ascii=False)
+        with self._checkpoint_lock:
+            with open(self.checkpoint, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def run(self, payloads: Iterable[dict], resume: bool = True) -> Iterator[Tuple[int, Any]]:
+        """
+        执行批量调用。
+
+        参数:
+            payloads (Iterable[dict]): 请求体，可以是任意长的迭代器。
+            resume (bool): 是否先返回检查点中已完成的结果并跳过对应下标。
+        返回:
+            Iterator[Tuple[int, Any]]: 按完成顺序产出 (输入下标, 结果)，失败的请求结果为异常对象且不写入检查点。
+                payloads 迭代时抛出的异常在已提交的请求全部返回后重新抛出。
+        """
+        done = self.load_checkpoint() if resume else {}
+        for index, result in done.items():
+            yield index, result
+
+        results: "queue.Queue[Tuple[int, Any]]" = queue.Queue()
+        stop = threading.Event()
+        submitted = [0]
+        finished = threading.Event()
+        failure = []
+
+        def task(index, payload):
+            try:
+                result = self._execute(payload)
+            except BaseException as e:
+                result = e
+            finally:
+                self.concurrency.release()
+            self._save(index, result)
+            results.put((index, result))
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        def dispatch():
+            try:
+                for index, payload in enumerate(payloads):
+                    if index in done:
+                        continue
+                    self.concurrency.acquire()
+                    if stop.is_set():
+                        self.concurrency.release()
+                        break
+                    submitted[0] += 1
+                    future = executor.submit(task, index, payload)
+                    # 提前结束时被取消的任务不会执行 task，需要在这里归还并发额度
+                    future.add_done_callback(lambda f: f.cancelled() and self.concurrency.release())
+            except BaseException as e:
+                # 在调用方线程中重新抛出，而不是只由线程的 excepthook 打印
+                failure.append(e)
+            finally:
+                finished.set()
+                results.put(None)
+
+        dispatcher = threading.Thread(target=dispatch, daemon=True)
+        dispatcher.start()
+        received = 0
+        try:
+            while not finished.is_set() or received < submitted[0]:
+                item = results.get()
+                if item is None:
+                    continue
+                received += 1
+                yield item
+            if failure:
+                raise failure[0]
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, AsyncIterable, Iterator, List, Optional, Union
+
+"""
+流式调用产生的增量事件。
+
+for event in openai_stream(data):
+    if isinstance(event, ContentDelta):
+        print(event.text, end='', flush=True)
+
+think, answer = collect(openai_stream(data))
+think, answer, tool_calls = collect(openai_stream(data), tool_calls=True)
+"""
+
+
+@dataclass(frozen=True)
+class ReasoningDelta:
+    """思考过程增量"""
+    text: str
+
+
+@dataclass(frozen=True)
+class ContentDelta:
+    """回答内容增量"""
+    text: str
+
+
+@dataclass(frozen=True)
+class ToolCallDelta:
+    """工具调用增量，同一次调用的 arguments 按 index 分多次到达"""
+    index: int
+    id: Optional[str] = None
+    name: Optional[str] = None
+    arguments: str = ''
+
+
+@dataclass(frozen=True)
+class UsageDelta:
+    """token 用量，通常在流的最后一个 chunk 中返回"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+StreamEvent = Union[ReasoningDelta, ContentDelta, ToolCallDelta, UsageDelta]
+
+
+def events_from_chunk(chunk: dict) -> Iterator[StreamEvent]:
+    """
+    将 OpenAI 兼容格式的 chat.completion.chunk 解析为增量事件。
+
+    参数:
+        chunk (dict): 单个 chunk 的 JSON 对象。
+    返回:
+        Iterator[StreamEvent]: 该 chunk 中包含的事件。
+    """
+    choices = chunk.get('choices') or []
+    if choices:
+        delta = choices[0].get('delta') or {}
+        reasoning = delta.get('reasoning_content') or delta.get('think')
+        if reasoning:
+            yield ReasoningDelta(reasoning)
+        content = delta.get('content')
+        if content:
+            yield ContentDelta(content)
+        for call in delta.get('tool_calls') or ():
+            function = call.get('function') or {}
+            yield ToolCallDelta(
+                index=call.get('index', 0),
+                id=call.get('id'),
+                name=function.get('name'),
+                arguments=function.get('arguments') or '',
+            )
+    usage = chunk.get('usage')
+    if usage:
+        yield UsageDelta(
+            prompt_tokens=usage.get('prompt_tokens') or 0,
+            completion_tokens=usage.get('completion_tokens') or 0,
+            total_tokens=usage.get('total_tokens') or 0,
+        )
+
+
+def _add_tool_call(calls: Dict[int, list], event: ToolCallDelta) -> None:
+    # [id, name, arguments 片段]，id 与 name 通常只在第一个片段中出现
+    call = calls.get(event.index)
+    if call is None:
+        call = calls[event.index] = [None, None, []]
+    if event.id:
+        call[0] = event.id
+    if event.name:
+        call[1] = event.name
+    if event.arguments:
+        call[2].append(event.arguments)
+
+
+def _assemble(calls: Dict[int, list]) -> List[dict]:
+    return [{'id': call_id, 'type': 'function', 'function': {'name': name, 'arguments': ''.join(arguments)}}
+            for _, (call_id, name, arguments) in sorted(calls.items())]
+
+
+def collect(events: Iterable[StreamEvent], tool_calls: bool = False) -> tuple:
+    """
+    消费事件流并拼接为 (think, answer)，各部分只在结束时 join 一次。
+
+    参数:
+        events (Iterable[StreamEvent]): 事件流。
+        tool_calls (bool): 是否同时按 index 拼接工具调用，默认为 False。
+    返回:
+        tuple: (think, answer)；tool_calls 为 True 时为 (think, answer, tool_calls)，
+            tool_calls 为 OpenAI 格式的 [{'id', 'type': 'function', 'function': {'name', 'arguments'}}]。
+    """
+    think = []
+    answer = []
+    calls = {}
+    for event in events:
+        if isinstance(event, ContentDelta):
+            answer.append(event.text)
+        elif isinstance(event, ReasoningDelta):
+            think.append(event.text)
+        elif tool_calls and isinstance(event, ToolCallDelta):
+            _add_tool_call(calls, event)
+    if tool_calls:
+        return ''.join(think), ''.join(answer), _assemble(calls)
+    return ''.join(think), ''.join(answer)
+
+
+async def acollect(events: AsyncIterable[StreamEvent], tool_calls: bool = False) -> tuple:
+    """
+    collect 的异步版本。
+    """
+    think = []
+    answer = []
+    calls = {}
+    async for event in events:
+        if isinstance(event, ContentDelta):
+            answer.append(event.text)
+        elif isinstance(event, ReasoningDelta):
+            think.append(event.text)
+        elif tool_calls and isinstance(event, ToolCallDelta):
+            _add_tool_call(calls, event)
+    if tool_calls:
+        return ''.join(think), ''.join(answer), _assemble(calls)
+    return ''.join(think), ''.join(answer)
@@ -1,6 +1,13 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
-import json
+import asyncio
+import threading
+import weakref
+from .events import events_from_chunk, collect, acollect
+from ..utils.sse import iter_sse_json, aiter_sse_json
+from ..utils.cache import request_key
+from ..utils.singleflight import shared_stream, shared_astream
+from ..utils.metrics import start_call
 
 
 """
@@ -21,16 +28,103 @@ data = {
 """
 
 
-def openai_client_factory(api_key, base_url):
-    client = None
-    def construct_client():
-        nonlocal client
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+# AsyncOpenAI 的连接池绑定到创建它的事件循环，按事件循环分别缓存
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def _reset_clients_after_fork():
+    # 子进程不能复用父进程 httpx 连接池中的 socket
+    global _CLIENTS_LOCK
+    _CLIENTS_LOCK = threading.Lock()
+    _CLIENTS.clear()
+    _ASYNC_CLIENTS.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def get_openai_client(api_key=None, base_url=None):
+    """
+    获取进程内共享的 OpenAI 客户端，按 (api_key, base_url) 缓存，连接池在多次调用间复用。
+
+    参数:
+        api_key (str): 默认读取 OPENAI_API_KEY 环境变量。
+        base_url (str): 默认读取 OPENAI_ENDPOINT_URL 环境变量。
+    返回:
+        OpenAI: 线程安全的客户端实例。
+    """
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+    if base_url is None:
+        base_url = os.getenv("OPENAI_ENDPOINT_URL")
+    key = (api_key, base_url)
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
         if client is None:
             client = OpenAI(
                 api_key=api_key,
                 base_url=base_url,
             )
+            _CLIENTS[key] = client
         return client
+
+
+def close_openai_clients(api_key=None, base_url=None):
+    """
+    关闭缓存的客户端并释放连接。api_key/base_url 均为 None 时关闭全部，否则只关闭匹配的客户端。
+    """
+    with _CLIENTS_LOCK:
+        keys = [
+            key for key in _CLIENTS
+            if (api_key is None or key[0] == api_key) and (base_url is None or key[1] == base_url)
+        ]
+        clients = [_CLIENTS.pop(key) for key in keys]
+    for client in clients:
+        client.close()
+
+
+def refresh_openai_client(api_key=None, base_url=None):
+    """
+    关闭并重建指定的客户端，用于轮换密钥或连接异常后重置连接池。
+    """
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+    if base_url is None:
+        base_url = os.getenv("OPENAI_ENDPOINT_URL")
+    close_openai_clients(api_key, base_url)
+    return get_openai_client(api_key, base_url)
+
+
+def get_async_openai_client(api_key=None, base_url=None):
+    """
+    获取当前事件循环中共享的 AsyncOpenAI 客户端，按 (api_key, base_url) 缓存。
+    """
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+    if base_url is None:
+        base_url = os.getenv("OPENAI_ENDPOINT_URL")
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get((api_key, base_url))
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+            )
+            clients[(api_key, base_url)] = client
+        return client
+
+
+def openai_client_factory(api_key, base_url):
+    def construct_client():
+        return get_openai_client(api_key, base_url)
     return construct_client
 
 
@@ -40,26 +134,98 @@ def parsing(data):
     stream = data.get('stream', True)
     enable_thinking = data.get("enable_thinking", False)
     return model, messages, stream, enable_thinking
-    
-
-
-def openai_invoke(data):
-    model, messages, stream, enable_thinking = parsing(data)
-    lazy_client = openai_client_factory(
-        os.getenv("OPENAI_API_KEY"),
-        os.getenv("OPENAI_ENDPOINT_URL"),
-    )
-    client = lazy_client()
-    completion = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        extra_body={"enable_thinking": enable_thinking},
-        stream=stream
-    )
-    think = ""
-    answer = ""
-    for chunk in completion:
-        data = json.loads(chunk.model_dump_json()).get('choices')[0].get('delta')
-        think += data.get('reasoning_content','')
-        answer += data.get('content','')
-    return think, answer
+
+
+def request_options(data):
+    # tools/stream_options 透传给接口，以便产生 ToolCallDelta/UsageDelta 事件
+    return {key: data[key] for key in ('tools', 'tool_choice', 'stream_options') if key in data}
+
+
+def _openai_stream(data, client):
+    model, messages, _, enable_thinking = parsing(data)
+    timer = start_call('openai', model)
+    try:
+        with client.chat.completions.with_streaming_response.create(
+            model=model,
+            messages=messages,
+            extra_body={"enable_thinking": enable_thinking},
+            stream=True,
+            **request_options(data)
+        ) as response:
+            if timer:
+                timer.connected()
+            for chunk in iter_sse_json(response.iter_bytes()):
+                for event in events_from_chunk(chunk):
+                    if timer:
+                        timer.event(event)
+                    yield event
+    except BaseException as e:
+        if timer:
+            timer.finish(e)
+        raise
+    if timer:
+        timer.finish()
+
+
+async def _openai_astream(data, client):
+    model, messages, _, enable_thinking = parsing(data)
+    timer = start_call('openai', model)
+    try:
+        async with client.chat.completions.with_streaming_response.create(
+            model=model,
+            messages=messages,
+            extra_body={"enable_thinking": enable_thinking},
+            stream=True,
+            **request_options(data)
+        ) as response:
+            if timer:
+                timer.connected()
+            async for chunk in aiter_sse_json(response.iter_bytes()):
+                for event in events_from_chunk(chunk):
+                    if timer:
+                        timer.event(event)
+                    yield event
+    except BaseException as e:
+        if timer:
+            timer.finish(e)
+        raise
+    if timer:
+        timer.finish()
+
+
+def openai_stream(data, client=None, cache=None, coalesce=None):
+    """
+    流式调用，按到达顺序 yield ReasoningDelta/ContentDelta/ToolCallDelta/UsageDelta 事件。
+    直接解析原始 SSE 字节流，不为每个 chunk 构造 pydantic 模型。
+    传入 cache（ResponseCache）时相同请求直接重放缓存的事件；
+    传入 coalesce（SingleFlight）时与进行中的相同请求共用一次上游调用。
+    """
+    if client is None:
+        client = get_openai_client()
+    if cache is None and coalesce is None:
+        return _openai_stream(data, client)
+    key = request_key(f"openai:{client.base_url}", data)
+    return shared_stream(key, lambda: _openai_stream(data, client), cache, coalesce)
+
+
+def openai_astream(data, client=None, cache=None, coalesce=None):
+    """
+    openai_stream 的异步版本。
+    """
+    if client is None:
+        client = get_async_openai_client()
+    if cache is None and coalesce is None:
+        return _openai_astream(data, client)
+    key = request_key(f"openai:{client.base_url}", data)
+    return shared_astream(key, lambda: _openai_astream(data, client), cache, coalesce)
+
+
+def openai_invoke(data, client=None, cache=None, coalesce=None):
+    return collect(openai_stream(data, client, cache, coalesce))
+
+
+async def openai_ainvoke(data, client=None, cache=None, coalesce=None):
+    """
+    openai_invoke 的异步版本，返回值同样为 (think, answer)。
+    """
+    return await acollect(openai_astream(data, client, cache, coalesce))
@@ -0,0 +1,534 @@
+import time
+import queue
+import random
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .batch import is_retryable
+from .events import collect, acollect
+
+"""
+在多个等价的接口（同一服务的多个地址，或提供同一模型的不同服务商）之间路由流式调用。
+
+router = Router([
+    openai_endpoint('https://a.example.com/v1', api_key='sk-a'),
+    openai_endpoint('https://b.example.com/v1', api_key='sk-b'),
+    siliconflow_endpoint(token='sk-c', model='Qwen/QwQ-32B'),
+], hedge=True)
+think, answer = router.invoke(data)
+for event in router.stream(data):
+    ...
+runner = BatchRunner(router.invoke, provider='router')
+
+每个接口记录首个增量的延迟（TTFT）的 EWMA 与错误率的 EWMA，每次请求发给
+TTFT × (1 + 进行中的请求数) / (1 - 错误率) 最小的接口，尚无记录的接口优先，以便尽快得到样本。
+
+在收到第一个增量前出现可重试的错误（连接错误、429、5xx）时换下一个接口重试；
+已经产出增量后出错则直接抛出，避免调用方收到重复的内容。400 等不可重试的错误直接抛出，也不计入错误率。
+
+熔断：连续 failure_threshold 次可重试的错误后熔断该接口 recovery_time 秒，之后放行一个探测请求，
+成功则恢复，失败则继续熔断。所有接口都被熔断时仍会尝试最早熔断的接口，而不是直接失败。
+
+对冲（hedge=True）：首选接口在其 TTFT 的 hedge_quantile 分位数（样本不足 min_samples 时不对冲，
+或使用固定的 hedge_delay，从首个请求发出时计时）内没有产出增量时，向次优接口再发一个相同的请求，先产出增量的一方胜出，
+另一方被取消。异步调用会立即取消落败的请求；同步调用中落败的请求在其阻塞的读取返回后关闭连接。
+"""
+
+_END = object()
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """
+    一个可路由的接口。
+
+    stream/astream 接收请求体，返回 StreamEvent 的（异步）迭代器，如 openai_stream。
+    """
+    name: str
+    stream: Callable[[dict], Iterator]
+    astream: Optional[Callable[[dict], AsyncIterator]] = None
+
+
+def _with_model(data: dict, model: Optional[str]) -> dict:
+    return data if model is None else dict(data, model=model)
+
+
+def openai_endpoint(base_url: str, api_key: str = None, model: str = None, name: str = None) -> Endpoint:
+    """
+    OpenAI 兼容接口。
+
+    参数:
+        base_url (str): 接口地址，如 'https://api.openai.com/v1'。
+        api_key (str): 默认读取 OPENAI_API_KEY 环境变量。
+        model (str): 覆盖请求体中的 model，用于同一模型在不同服务商处名称不同的情况。
+        name (str): 在统计中显示的名称，默认为 base_url。
+    """
+    from .openai_client import _openai_stream, _openai_astream, get_openai_client, get_async_openai_client
+
+    def stream(data):
+        return _openai_stream(_with_model(data, model), get_openai_client(api_key, base_url))
+
+    def astream(data):
+        return _openai_astream(_with_model(data, model), get_async_openai_client(api_key, base_url))
+
+    return Endpoint(name or base_url, stream, astream)
+
+
+def siliconflow_endpoint(url: str = None, token: str = None, model: str = None, name: str = None) -> Endpoint:
+    """
+    siliconflow 接口。
+
+    参数:
+        url (str): 默认读取 SILICONFLOW_ENDPOINT_URL 环境变量。
+        token (str): 默认读取 SILICONFLOW_TOKEN 环境变量。
+        model (str): 覆盖请求体中的 model。
+        name (str): 在统计中显示的名称，默认为 url。
+    """
+    from .siliconflow import _siliconflow_stream, _siliconflow_astream, request_args
+    from ..utils.session import get_session, get_async_client
+    url, headers = request_args(url, token)
+
+    def stream(data):
+        return _siliconflow_stream(_with_model(data, model), url, headers, get_session())
+
+    def astream(data):
+        return _siliconflow_astream(_with_model(data, model), url, headers, get_async_client())
+
+    return Endpoint(name or url, stream, astream)
+
+
+class _Health:
+    """单个接口的延迟、错误率与熔断状态，读写均在 Router._lock 内"""
+
+    def __init__(self, endpoint: Endpoint, window: int):
+        self.endpoint = endpoint
+        self.ttft: Optional[float] = None
+        self.samples = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    def state(self, now: float, recovery_time: float) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if now - self.opened_at >= recovery_time else 'open'
+
+    def score(self) -> float:
+        ttft = self.ttft if self.ttft is not None else 0.0
+        return ttft * (1 + self.in_flight) / max(1e-3, 1.0 - self.error_rate)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Attempt:
+    """向某个接口发出的一次请求"""
+
+    __slots__ = ('health', 'events', 'started', 'cancelled', 'ready', 'probe')
+
+    def __init__(self, health: _Health, events, probe: bool):
+        self.health = health
+        self.events = events
+        self.started = time.perf_counter()
+        self.cancelled = False
+        self.ready = False
+        self.probe = probe
+
+
+class Router:
+    """
+    按延迟与错误率在多个等价接口间选择，支持失败切换、对冲请求与熔断。线程安全。
+    """
+
+    def __init__(self, endpoints: Sequence[Endpoint], hedge: bool = False, hedge_quantile: float = 0.9,
+                 hedge_delay: float = None, min_hedge_delay: float = 0.05, max_hedges: int = 1,
+                 min_samples: int = 10, alpha: float = 0.2, window: int = 200, failure_threshold: int = 5,
+                 recovery_time: float = 30.0, max_attempts: int = None):
+        """
+        参数:
+            endpoints (Sequence[Endpoint]): 等价的接口，名称不能重复。
+            hedge (bool): 是否发出对冲请求，默认为 False。
+            hedge_quantile (float): 以首选接口 TTFT 的该分位数作为对冲等待时间，默认为 0.9。
+            hedge_delay (float): 固定的对冲等待时间（秒），设置后忽略 hedge_quantile。
+            min_hedge_delay (float): 对冲等待时间的下限。
+            max_hedges (int): 每个请求最多额外发出的对冲请求数，默认为 1。
+            min_samples (int): 未设置 hedge_delay 时，接口至少有多少个 TTFT 样本才对冲。
+            alpha (float): TTFT 与错误率 EWMA 的平滑系数，越大越偏重最近的请求。
+            window (int): 用于计算分位数的最近 TTFT 样本数。
+            failure_threshold (int): 连续多少次可重试的错误后熔断，默认为 5。
+            recovery_time (float): 熔断持续的秒数，之后放行一个探测请求，默认为 30。
+            max_attempts (int): 每个请求最多尝试的接口数（含对冲），默认为接口总数。
+        """
+        if not endpoints:
+            raise ValueError("endpoints 不能为空")
+        names = [endpoint.name for endpoint in endpoints]
+        if len(set(names)) != len(names):
+            raise ValueError(f"接口名称重复: {names}")
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedges = max_hedges
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.max_attempts = max_attempts or len(endpoints)
+        self._health: Dict[str, _Health] = {endpoint.name: _Health(endpoint, window) for endpoint in endpoints}
+        self._lock = threading.Lock()
+        # 异步模式下负责取消落败请求的任务，保留引用以免被回收
+        self._cleanup = set()
+
+    def stats(self) -> List[dict]:
+        """各接口的状态、TTFT EWMA、错误率与请求计数"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'name': name,
+                'state': health.state(now, self.recovery_time),
+                'ttft': health.ttft,
+                'error_rate': health.error_rate,
+                'in_flight': health.in_flight,
+                'requests': health.requests,
+                'failures': health.failures,
+            } for name, health in self._health.items()]
+
+    # ---- 选择与记录 ----
+
+    def _acquire(self, tried: List[_Health]) -> Optional[_Attempt]:
+        """
+        选出得分最低的未尝试接口并在同一把锁内登记，半开的接口因此只会放行一个探测请求。
+        全部熔断时只尝试最早熔断的接口，没有可尝试的接口时返回 None。
+        """
+        if len(tried) >= self.max_attempts:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            healths = [health for health in self._health.values() if health not in tried]
+            random.shuffle(healths)  # 得分相同时随机分配
+            available = []
+            for health in healths:
+                state = health.state(now, self.recovery_time)
+                if state == 'closed' or (state == 'half_open' and not health.probing):
+                    available.append(health)
+            if available:
+                health = min(available, key=_Health.score)
+            elif healths and not tried:
+                health = min(healths, key=lambda health: health.opened_at)
+            else:
+                return None
+            probe = health.opened_at is not None
+            if probe:
+                health.probing = True
+            health.in_flight += 1
+            health.requests += 1
+        tried.append(health)
+        return _Attempt(health, None, probe)
+
+    def _launch(self, tried: List[_Health], data: dict, asynchronous: bool = False) -> Optional[_Attempt]:
+        """向下一个候选接口发出请求，没有可尝试的接口时返回 None"""
+        attempt = self._acquire(tried)
+        if attempt is None:
+            return None
+        endpoint = attempt.health.endpoint
+        try:
+            if asynchronous:
+                if endpoint.astream is None:
+                    raise TypeError(f"接口 {endpoint.name} 不支持异步调用")
+                attempt.events = endpoint.astream(data)
+            else:
+                attempt.events = endpoint.stream(data)
+        except BaseException as e:
+            self._finished(attempt, e)
+            raise
+        return attempt
+
+    def _first(self, attempt: _Attempt) -> None:
+        """记录首个增量的延迟"""
+        ttft = time.perf_counter() - attempt.started
+        health = attempt.health
+        with self._lock:
+            health.ttft = ttft if health.ttft is None else health.ttft + self.alpha * (ttft - health.ttft)
+            health.samples.append(ttft)
+
+    def _finished(self, attempt: _Attempt, error: BaseException = None) -> None:
+        health = attempt.health
+        failed = error is not None and is_retryable(error)
+        with self._lock:
+            health.in_flight -= 1
+            if attempt.probe:
+                health.probing = False
+            if error is not None and not failed:
+                # 调用方的错误（如 400）不代表接口不可用
+                return
+            health.error_rate += self.alpha * ((1.0 if failed else 0.0) - health.error_rate)
+            if failed:
+                health.failures += 1
+                health.consecutive_failures += 1
+                if attempt.probe or health.consecutive_failures >= self.failure_threshold:
+                    health.opened_at = time.monotonic()
+            else:
+                health.consecutive_failures = 0
+                health.opened_at = None
+
+    def _cancelled(self, attempt: _Attempt, lost: bool = True) -> None:
+        """
+        被取消的请求不计入错误率。对冲落败的请求只知道 TTFT 不小于已等待的时间，
+        已等待的时间超过当前 EWMA 时按其更新。
+        """
+        waited = time.perf_counter() - attempt.started
+        health = attempt.health
+        with self._lock:
+            health.in_flight -= 1
+            if attempt.probe:
+                health.probing = False
+            if lost and health.ttft is not None and waited > health.ttft:
+                health.ttft += self.alpha * (waited - health.ttft)
+
+    def _hedge_after(self, health: _Health) -> Optional[float]:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        with self._lock:
+            if len(health.samples) < self.min_samples:
+                return None
+            return max(self.min_hedge_delay, health.quantile(self.hedge_quantile))
+
+    # ---- 同步调用 ----
+
+    def _open(self, data: dict):
+        """依次尝试候选接口直到收到第一个增量，返回 (attempt, 第一个增量)"""
+        tried: List[_Health] = []
+        last_error = None
+        while True:
+            attempt = self._launch(tried, data)
+            if attempt is None:
+                raise last_error
+            try:
+                first = next(attempt.events)
+            except StopIteration:
+                first = _END
+            except BaseException as e:
+                self._finished(attempt, e)
+                if not is_retryable(e):
+                    raise
+                last_error = e
+                continue
+            self._first(attempt)
+            return attempt, first
+
+    def _read_first(self, attempt: _Attempt, results: queue.Queue) -> None:
+        try:
+            first, error = next(attempt.events), None
+        except StopIteration:
+            first, error = _END, None
+        except BaseException as e:
+            first, error = None, e
+        with self._lock:
+            attempt.ready = True
+            cancelled = attempt.cancelled
+        if cancelled:
+            self._discard(attempt, error)
+        else:
+            results.put((attempt, first, error))
+
+    def _discard(self, attempt: _Attempt, error: BaseException = None) -> None:
+        try:
+            attempt.events.close()
+        except Exception:
+            pass
+        if error is not None:
+            self._finished(attempt, error)
+        else:
+            self._cancelled(attempt)
+
+    def _cancel(self, attempt: _Attempt) -> None:
+        with self._lock:
+            attempt.cancelled = True
+            ready = attempt.ready
+        # 读取线程仍阻塞时由其在返回后自行关闭
+        if ready:
+            self._discard(attempt)
+
+    def _hedge_deadline(self, first: _Attempt):
+        """
+        对冲的等待时间只按首个请求计算一次，返回 (间隔, 第一次对冲的时刻)。
+        失败切换不会重新计时，之后的对冲依次再等待同样的间隔。
+        """
+        delay = self._hedge_after(first.health) if self.max_hedges > 0 else None
+        return delay, None if delay is None else first.started + delay
+
+    def _open_hedged(self, data: dict):
+        tried: List[_Health] = []
+        results = queue.Queue()
+        running: List[_Attempt] = []
+
+        def launch() -> bool:
+            attempt = self._launch(tried, data)
+            if attempt is None:
+                return False
+            running.append(attempt)
+            threading.Thread(target=self._read_first, args=(attempt, results), daemon=True,
+                             name=f"hedge-{attempt.health.endpoint.name}").start()
+            return True
+
+        launch()
+        hedges = self.max_hedges
+        delay, deadline = self._hedge_deadline(running[0])
+        last_error = None
+        try:
+            while running:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                try:
+                    attempt, first, error = results.get(timeout=timeout)
+                except queue.Empty:
+                    hedges -= 1
+                    deadline = deadline + delay if launch() and hedges > 0 else None
+                    continue
+                running.remove(attempt)
+                if error is not None:
+                    self._finished(attempt, error)
+                    if not is_retryable(error):
+                        raise error
+                    last_error = error
+                    if not running:
+                        launch()
+                    continue
+                self._first(attempt)
+                return attempt, first
+            raise last_error
+        finally:
+            for attempt in running:
+                self._cancel(attempt)
+
+    def stream(self, data: dict) -> Iterator:
+        """
+        流式调用，产出与 openai_stream 相同的事件。
+        """
+        attempt, first = self._open_hedged(data) if self.hedge else self._open(data)
+        try:
+            if first is not _END:
+                yield first
+                for event in attempt.events:
+                    yield event
+        except GeneratorExit:
+            attempt.events.close()
+            self._cancelled(attempt, lost=False)
+            raise
+        except BaseException as e:
+            self._finished(attempt, e)
+            raise
+        self._finished(attempt)
+
+    def invoke(self, data: dict):
+        """
+        返回 (think, answer)，可直接作为 BatchRunner 的 invoke。
+        """
+        return collect(self.stream(data))
+
+    # ---- 异步调用 ----
+
+    async def _discard_async(self, task: asyncio.Future, attempt: _Attempt) -> None:
+        task.cancel()
+        error = None
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except StopAsyncIteration:
+            pass
+        except BaseException as e:
+            error = e
+        try:
+            await attempt.events.aclose()
+        except Exception:
+            pass
+        if error is not None:
+            self._finished(attempt, error)
+        else:
+            self._cancelled(attempt)
+
+    async def _aopen(self, data: dict):
+        tried: List[_Health] = []
+        running: Dict[asyncio.Future, _Attempt] = {}
+
+        def launch() -> bool:
+            attempt = self._launch(tried, data, asynchronous=True)
+            if attempt is None:
+                return False
+            running[asyncio.ensure_future(attempt.events.__anext__())] = attempt
+            return True
+
+        launch()
+        hedges = self.max_hedges
+        delay, deadline = self._hedge_deadline(next(iter(running.values()))) if self.hedge else (None, None)
+        last_error = None
+        try:
+            while running:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedges -= 1
+                    deadline = deadline + delay if launch() and hedges > 0 else None
+                    continue
+                winner = None
+                for task in done:
+                    attempt = running.pop(task)
+                    if winner is not None:
+                        # 同时完成的其他请求按落败处理
+                        running[task] = attempt
+                        continue
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        first = _END
+                    except BaseException as e:
+                        self._finished(attempt, e)
+                        if not is_retryable(e):
+                            raise
+                        last_error = e
+                        continue
+                    self._first(attempt)
+                    winner = attempt, first
+                if winner is not None:
+                    return winner
+                if not running:
+                    launch()
+            raise last_error
+        finally:
+            for task, attempt in running.items():
+                cleanup = asyncio.ensure_future(self._discard_async(task, attempt))
+                self._cleanup.add(cleanup)
+                cleanup.add_done_callback(self._cleanup.discard)
+
+    async def astream(self, data: dict) -> AsyncIterator:
+        """
+        stream 的异步版本，需要各接口提供 astream。
+        """
+        attempt, first = await self._aopen(data)
+        try:
+            if first is not _END:
+                yield first
+                async for event in attempt.events:
+                    yield event
+        except (GeneratorExit, asyncio.CancelledError):
+            await attempt.events.aclose()
+            self._cancelled(attempt, lost=False)
+            raise
+        except BaseException as e:
+            self._finished(attempt, e)
+            raise
+        self._finished(attempt)
+
+    async def ainvoke(self, data: dict):
+        """
+        invoke 的异步版本。
+        """
+        return await acollect(self.astream(data))
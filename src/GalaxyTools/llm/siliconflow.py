@@ -1,6 +1,10 @@
 import os
-import requests
-import json
+from ..utils.session import get_session, get_async_client
+from ..utils.sse import iter_sse_json, aiter_sse_json
+from ..utils.cache import request_key
+from ..utils.singleflight import shared_stream, shared_astream
+from ..utils.metrics import start_call
+from .events import events_from_chunk, collect, acollect
 
 """
 data = {
@@ -37,59 +41,87 @@ data = {
 }
 """
 
-def process_line(line):
-    if line.startswith("data"):
-        content = line[5:].strip()
-        try:
-            line_data = json.loads(content)
-            think = line_data.get('choices', '')[0].get("delta", "").get('think', '')
-            answer = line_data.get('choices', '')[0].get("delta", "").get('content', '')
-            return think,answer
-        except json.JSONDecodeError as json_e:
-            pass
-    return  "",""
-
-def process_lines(lines):
-    think = ''
-    answer = ''
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        t,a = process_line(line)
-        think += t
-        answer += a
-    return think,answer
-
-def siliconflow_invoke(data):
-    url = os.getenv("SILICONFLOW_ENDPOINT_URL",'https://api.siliconflow.cn/v1/chat/completions')
-    token = os.getenv('SILICONFLOW_TOKEN')
+def request_args(url=None, token=None):
+    if url is None:
+        url = os.getenv("SILICONFLOW_ENDPOINT_URL",'https://api.siliconflow.cn/v1/chat/completions')
+    if token is None:
+        token = os.getenv('SILICONFLOW_TOKEN')
     headers = {
         'Authorization':f"Bearer {token}",
         'Content-Type': 'application/json'
     }
-    think = ""
-    answer = ""
-    response = requests.post(url, json=data, headers=headers, stream=True)
-    response.raise_for_status()
-    buffer = ''
-    for chunk in response.iter_content(chunk_size=128):
-        if not chunk:
-            continue
-        chunk_event = chunk.decode('utf-8', 'replace')
-        buffer += chunk_event
+    return url, headers
+
+def _siliconflow_stream(data, url, headers, session):
+    timer = start_call('siliconflow', data.get('model'))
+    try:
+        with session.post(url, json=dict(data, stream=True), headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if timer:
+                timer.connected()
+            # chunk_size=None 时按网络分块到达即处理，不再固定切成 128 字节
+            for chunk in iter_sse_json(response.iter_content(chunk_size=None)):
+                for event in events_from_chunk(chunk):
+                    if timer:
+                        timer.event(event)
+                    yield event
+    except BaseException as e:
+        if timer:
+            timer.finish(e)
+        raise
+    if timer:
+        timer.finish()
+
+async def _siliconflow_astream(data, url, headers, client):
+    timer = start_call('siliconflow', data.get('model'))
+    try:
+        async with client.stream('POST', url, json=dict(data, stream=True), headers=headers) as response:
+            response.raise_for_status()
+            if timer:
+                timer.connected()
+            async for chunk in aiter_sse_json(response.aiter_bytes()):
+                for event in events_from_chunk(chunk):
+                    if timer:
+                        timer.event(event)
+                    yield event
+    except BaseException as e:
+        if timer:
+            timer.finish(e)
+        raise
+    if timer:
+        timer.finish()
+
+def siliconflow_stream(data, session=None, cache=None, coalesce=None):
+    """
+    流式调用，按到达顺序 yield ReasoningDelta/ContentDelta/ToolCallDelta/UsageDelta 事件。
+    传入 cache（ResponseCache）时相同请求直接重放缓存的事件；
+    传入 coalesce（SingleFlight）时与进行中的相同请求共用一次上游调用。
+    """
+    url, headers = request_args()
+    if session is None:
+        session = get_session()
+    if cache is None and coalesce is None:
+        return _siliconflow_stream(data, url, headers, session)
+    key = request_key(f"siliconflow:{url}", data)
+    return shared_stream(key, lambda: _siliconflow_stream(data, url, headers, session), cache, coalesce)
 
-        lines = buffer.split('\n')
-        t, a = process_lines(lines[:-1])
-        think += t
-        answer += a
-        buffer = lines[-1]
+def siliconflow_astream(data, client=None, cache=None, coalesce=None):
+    """
+    siliconflow_stream 的异步版本。
+    """
+    url, headers = request_args()
+    if client is None:
+        client = get_async_client()
+    if cache is None and coalesce is None:
+        return _siliconflow_astream(data, url, headers, client)
+    key = request_key(f"siliconflow:{url}", data)
+    return shared_astream(key, lambda: _siliconflow_astream(data, url, headers, client), cache, coalesce)
 
-    if buffer.strip():
-        lines = buffer.split('\n')
-        t, a =  process_lines(lines)
-        think += t
-        answer += a
+def siliconflow_invoke(data, session=None, cache=None, coalesce=None):
+    return collect(siliconflow_stream(data, session, cache, coalesce))
 
-    return think,answer
-  
\ No newline at end of file
+async def siliconflow_ainvoke(data, client=None, cache=None, coalesce=None):
+    """
+    siliconflow_invoke 的异步版本，返回值同样为 (think, answer)。
+    """
+    return await acollect(siliconflow_astream(data, client, cache, coalesce))
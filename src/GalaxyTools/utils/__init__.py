@@ -1,7 +1,83 @@
-from .tools import *
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-__all__ = [
-    'initialize_environment',
-    'call_dify',
-    'random_string',
-]
\ No newline at end of file
+# 公开名称 -> 所在子模块，第一次访问时才导入（session 会加载 requests/httpx）
+_LAZY = {
+    'initialize_environment': '.tools',
+    'call_dify': '.tools',
+    'acall_dify': '.tools',
+    'random_string': '.tools',
+    'save_text': '.tools',
+    'read_text': '.tools',
+    'map_folder': '.tools',
+    'imap_folder': '.tools',
+    'iter_chunks': '.fileio',
+    'iter_lines': '.fileio',
+    'map_file': '.fileio',
+    'read_bytes': '.fileio',
+    'TextWriter': '.fileio',
+    'enable_metrics': '.metrics',
+    'reset_metrics': '.metrics',
+    'metrics_text': '.metrics',
+    'metrics_snapshot': '.metrics',
+    'write_metrics': '.metrics',
+    'start_metrics_server': '.metrics',
+    'ResponseCache': '.cache',
+    'request_key': '.cache',
+    'SingleFlight': '.singleflight',
+    'RemotePool': '.cluster',
+    'WorkerLost': '.cluster',
+    'start_local_workers': '.cluster',
+    'TaskTrace': '.tracing',
+    'FolderManifest': '.manifest',
+    'ManifestReport': '.manifest',
+    'get_session': '.session',
+    'configure_session': '.session',
+    'session_stats': '.session',
+    'close_sessions': '.session',
+    'get_async_client': '.session',
+    'aclose_async_clients': '.session',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if TYPE_CHECKING:
+    from .tools import (
+        initialize_environment, call_dify, acall_dify, random_string, save_text, read_text, map_folder, imap_folder,
+    )
+    from .cache import ResponseCache, request_key
+    from .singleflight import SingleFlight
+    from .cluster import RemotePool, WorkerLost, start_local_workers
+    from .tracing import TaskTrace
+    from .manifest import FolderManifest, ManifestReport
+    from .metrics import (
+        enable_metrics,
+        reset_metrics,
+        metrics_text,
+        metrics_snapshot,
+        write_metrics,
+        start_metrics_server,
+    )
+    from .fileio import iter_chunks, iter_lines, map_file, read_bytes, TextWriter
+    from .session import (
+        get_session,
+        configure_session,
+        session_stats,
+        close_sessions,
+        get_async_client,
+        aclose_async_clients,
+    )
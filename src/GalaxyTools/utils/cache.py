@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+"""
+确定性 LLM 调用的响应缓存，siliconflow、openai 与 dify 的调用均可通过 cache 参数启用。
+
+内存中保留一个 LRU 层，path 不为空时再加一个 SQLite 磁盘层（WAL 模式，可被多个线程和进程同时使用）。
+缓存的是完整的事件序列，流式调用命中缓存时会按原顺序重放事件。
+
+cache = ResponseCache('./.llm_cache.db', ttl=7 * 24 * 3600, max_bytes=1 << 30)
+think, answer = siliconflow_invoke(data, cache=cache)
+for event in openai_stream(data, cache=cache):
+    ...
+"""
+
+
+def request_key(namespace: str, payload: Any) -> str:
+    """
+    计算请求的规范哈希：字典按键排序、去掉多余空白后做 sha256，键的顺序不影响结果。
+
+    参数:
+        namespace (str): 区分不同服务的前缀，如 'openai:https://api.openai.com/v1'。
+        payload (Any): 可 JSON 序列化的请求体。
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(f"{namespace}\n{canonical}".encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    两级响应缓存：内存 LRU + 可选的 SQLite 磁盘层。
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 1024, ttl: float = None, max_bytes: int = None):
+        """
+        参数:
+            path (str): SQLite 文件路径，默认为 None（仅内存缓存）。
+            max_entries (int): 内存层最多保留的条目数。
+            ttl (float): 过期时间（秒），默认为 None（不过期）。
+            max_bytes (int): 磁盘层的容量上限，超出时按最近访问时间淘汰，默认为 None（不限制）。
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                    "created REAL NOT NULL, accessed REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite 连接不能跨线程，也不能在 fork 后继续使用，按 (线程, pid) 各自打开
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key: str, value: Any, created: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """取出缓存值，未命中或已过期时返回 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._memory[key]
+        if self.path:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                if self._expired(row[1], now):
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                else:
+                    conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    value = pickle.loads(row[0])
+                    self._remember(key, value, row[1])
+                    with self._lock:
+                        self.hits += 1
+                    return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._remember(key, value, now)
+        if not self.path:
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now, now),
+        )
+        if self.max_bytes is not None:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        keys = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除的磁盘条目数"""
+        if self.ttl is None:
+            return 0
+        deadline = time.time() - self.ttl
+        with self._lock:
+            for key in [k for k, (_, created) in self._memory.items() if created < deadline]:
+                del self._memory[key]
+        if not self.path:
+            return 0
+        return self._connect().execute("DELETE FROM responses WHERE created < ?", (deadline,)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            self._connect().execute("DELETE FROM responses")
+
+    def stream(self, key: str, produce: Callable[[], Iterator]) -> Iterator:
+        """
+        命中时重放缓存的序列，否则边转发 produce() 的输出边记录，完整结束后写入缓存。
+        """
+        cached = self.get(key)
+        if cached is not None:
+            yield from cached
+            return
+        items = []
+        for item in produce():
+            items.append(item)
+            yield item
+        self.set(key, items)
+
+    async def astream(self, key: str, produce: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """
+        stream 的异步版本。
+        """
+        cached = self.get(key)
+        if cached is not None:
+            for item in cached:
+                yield item
+            return
+        items = []
+        async for item in produce():
+            items.append(item)
+            yield item
+        self.set(key, items)
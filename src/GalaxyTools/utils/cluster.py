@@ -0,0 +1,721 @@
+import os
+import sys
+import time
+import pickle
+import signal
+import socket
+import logging
+import argparse
+import itertools
+import threading
+import concurrent.futures
+import multiprocessing
+from collections import deque, OrderedDict
+from functools import partial
+from multiprocessing.connection import Listener, Client
+from typing import Any, Dict, List, Tuple, Union
+
+from .concurrent import WorkerPool
+
+"""
+ConcurrentMap 的多机后端：调度器运行在调用方进程中，远程工作进程通过 TCP 连接过来领取任务。
+
+# 调用方，默认只监听 127.0.0.1，接受其他机器的连接需显式指定 '0.0.0.0' 或本机网卡地址
+pool = ConcurrentMap.get_remote_pool('cluster', address=('0.0.0.0', 7100), authkey=b'secret')
+results = ConcurrentMap.process_map(parse, items, pool='cluster')
+for result in ConcurrentMap.imap(parse, items, pool=pool, ordered=False):   # 结果逐个流式返回
+    ...
+map_folder(parse, '/shared/corpus', pool=pool, use_thread=False)           # 路径需在各机器上可访问
+
+# 每台工作机器
+GALAXYTOOLS_CLUSTER_KEY=secret python -m GalaxyTools.utils.cluster --connect 10.0.0.1:7100 --slots 16
+
+# 单机调试
+with start_local_workers(pool.address, b'secret', count=4, slots=2):
+    ConcurrentMap.process_map(parse, items, pool=pool)
+
+调度：每个工作进程最多持有 slots + prefetch 个任务，其中 slots 个在本机的进程池中执行，其余在本地排队。
+全局队列为空而有工作进程空闲时，调度器从积压最多的工作进程取回尚未开始的任务交给空闲者（work stealing）。
+工作进程每 heartbeat_interval 秒发送一次心跳，超过 heartbeat_timeout 秒没有消息或连接断开时视为失联，
+其持有的任务重新排队，同一任务最多重新执行 max_retries 次，之后以 WorkerLost 失败。
+工作机器上的进程池崩溃（BrokenProcessPool）同样按失联处理：该机重建进程池，受影响的任务重新排队。
+每个任务完成后结果立即发回，imap/imap_unordered 可以边执行边消费。
+
+连接使用 multiprocessing.connection 的 HMAC 挑战认证，但传输不加密，任务与结果以 pickle 传递，
+持有 authkey 即可在工作进程中执行任意代码，只应在可信网络中使用。
+任务函数需要能在工作机器上按模块路径导入。
+"""
+
+logger = logging.getLogger(__name__)
+
+AUTHKEY_ENV = 'GALAXYTOOLS_CLUSTER_KEY'
+DEFAULT_PORT = 7100
+DEFAULT_HOST = '127.0.0.1'
+
+
+class WorkerLost(RuntimeError):
+    """任务所在的工作进程多次失联"""
+
+
+def _authkey(authkey: Union[str, bytes, None]) -> bytes:
+    if authkey is None:
+        authkey = os.getenv(AUTHKEY_ENV)
+    if not authkey:
+        raise ValueError(f"需要指定 authkey 或设置 {AUTHKEY_ENV} 环境变量")
+    return authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+
+
+def _dumps(obj: Any) -> bytes:
+    return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+
+def _send(conn, lock: threading.Lock, message: tuple) -> None:
+    data = _dumps(message)
+    with lock:
+        conn.send_bytes(data)
+
+
+def _execute(payload: bytes) -> Tuple[bool, bytes]:
+    """在工作机器的进程池中执行一个任务，参数与结果的（反）序列化都在子进程中完成"""
+    try:
+        fn, args, kwargs = pickle.loads(payload)
+        return True, _dumps(fn(*args, **kwargs))
+    except BaseException as e:
+        try:
+            return False, _dumps(e)
+        except Exception:
+            return False, _dumps(RuntimeError(f"{type(e).__name__}: {e}"))
+
+
+# ---- 调度器 ----
+
+class _Task:
+    __slots__ = ('id', 'payload', 'future', 'attempts', 'started')
+
+    def __init__(self, task_id: int, payload: bytes, future: concurrent.futures.Future):
+        self.id = task_id
+        self.payload = payload
+        self.future = future
+        self.attempts = 0
+        self.started = False
+
+
+class _Worker:
+    """调度器一侧记录的一个工作进程"""
+
+    def __init__(self, worker_id: int, conn, info: dict):
+        self.id = worker_id
+        self.conn = conn
+        self.name = info.get('name') or f"worker-{worker_id}"
+        self.host = info.get('host')
+        self.pid = info.get('pid')
+        self.slots = max(1, int(info.get('slots') or 1))
+        self.assigned: "OrderedDict[int, _Task]" = OrderedDict()
+        self.send_lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.stealing = False
+        self.alive = True
+        self.completed = 0
+
+    def load(self) -> float:
+        return len(self.assigned) / self.slots
+
+
+class RemoteExecutor(concurrent.futures.Executor):
+    """
+    把任务分发给通过 TCP 连接的工作进程的执行器。一般通过 RemotePool 使用。
+    """
+
+    def __init__(self, address: Tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT), authkey: Union[str, bytes] = None,
+                 prefetch: int = 2, heartbeat_timeout: float = 10.0, max_retries: int = 3):
+        """
+        Args:
+            address: 监听地址，默认只接受本机连接，接受其他机器的连接需显式指定'0.0.0.0'或网卡地址；
+                端口为0时由系统分配，实际地址见address属性
+            authkey: 认证密钥，默认读取GALAXYTOOLS_CLUSTER_KEY环境变量
+            prefetch: 每个工作进程在slots之外预取的任务数，用于掩盖网络往返
+            heartbeat_timeout: 超过该秒数没有收到工作进程的任何消息时视为失联
+            max_retries: 工作进程失联时同一任务最多重新排队的次数
+        """
+        self._authkey = _authkey(authkey)
+        self._listener = Listener(address, authkey=self._authkey)
+        self.address: Tuple[str, int] = self._listener.address
+        if self.address[0] not in ('127.0.0.1', 'localhost', '::1'):
+            logger.warning(f"调度器监听 {self.address[0]}:{self.address[1]}，持有 authkey 的任何主机都可以连接并执行任务")
+        self.prefetch = prefetch
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._queue: deque = deque()
+        self._tasks: Dict[int, _Task] = {}
+        self._workers: Dict[int, _Worker] = {}
+        self._task_ids = itertools.count()
+        self._worker_ids = itertools.count(1)
+        self._idle = threading.Condition(self._lock)
+        self._closing = False
+        self._shutdown = False
+        self._accept_thread = threading.Thread(target=self._accept_loop, name='cluster-accept', daemon=True)
+        self._accept_thread.start()
+        self._monitor_thread = threading.Thread(target=self._monitor_loop, name='cluster-monitor', daemon=True)
+        self._monitor_thread.start()
+
+    # 连接管理
+
+    def _accept_loop(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+                if self._closing:
+                    return
+                logger.warning(f"工作进程连接失败: {e}")
+                continue
+            if self._closing:
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), name='cluster-worker', daemon=True).start()
+
+    def _serve(self, conn) -> None:
+        try:
+            kind, info = pickle.loads(conn.recv_bytes())
+        except Exception:
+            conn.close()
+            return
+        if kind != 'hello':
+            conn.close()
+            return
+        with self._lock:
+            if self._closing:
+                conn.close()
+                return
+            worker = _Worker(next(self._worker_ids), conn, info)
+            self._workers[worker.id] = worker
+            sends = self._plan()
+        logger.info(f"工作进程 {worker.name}（{worker.host}:{worker.pid}，{worker.slots} 个槽）已连接")
+        self._deliver(sends)
+        try:
+            while True:
+                message = pickle.loads(conn.recv_bytes())
+                worker.last_seen = time.monotonic()
+                self._handle(worker, message)
+        except (EOFError, OSError):
+            pass
+        except Exception:
+            logger.exception(f"处理工作进程 {worker.name} 的消息失败")
+        self._lost(worker, '连接断开')
+
+    def _handle(self, worker: _Worker, message: tuple) -> None:
+        kind = message[0]
+        if kind == 'heartbeat':
+            return
+        resolved = failed = None
+        with self._lock:
+            if kind == 'result':
+                _, task_id, ok, blob = message
+                task = worker.assigned.pop(task_id, None)
+                if task is not None:
+                    worker.completed += 1
+                    self._tasks.pop(task_id, None)
+                    resolved = task, ok, blob
+            elif kind == 'lost':
+                # 工作机器的进程池崩溃，任务按失联处理
+                task = worker.assigned.pop(message[1], None)
+                if task is not None:
+                    task.attempts += 1
+                    if task.attempts > self.max_retries:
+                        self._tasks.pop(task.id, None)
+                        failed = task
+                    else:
+                        self._queue.appendleft(task)
+            elif kind == 'stolen':
+                worker.stealing = False
+                # 取回的任务放到队首，尽快交给空闲的工作进程
+                for task_id in reversed(message[1]):
+                    task = worker.assigned.pop(task_id, None)
+                    if task is not None:
+                        self._queue.appendleft(task)
+            sends = self._plan()
+            if not self._tasks:
+                self._idle.notify_all()
+        if resolved is not None:
+            task, ok, blob = resolved
+            try:
+                value = pickle.loads(blob)
+            except Exception as e:
+                ok, value = False, e
+            if not task.future.done():
+                if ok:
+                    task.future.set_result(value)
+                else:
+                    task.future.set_exception(value)
+        if failed is not None and not failed.future.done():
+            failed.future.set_exception(WorkerLost(f"任务 {failed.id} 所在的进程池崩溃 {failed.attempts} 次"))
+        self._deliver(sends)
+
+    def _lost(self, worker: _Worker, reason: str) -> None:
+        failed = []
+        with self._lock:
+            if not worker.alive:
+                return
+            worker.alive = False
+            self._workers.pop(worker.id, None)
+            tasks = list(worker.assigned.values())
+            worker.assigned.clear()
+            for task in reversed(tasks):
+                task.attempts += 1
+                if task.attempts > self.max_retries:
+                    self._tasks.pop(task.id, None)
+                    failed.append(task)
+                else:
+                    self._queue.appendleft(task)
+            sends = self._plan()
+            if not self._tasks:
+                self._idle.notify_all()
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        if not self._closing:
+            logger.warning(f"工作进程 {worker.name} 失联（{reason}），{len(tasks)} 个任务重新排队")
+        for task in failed:
+            if not task.future.done():
+                task.future.set_exception(WorkerLost(f"任务 {task.id} 所在的工作进程失联 {task.attempts} 次"))
+        self._deliver(sends)
+
+    def _monitor_loop(self) -> None:
+        interval = max(0.05, self.heartbeat_timeout / 4)
+        while not self._closing:
+            time.sleep(interval)
+            now = time.monotonic()
+            with self._lock:
+                silent = [w for w in self._workers.values() if now - w.last_seen > self.heartbeat_timeout]
+            for worker in silent:
+                self._lost(worker, f"{self.heartbeat_timeout} 秒内没有心跳")
+
+    # 调度
+
+    def _plan(self) -> List[tuple]:
+        """在持有锁时决定要发送的消息，由调用方在释放锁后通过 _deliver 发送"""
+        sends = []
+        workers = [w for w in self._workers.values() if w.alive]
+        if not workers:
+            return sends
+        while self._queue:
+            worker = min(workers, key=_Worker.load)
+            if len(worker.assigned) >= worker.slots + self.prefetch:
+                break
+            task = self._queue.popleft()
+            if not task.started:
+                if not task.future.set_running_or_notify_cancel():
+                    self._tasks.pop(task.id, None)
+                    continue
+                task.started = True
+            worker.assigned[task.id] = task
+            sends.append((worker, ('task', task.id, task.payload)))
+        if not self._queue:
+            free = sum(max(0, w.slots - len(w.assigned)) for w in workers)
+            if free:
+                victim = max(workers, key=lambda w: len(w.assigned) - w.slots)
+                surplus = len(victim.assigned) - victim.slots
+                if surplus > 0 and not victim.stealing:
+                    victim.stealing = True
+                    sends.append((victim, ('steal', min(surplus, free))))
+        return sends
+
+    def _deliver(self, sends: List[tuple]) -> None:
+        for worker, message in sends:
+            try:
+                _send(worker.conn, worker.send_lock, message)
+            except (OSError, ValueError):
+                self._lost(worker, '发送失败')
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        # 在调用方线程中序列化，无法 pickle 的任务立即报错
+        payload = _dumps((fn, args, kwargs))
+        future = concurrent.futures.Future()
+        with self._lock:
+            task = _Task(next(self._task_ids), payload, future)
+            self._tasks[task.id] = task
+            self._queue.append(task)
+            sends = self._plan()
+        self._deliver(sends)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    task = self._queue.popleft()
+                    self._tasks.pop(task.id, None)
+                    task.future.cancel()
+                self._idle.notify_all()
+            if wait:
+                while self._tasks and self._workers:
+                    self._idle.wait(0.5)
+            self._closing = True
+            workers = list(self._workers.values())
+        # 唤醒阻塞在 accept 中的线程
+        host, port = self.address
+        try:
+            Client(('127.0.0.1' if host in ('0.0.0.0', '') else host, port), authkey=self._authkey).close()
+        except (OSError, EOFError, multiprocessing.AuthenticationError):
+            pass
+        self._listener.close()
+        for worker in workers:
+            self._lost(worker, '调度器关闭')
+        with self._lock:
+            pending = list(self._tasks.values())
+            self._tasks.clear()
+            self._queue.clear()
+        for task in pending:
+            if not task.future.done() and not task.future.cancel():
+                task.future.set_exception(WorkerLost("调度器已关闭"))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各工作进程的状态"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'id': worker.id,
+                'name': worker.name,
+                'host': worker.host,
+                'pid': worker.pid,
+                'slots': worker.slots,
+                'assigned': len(worker.assigned),
+                'completed': worker.completed,
+                'last_seen': now - worker.last_seen,
+            } for worker in self._workers.values()]
+
+    def queued(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+
+class RemotePool(WorkerPool):
+    """
+    以远程工作进程执行任务的共享工作池，可作为 thread_map/process_map/imap/async_map/map_folder 的 pool 参数。
+    """
+
+    def __init__(self, name: str, address: Tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT),
+                 authkey: Union[str, bytes] = None, max_workers: int = 64, prefetch: int = 2,
+                 heartbeat_timeout: float = 10.0, max_retries: int = 3):
+        """
+        Args:
+            name: 工作池名称
+            address: 调度器监听的地址，默认只接受本机连接，接受其他机器的连接需显式指定'0.0.0.0'或网卡地址
+            authkey: 认证密钥，默认读取GALAXYTOOLS_CLUSTER_KEY环境变量
+            max_workers: 同一次map中同时在途的任务（分块）数上限为其2倍，应不小于所有工作进程的槽数之和
+            prefetch: 每个工作进程在slots之外预取的任务数
+            heartbeat_timeout: 工作进程失联的判定时间（秒）
+            max_retries: 工作进程失联时同一任务最多重新排队的次数
+        """
+        super().__init__(name, use_thread=False, max_workers=max_workers)
+        self.address_hint = address
+        self.authkey = _authkey(authkey)
+        self.prefetch = prefetch
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_retries = max_retries
+        self._bound_address = None
+
+    @property
+    def executor(self) -> RemoteExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 重建时沿用上次实际绑定的端口，工作进程可以重新连上
+                self._executor = RemoteExecutor(self._bound_address or self.address_hint, self.authkey,
+                                                self.prefetch, self.heartbeat_timeout, self.max_retries)
+                self._bound_address = self._executor.address
+                if self._created is not None:
+                    self._restarts += 1
+                self._created = time.time()
+            return self._executor
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """调度器实际监听的地址，会在需要时启动调度器"""
+        return self.executor.address
+
+    def workers(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            executor = self._executor
+        return executor.stats() if executor is not None else []
+
+    def wait_for_workers(self, count: int = 1, timeout: float = None) -> int:
+        """
+        等待至少count个工作进程连接
+
+        Returns:
+            已连接的工作进程数
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.executor
+        while True:
+            connected = len(self.workers())
+            if connected >= count or (deadline is not None and time.monotonic() >= deadline):
+                return connected
+            time.sleep(0.05)
+
+    def terminate(self) -> bool:
+        """远程工作进程无法从调度器一侧强制终止，hard_kill对远程工作池不生效"""
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats['kind'] = 'remote'
+        stats['address'] = self._bound_address
+        stats['workers'] = self.workers()
+        return stats
+
+
+# ---- 工作进程 ----
+
+class _WorkerSession:
+    """工作进程与调度器的一次连接"""
+
+    def __init__(self, conn, executor_factory, slots: int):
+        self.conn = conn
+        self.executor_factory = executor_factory
+        self.executor = executor_factory()
+        self.slots = slots
+        self.send_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.pending: deque = deque()
+        self.running = 0
+        self.closed = False
+
+    def send(self, message: tuple) -> None:
+        if self.closed:
+            return
+        try:
+            _send(self.conn, self.send_lock, message)
+        except (OSError, ValueError):
+            self.closed = True
+
+    def start_more(self) -> None:
+        while True:
+            with self.lock:
+                if self.closed or self.running >= self.slots or not self.pending:
+                    return
+                task_id, payload = self.pending.popleft()
+                self.running += 1
+            executor = self.executor
+            try:
+                future = executor.submit(_execute, payload)
+            except concurrent.futures.BrokenExecutor:
+                # 本机进程池中的某个进程崩溃，重建后继续
+                executor = self.rebuild(executor)
+                future = executor.submit(_execute, payload)
+            future.add_done_callback(partial(self.finished, task_id, executor))
+
+    def rebuild(self, broken: concurrent.futures.Executor) -> concurrent.futures.Executor:
+        """替换已崩溃的进程池，同一进程池上的多个任务同时失败时只重建一次"""
+        with self.lock:
+            if self.executor is broken and not self.closed:
+                self.executor = self.executor_factory()
+                broken.shutdown(wait=False, cancel_futures=True)
+            return self.executor
+
+    def finished(self, task_id: int, executor: concurrent.futures.Executor, future: concurrent.futures.Future) -> None:
+        message = None
+        try:
+            ok, blob = future.result()
+        except concurrent.futures.BrokenExecutor:
+            # 任务本身没有出错，由调度器按失联重新排队（受 max_retries 限制）
+            self.rebuild(executor)
+            message = ('lost', task_id)
+        except BaseException as e:
+            ok, blob = False, _dumps(RuntimeError(f"{type(e).__name__}: {e}"))
+        with self.lock:
+            self.running -= 1
+        self.send(message or ('result', task_id, ok, blob))
+        self.start_more()
+
+    def steal(self, count: int) -> None:
+        with self.lock:
+            stolen = [self.pending.pop()[0] for _ in range(min(count, len(self.pending)))]
+        self.send(('stolen', stolen))
+
+    def heartbeat(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            with self.lock:
+                running, queued = self.running, len(self.pending)
+            self.send(('heartbeat', running, queued))
+
+    def serve(self, name: str, heartbeat_interval: float) -> None:
+        self.send(('hello', {'name': name, 'host': socket.gethostname(), 'pid': os.getpid(), 'slots': self.slots}))
+        stop = threading.Event()
+        threading.Thread(target=self.heartbeat, args=(heartbeat_interval, stop), daemon=True).start()
+        try:
+            while True:
+                message = pickle.loads(self.conn.recv_bytes())
+                kind = message[0]
+                if kind == 'task':
+                    with self.lock:
+                        self.pending.append((message[1], message[2]))
+                    self.start_more()
+                elif kind == 'steal':
+                    self.steal(message[1])
+        except (EOFError, OSError):
+            pass
+        finally:
+            stop.set()
+            with self.lock:
+                self.closed = True
+                self.pending.clear()
+            self.conn.close()
+            # 已经开始的任务无法中断，结果被丢弃，调度器会把它们重新排队
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_worker(address: Tuple[str, int], authkey: Union[str, bytes] = None, slots: int = None,
+               use_thread: bool = False, heartbeat_interval: float = 1.0, reconnect: bool = True,
+               name: str = None) -> None:
+    """
+    运行一个工作进程：连接调度器并执行分到的任务，连接断开后按需重连。
+
+    Args:
+        address: 调度器地址 (host, port)
+        authkey: 认证密钥，默认读取GALAXYTOOLS_CLUSTER_KEY环境变量
+        slots: 同时执行的任务数，默认为cpu_count()
+        use_thread: 是否在线程池而不是进程池中执行任务
+        heartbeat_interval: 心跳间隔（秒），应明显小于调度器的heartbeat_timeout
+        reconnect: 连接失败或断开后是否持续重连，False时调度器关闭后即退出
+        name: 在调度器统计中显示的名称
+    """
+    authkey = _authkey(authkey)
+    slots = slots or os.cpu_count() or 1
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    executor_class = concurrent.futures.ThreadPoolExecutor if use_thread \
+        else concurrent.futures.ProcessPoolExecutor
+    factory = partial(executor_class, max_workers=slots)
+    # 不重连时只在启动阶段等待调度器就绪
+    deadline = None if reconnect else time.monotonic() + 30
+    delay = 0.1
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=authkey)
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise ConnectionError(f"无法连接调度器 {address}: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+            continue
+        delay = 0.1
+        logger.info(f"已连接调度器 {address}")
+        _WorkerSession(conn, factory, slots).serve(name, heartbeat_interval)
+        logger.info(f"与调度器 {address} 的连接已断开")
+        if not reconnect:
+            return
+
+
+def _exit_on_sigterm() -> None:
+    # 以 SystemExit 退出，使本机进程池随解释器正常关闭，不留下孤儿进程
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def _local_worker(kwargs: dict) -> None:
+    if hasattr(os, 'setpgrp'):
+        # 独立的进程组，终止时连同本机进程池中的进程一起终止
+        os.setpgrp()
+    _exit_on_sigterm()
+    run_worker(**kwargs)
+
+
+class LocalWorkers:
+    """
+    在本机启动若干工作进程，用于调试与测试。可作为上下文管理器使用，退出时终止所有工作进程。
+    """
+
+    def __init__(self, address: Tuple[str, int], authkey: Union[str, bytes] = None, count: int = 2,
+                 slots: int = 1, use_thread: bool = False, heartbeat_interval: float = 1.0):
+        host, port = address
+        if host in ('0.0.0.0', ''):
+            host = '127.0.0.1'
+        # spawn 启动，避免继承调用方进程中调度器线程持有的锁
+        context = multiprocessing.get_context('spawn')
+        self.processes = [
+            context.Process(
+                target=_local_worker,
+                args=({
+                    'address': (host, port),
+                    'authkey': _authkey(authkey),
+                    'slots': slots,
+                    'use_thread': use_thread,
+                    'heartbeat_interval': heartbeat_interval,
+                    'reconnect': False,
+                    'name': f"local-{index}",
+                },),
+                name=f"cluster-worker-{index}",
+            )
+            for index in range(count)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def _signal(self, process, signum: int) -> None:
+        if not process.is_alive():
+            return
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signum)
+            else:
+                os.kill(process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def kill(self, index: int) -> None:
+        """强制终止第index个工作进程（连同其进程池），用于验证失联后的任务重新排队"""
+        self._signal(self.processes[index], getattr(signal, 'SIGKILL', signal.SIGTERM))
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for process in self.processes:
+            self._signal(process, signal.SIGTERM)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                self._signal(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+                process.join()
+
+    def __enter__(self) -> 'LocalWorkers':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def start_local_workers(address: Tuple[str, int], authkey: Union[str, bytes] = None, count: int = 2,
+                        slots: int = 1, use_thread: bool = False, heartbeat_interval: float = 1.0) -> LocalWorkers:
+    """
+    在本机启动count个工作进程连接到address，参数同run_worker
+    """
+    return LocalWorkers(address, authkey, count, slots, use_thread, heartbeat_interval)
+
+
+def _parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port or DEFAULT_PORT)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='GalaxyTools ConcurrentMap 远程工作进程')
+    parser.add_argument('--connect', required=True, help='调度器地址 host:port')
+    parser.add_argument('--authkey', default=None, help=f'认证密钥，默认读取 {AUTHKEY_ENV} 环境变量')
+    parser.add_argument('--slots', type=int, default=None, help='同时执行的任务数，默认为 CPU 核数')
+    parser.add_argument('--threads', action='store_true', help='在线程池而不是进程池中执行任务')
+    parser.add_argument('--heartbeat', type=float, default=1.0, help='心跳间隔（秒）')
+    parser.add_argument('--once', action='store_true', help='与调度器断开后退出，不再重连')
+    parser.add_argument('--name', default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    _exit_on_sigterm()
+    run_worker(_parse_address(args.connect), args.authkey, args.slots, args.threads, args.heartbeat,
+               not args.once, args.name)
+
+
+if __name__ == '__main__':
+    # 通过模块路径调用，使传给本机进程池的 _execute 可以按 GalaxyTools.utils.cluster 导入
+    from GalaxyTools.utils.cluster import main as _main
+    _main(sys.argv[1:])
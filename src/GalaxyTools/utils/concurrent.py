@@ -1,12 +1,34 @@
 import concurrent.futures
-from typing import Callable, Iterable, Any, List, Optional
+from typing import Callable, Iterable, Iterator, Any, Dict, List, Optional, Union
+import os
 import time
+import atexit
+import pickle
+import logging
 import threading
+import types
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from contextlib import contextmanager
+from itertools import islice
 from functools import wraps
 from functools import partial
 
+from .tracing import active_trace
+
+logger = logging.getLogger(__name__)
+
+class TaskTimeout(TimeoutError):
+    """超时任务在结果列表中对应位置的占位对象"""
+
 def timeout_decorator(timeout):
-    """装饰器：为函数添加超时限制"""
+    """
+    装饰器：为函数添加超时限制
+    
+    注意：Python无法强制终止线程，超时后函数仍会在后台守护线程中运行到结束。
+    ConcurrentMap的timeout参数不再依赖该装饰器。
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -35,6 +57,441 @@ def timeout_decorator(timeout):
         return wrapper
     return decorator
 
+def _apply_chunk(func: Callable, chunk: List[Any]) -> List[Any]:
+    """在工作进程中顺序处理一个分块，减少进程间通信次数"""
+    return [func(item) for item in chunk]
+
+def _apply_chunk_timed(func: Callable, chunk: List[Any]) -> tuple:
+    """处理一个分块并返回工作进程内的纯计算耗时，用于自适应分块"""
+    start = time.perf_counter()
+    results = [func(item) for item in chunk]
+    return results, time.perf_counter() - start
+
+# 自适应分块时每个分块的目标计算耗时：足以摊薄一次进程间通信，又不至于让各进程负载失衡
+TARGET_CHUNK_SECONDS = 0.05
+MAX_AUTO_CHUNKSIZE = 4096
+
+class _AdaptiveChunker:
+    """根据已完成分块测得的单项耗时（指数滑动平均）决定下一个分块的大小"""
+    
+    def __init__(self, iterator: Iterator[Any]):
+        self.iterator = iterator
+        self.size = 1
+        self.per_item = None
+    
+    def __call__(self) -> List[Any]:
+        return list(islice(self.iterator, self.size))
+    
+    def observe(self, count: int, elapsed: float) -> None:
+        if not count:
+            return
+        sample = elapsed / count
+        self.per_item = sample if self.per_item is None else 0.7 * self.per_item + 0.3 * sample
+        if self.per_item <= 0:
+            self.size = MAX_AUTO_CHUNKSIZE
+        else:
+            self.size = max(1, min(MAX_AUTO_CHUNKSIZE, int(TARGET_CHUNK_SECONDS / self.per_item)))
+
+def _bounded_map(executor: concurrent.futures.Executor, func: Callable, iterable: Iterable,
+                 window: int, ordered: bool = True, chunksize: Optional[int] = 1,
+                 shared=None) -> Iterator[Any]:
+    """
+    在 executor 上执行 func，同一时刻最多有 window 个任务（分块）在执行或排队，
+    输入按需从迭代器中读取，结果一旦可用就立即产出。
+    chunksize为None时从单项开始，按测得的单项耗时自动调整分块大小。
+    shared为SharedLedger时，输入在提交时才放入共享内存。
+    """
+    iterator = iter(iterable)
+    chunked = chunksize is None or chunksize > 1
+    tracer = active_trace()
+    if tracer is not None:
+        executor = tracer.bind(executor, chunked=chunked)
+    if shared is not None:
+        executor = shared.bind(executor, chunked)
+    chunker = None
+    if chunksize is None:
+        chunker = _AdaptiveChunker(iterator)
+        chunks = iter(chunker, [])
+        submit = lambda chunk: executor.submit(_apply_chunk_timed, func, chunk)
+    elif chunksize > 1:
+        chunks = iter(lambda: list(islice(iterator, chunksize)), [])
+        submit = lambda chunk: executor.submit(_apply_chunk, func, chunk)
+    else:
+        chunks = iterator
+        submit = lambda item: executor.submit(func, item)
+
+    pending = deque() if ordered else set()
+    add = pending.append if ordered else pending.add
+    for chunk in islice(chunks, window):
+        add(submit(chunk))
+    try:
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+                done[0].result()
+            else:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                add = pending.add
+            for future in done:
+                if chunker is not None:
+                    results, elapsed = future.result()
+                    chunker.observe(len(results), elapsed)
+                # 先补充新任务再产出结果，保持 executor 满载
+                for chunk in islice(chunks, 1):
+                    add(submit(chunk))
+                if chunker is not None:
+                    yield from results
+                elif chunksize > 1:
+                    yield from future.result()
+                else:
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+class WorkerPool(concurrent.futures.Executor):
+    """
+    可复用的命名工作池，首次提交任务时才创建底层的线程池/进程池，
+    之后在多次map调用之间共享，避免反复创建进程、重复导入模块。
+    进程池崩溃（BrokenProcessPool）后会在下一次提交时自动重建。
+    """
+    
+    def __init__(self, name: str, use_thread: bool = True, max_workers: int = None,
+                 initializer: Callable = None, initargs: tuple = ()):
+        """
+        Args:
+            name: 工作池名称
+            use_thread: 是否使用线程池，False时使用进程池
+            max_workers: 最大工作线程/进程数，默认与thread_map/process_map一致
+            initializer: 每个工作线程/进程启动时调用一次，用于预热（如加载模型、创建客户端）
+            initargs: 传递给initializer的参数
+        """
+        if max_workers is None:
+            if use_thread:
+                max_workers = min(32, (os.cpu_count() or 1) * 5)
+            else:
+                max_workers = os.cpu_count() or 1
+        self.name = name
+        self.use_thread = use_thread
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._lock = threading.Lock()
+        self._created = None
+        self._restarts = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+    
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._executor is None:
+                executor_class = concurrent.futures.ThreadPoolExecutor if self.use_thread \
+                    else concurrent.futures.ProcessPoolExecutor
+                self._executor = executor_class(
+                    max_workers=self.max_workers,
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+                if self._created is not None:
+                    self._restarts += 1
+                self._created = time.time()
+            return self._executor
+    
+    def _on_done(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if future.cancelled():
+                self._cancelled += 1
+            elif future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+    
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        executor = self.executor
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except concurrent.futures.BrokenExecutor:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            future = self.executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+    
+    def terminate(self) -> bool:
+        """
+        强制终止进程池中的所有工作进程并丢弃执行器，下次提交时重建。在途任务以BrokenProcessPool失败。
+        Python 3.14起使用ProcessPoolExecutor.kill_workers，更早的版本没有公开接口，
+        退而终止执行器私有的_processes中记录的进程。
+        
+        Returns:
+            是否终止了工作进程，线程池无法强制终止，返回False
+        """
+        if self.use_thread:
+            return False
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return True
+        kill_workers = getattr(executor, 'kill_workers', None)
+        if kill_workers is not None:
+            kill_workers()
+        else:
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            工作池统计信息：提交、完成、失败、取消、正在执行或排队的任务数，以及重建次数等
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'kind': 'thread' if self.use_thread else 'process',
+                'max_workers': self.max_workers,
+                'alive': self._executor is not None,
+                'created': self._created,
+                'restarts': self._restarts,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'cancelled': self._cancelled,
+                'pending': self._submitted - self._completed - self._failed - self._cancelled,
+            }
+
+_POOLS: Dict[str, WorkerPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+def _reset_pools_after_fork():
+    # 子进程中父进程的工作线程/进程都不存在，丢弃后按需重建
+    global _POOLS_LOCK
+    _POOLS_LOCK = threading.Lock()
+    _POOLS.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+@atexit.register
+def _shutdown_pools_at_exit():
+    ConcurrentMap.shutdown_pools(wait=True)
+
+@contextmanager
+def _executor_scope(pool: Optional[WorkerPool], use_thread: bool, max_workers: int):
+    """使用共享工作池时不关闭它，否则创建一次性的执行器并在结束时关闭"""
+    if pool is not None:
+        yield pool
+        return
+    executor_class = concurrent.futures.ThreadPoolExecutor if use_thread \
+        else concurrent.futures.ProcessPoolExecutor
+    with executor_class(max_workers=max_workers) as executor:
+        yield executor
+
+@dataclass
+class ExecutorDecision:
+    """async_map根据采样测量选择执行方式的结果，可通过ConcurrentMap.explain查看"""
+    mode: str            # 'thread' | 'process' | 'hybrid'
+    reason: str
+    cpu_ratio: float     # 采样中CPU时间 / 墙钟时间
+    wall_time: float     # 单项平均墙钟时间（秒）
+    cpu_time: float      # 单项平均CPU时间（秒）
+    picklable: bool
+    sampled: int
+
+# CPU时间占墙钟时间的比例高于该值视为CPU密集型，低于IO_BOUND_RATIO视为I/O密集型，介于两者之间为混合型
+CPU_BOUND_RATIO = 0.7
+IO_BOUND_RATIO = 0.3
+# 单项耗时低于该值时进程间通信的开销超过计算本身，CPU时间占比也因计时精度不可靠，一律使用线程池
+MIN_PROCESS_ITEM_SECONDS = 0.001
+
+_DECISIONS = weakref.WeakKeyDictionary()
+_DECISIONS_STRONG: Dict[Any, ExecutorDecision] = {}
+# 绑定方法每次访问都是新对象，弱引用会立即失效，改为 实例（弱引用）-> {底层函数: ExecutorDecision}
+_METHOD_DECISIONS = weakref.WeakKeyDictionary()
+
+def _decision_store(func: Callable, create: bool = False) -> tuple:
+    """
+    Returns:
+        记住func的执行方式所用的(字典, 键)，实例不支持弱引用的绑定方法不记住，返回(None, None)
+    """
+    if isinstance(func, types.MethodType):
+        try:
+            methods = _METHOD_DECISIONS.get(func.__self__)
+            if methods is None and create:
+                methods = _METHOD_DECISIONS[func.__self__] = {}
+        except TypeError:
+            return None, None
+        return methods, func.__func__
+    try:
+        weakref.ref(func)
+    except TypeError:
+        # 内置函数等不支持弱引用
+        return _DECISIONS_STRONG, func
+    return _DECISIONS, func
+
+def _measured_call(func: Callable, item: Any) -> tuple:
+    """执行一次func并返回(结果, 墙钟时间, 当前线程CPU时间)"""
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    result = func(item)
+    return result, time.perf_counter() - wall, time.thread_time() - cpu
+
+def _apply_chunk_threaded(func: Callable, chunk: List[Any], threads: int) -> List[Any]:
+    """混合模式：在工作进程内再用线程池处理一个分块"""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(func, chunk))
+
+def _is_picklable(*objects: Any) -> bool:
+    try:
+        for obj in objects:
+            pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+_MAX_RESUBMITS = 3
+
+def _timed_call(started: Dict[int, float], index: int, func: Callable, item: Any) -> Any:
+    """线程池中记录任务真正开始执行的时间，排队时间不计入单项超时"""
+    started[index] = time.monotonic()
+    return func(item)
+
+def _map_with_deadlines(pool: WorkerPool, func: Callable, iterable: Iterable, timeout: float = None,
+                        batch_timeout: float = None, hard_kill: bool = False,
+                        cancel_event: threading.Event = None, shared=None) -> List[Any]:
+    """
+    带单项与整批截止时间的map，结果按输入顺序返回。
+    每个位置为函数返回值、函数抛出的异常对象、TaskTimeout（超时）或CancelledError（被取消）。
+    
+    线程池中单项超时从任务开始执行算起；进程池中同时只提交max_workers个任务，
+    任务提交后立即开始执行，超时从提交算起。hard_kill时超时会通过WorkerPool.terminate终止整个进程池，
+    其他未超时的在途任务在重建后的进程池中重新执行；无法终止的工作池（如远程工作池）只标记超时。
+    shared为SharedLedger时，输入在提交时才放入共享内存，放弃的任务不会再创建共享内存。
+    """
+    use_thread = pool.use_thread
+    window = pool.max_workers * 2 if use_thread else pool.max_workers
+    iterator = enumerate(iterable)
+    retry = deque()
+    results: Dict[int, Any] = {}
+    running: Dict[concurrent.futures.Future, tuple] = {}
+    zombies = set()
+    started: Dict[int, float] = {}
+    attempts: Dict[int, int] = {}
+    batch_deadline = time.monotonic() + batch_timeout if batch_timeout else None
+    exhausted = False
+    submitter = pool
+    tracer = active_trace()
+    if tracer is not None:
+        submitter = tracer.bind(submitter)
+    if shared is not None:
+        submitter = shared.bind(submitter)
+    submit_task = submitter.submit
+    
+    def submit(index, item):
+        if use_thread:
+            future = submit_task(_timed_call, started, index, func, item)
+        else:
+            started[index] = time.monotonic()
+            future = submit_task(func, item)
+        running[future] = (index, item)
+    
+    def abandon(marker):
+        # 标记所有在途与未提交的任务并停止等待
+        for future, (index, _) in running.items():
+            future.cancel()
+            results[index] = marker(index)
+        running.clear()
+        for index, _ in retry:
+            results[index] = marker(index)
+        retry.clear()
+        for index, _ in iterator:
+            results[index] = marker(index)
+    
+    while True:
+        zombies = {future for future in zombies if not future.done()}
+        while len(running) + len(zombies) < window:
+            if retry:
+                submit(*retry.popleft())
+                continue
+            if exhausted:
+                break
+            try:
+                index, item = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            submit(index, item)
+        if not running:
+            break
+        
+        now = time.monotonic()
+        deadlines = [batch_deadline] if batch_deadline else []
+        if timeout:
+            deadlines += [started[index] + timeout for index, _ in running.values() if index in started]
+        wait_for = max(0.0, min(deadlines) - now) if deadlines else None
+        if cancel_event is not None:
+            wait_for = 0.05 if wait_for is None else min(wait_for, 0.05)
+        done, _ = concurrent.futures.wait(list(running), timeout=wait_for,
+                                          return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            index, item = running.pop(future)
+            started.pop(index, None)
+            if future.cancelled():
+                results[index] = concurrent.futures.CancelledError()
+                continue
+            exception = future.exception()
+            if isinstance(exception, concurrent.futures.BrokenExecutor) and not use_thread \
+                    and attempts.get(index, 0) < _MAX_RESUBMITS:
+                # 进程池被强制终止或工作进程崩溃时在途的任务，在重建的进程池中重新执行
+                attempts[index] = attempts.get(index, 0) + 1
+                retry.append((index, item))
+            else:
+                results[index] = exception if exception is not None else future.result()
+        
+        now = time.monotonic()
+        if cancel_event is not None and cancel_event.is_set():
+            abandon(lambda index: concurrent.futures.CancelledError())
+            break
+        if batch_deadline is not None and now >= batch_deadline:
+            abandon(lambda index: TaskTimeout(f"任务 {index} 未在整批截止时间 {batch_timeout} 秒内完成"))
+            break
+        if not timeout:
+            continue
+        expired = [future for future, (index, _) in running.items()
+                   if index in started and now - started[index] >= timeout]
+        for future in expired:
+            index, _ = running.pop(future)
+            started.pop(index, None)
+            results[index] = TaskTimeout(f"任务 {index} 执行超过 {timeout} 秒")
+            if not future.cancel():
+                zombies.add(future)
+        if expired and hard_kill and not use_thread and pool.terminate():
+            for future, (index, item) in running.items():
+                started.pop(index, None)
+                attempts[index] = attempts.get(index, 0) + 1
+                retry.append((index, item))
+            running.clear()
+            zombies.clear()
+    
+    return [results[index] for index in range(len(results))]
+
 class ConcurrentMap:
     """
     并发版本的map函数实现，支持额外参数
@@ -42,7 +499,8 @@ class ConcurrentMap:
     
     @staticmethod
     def thread_map(func: Callable, iterable: Iterable, *args, max_workers: int = None, 
-                   timeout: float = None, **kwargs) -> List[Any]:
+                   timeout: float = None, pool: Union[str, WorkerPool] = None,
+                   batch_timeout: float = None, cancel_event: threading.Event = None, **kwargs) -> List[Any]:
         """
         使用线程池实现的map，支持额外参数
         
@@ -51,13 +509,20 @@ class ConcurrentMap:
             iterable: 可迭代对象
             *args: 传递给函数的额外位置参数
             max_workers: 最大工作线程数，默认使用cpu_count() * 5
-            timeout: 超时时间（秒）
+            timeout: 单项超时时间（秒），从任务开始执行算起
+            pool: 共享工作池或其名称（见get_pool），默认为None（每次调用创建新的线程池）
+            batch_timeout: 整批截止时间（秒），到期后未完成的任务均记为超时
+            cancel_event: 被set后立即取消尚未开始的任务并返回
             **kwargs: 传递给函数的额外关键字参数
         
         Returns:
-            处理结果列表
+            处理结果列表，与输入顺序一致。设置了timeout/batch_timeout/cancel_event时，
+            出错的位置为异常对象，超时为TaskTimeout，被取消为CancelledError。
+            超时的线程无法被强制终止，会在后台运行到结束。
         """
-        import os
+        if pool is not None:
+            pool = ConcurrentMap._resolve_pool(pool, True, max_workers)
+            max_workers = pool.max_workers
         if max_workers is None:
             max_workers = min(32, (os.cpu_count() or 1) * 5)
         
@@ -65,24 +530,18 @@ class ConcurrentMap:
         if args or kwargs:
             func = partial(func, *args, **kwargs)
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            if timeout:
-                timed_func = timeout_decorator(timeout)(func)
-                futures = {executor.submit(func, item): item for item in iterable}
-                results = []
-                for future in concurrent.futures.as_completed(futures, timeout=timeout):
-                    try:
-                        result = future.result()
-                        results.append(result)
-                    except Exception as e:
-                        results.append(e)
-                return results
-            else:
-                return list(executor.map(func, iterable))
+        if timeout or batch_timeout or cancel_event is not None:
+            return ConcurrentMap._deadline_map(pool, True, max_workers, func, iterable,
+                                               timeout, batch_timeout, False, cancel_event)
+        with _executor_scope(pool, True, max_workers) as executor:
+            return list(_bounded_map(executor, func, iterable, max_workers * 2))
     
     @staticmethod
     def process_map(func: Callable, iterable: Iterable, *args, max_workers: int = None, 
-                    timeout: float = None, chunksize: int = 1, **kwargs) -> List[Any]:
+                    timeout: float = None, chunksize: Optional[int] = None,
+                    pool: Union[str, WorkerPool] = None, batch_timeout: float = None,
+                    cancel_event: threading.Event = None, hard_kill: bool = False,
+                    shared_memory_threshold: int = None, **kwargs) -> List[Any]:
         """
         使用进程池实现的map（适合CPU密集型任务），支持额外参数
         
@@ -91,14 +550,23 @@ class ConcurrentMap:
             iterable: 可迭代对象
             *args: 传递给函数的额外位置参数
             max_workers: 最大工作进程数，默认使用cpu_count()
-            timeout: 超时时间（秒）
-            chunksize: 分块大小，提高大任务性能
+            timeout: 单项超时时间（秒）
+            chunksize: 分块大小，提高大任务性能（设置超时时不分块）。默认为None，按测得的单项耗时自动调整
+            pool: 共享工作池或其名称（见get_pool），默认为None（每次调用创建新的进程池）
+            batch_timeout: 整批截止时间（秒），到期后未完成的任务均记为超时
+            cancel_event: 被set后立即取消尚未开始的任务并返回
+            hard_kill: 单项超时时强制终止进程池中的工作进程，其余在途任务在新进程中重新执行
+            shared_memory_threshold: 不小于该字节数的bytes/NumPy数组参数与结果通过共享内存传递而不是pickle，
+                默认为None（不使用共享内存）
             **kwargs: 传递给函数的额外关键字参数
         
         Returns:
-            处理结果列表
+            处理结果列表，与输入顺序一致。设置了timeout/batch_timeout/cancel_event时，
+            出错的位置为异常对象，超时为TaskTimeout，被取消为CancelledError。
         """
-        import os
+        if pool is not None:
+            pool = ConcurrentMap._resolve_pool(pool, False, max_workers)
+            max_workers = pool.max_workers
         if max_workers is None:
             max_workers = os.cpu_count() or 1
         
@@ -106,82 +574,447 @@ class ConcurrentMap:
         if args or kwargs:
             func = partial(func, *args, **kwargs)
         
-        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-            if timeout:
-                futures = {executor.submit(func, item): item for item in iterable}
-                results = []
-                for future in concurrent.futures.as_completed(futures, timeout=timeout):
-                    try:
-                        result = future.result()
-                        results.append(result)
-                    except Exception as e:
-                        results.append(e)
-                return results
+        shared = None
+        if shared_memory_threshold is not None:
+            from .shm import shared_call, SharedLedger
+            func = partial(shared_call, func, shared_memory_threshold)
+            shared = SharedLedger(shared_memory_threshold)
+        
+        try:
+            if timeout or batch_timeout or cancel_event is not None:
+                results = ConcurrentMap._deadline_map(pool, False, max_workers, func, iterable,
+                                                      timeout, batch_timeout, hard_kill, cancel_event, shared)
+            else:
+                with _executor_scope(pool, False, max_workers) as executor:
+                    # 使用chunksize提高大任务性能
+                    results = list(_bounded_map(executor, func, iterable, max_workers * 2,
+                                                chunksize=chunksize, shared=shared))
+            if shared is not None:
+                results = [shared.receive(result) for result in results]
+            return results
+        finally:
+            if shared is not None:
+                # 释放被放弃的任务的参数与没有取走的结果
+                shared.close()
+    
+    @staticmethod
+    def imap(func: Callable, iterable: Iterable, *args, max_workers: int = None,
+             use_thread: bool = True, window: int = None, ordered: bool = True,
+             chunksize: Optional[int] = 1, pool: Union[str, WorkerPool] = None, **kwargs) -> Iterator[Any]:
+        """
+        流式的并发map：按需读取输入，结果一旦可用就产出，内存占用与输入长度无关
+        
+        Args:
+            func: 要执行的函数
+            iterable: 可迭代对象，可以是无限长或大于内存的迭代器
+            *args: 传递给函数的额外位置参数
+            max_workers: 最大工作线程/进程数，默认与thread_map/process_map一致
+            use_thread: 是否使用线程池，False时使用进程池
+            window: 同时在执行或排队的任务（分块）数上限，默认为max_workers * 2
+            ordered: 是否按输入顺序产出结果，False时按完成顺序产出
+            chunksize: 分块大小，用于进程池减少通信开销，None表示按测得的单项耗时自动调整
+            pool: 共享工作池或其名称（见get_pool），指定时忽略use_thread
+            **kwargs: 传递给函数的额外关键字参数
+        
+        Returns:
+            结果迭代器
+        """
+        if pool is not None:
+            pool = ConcurrentMap._resolve_pool(pool, use_thread, max_workers)
+            max_workers = pool.max_workers
+        if max_workers is None:
+            if use_thread:
+                max_workers = min(32, (os.cpu_count() or 1) * 5)
             else:
-                # 使用chunksize提高大任务性能
-                return list(executor.map(func, iterable, chunksize=chunksize))
+                max_workers = os.cpu_count() or 1
+        if window is None:
+            window = max_workers * 2
+        
+        # 使用partial固定额外参数
+        if args or kwargs:
+            func = partial(func, *args, **kwargs)
+        
+        with _executor_scope(pool, use_thread, max_workers) as executor:
+            yield from _bounded_map(executor, func, iterable, window, ordered, chunksize)
+    
+    @staticmethod
+    def imap_unordered(func: Callable, iterable: Iterable, *args, **kwargs) -> Iterator[Any]:
+        """
+        按完成顺序产出结果的imap，参数同imap
+        """
+        return ConcurrentMap.imap(func, iterable, *args, ordered=False, **kwargs)
+    
+    @staticmethod
+    def hybrid_map(func: Callable, iterable: Iterable, *args, max_workers: int = None,
+                   threads_per_worker: int = 4, chunksize: int = None,
+                   pool: Union[str, WorkerPool] = None, **kwargs) -> List[Any]:
+        """
+        混合模式的map：进程池中的每个工作进程再用线程池处理分到的分块，
+        适合既有明显CPU开销又有I/O等待的任务
+        
+        Args:
+            func: 要执行的函数，需要可以被pickle
+            iterable: 可迭代对象
+            *args: 传递给函数的额外位置参数
+            max_workers: 最大工作进程数，默认使用cpu_count()
+            threads_per_worker: 每个工作进程内的线程数
+            chunksize: 每次发给工作进程的分块大小，默认为threads_per_worker * 2
+            pool: 共享的进程工作池或其名称（见get_pool）
+            **kwargs: 传递给函数的额外关键字参数
+        
+        Returns:
+            处理结果列表
+        """
+        if pool is not None:
+            pool = ConcurrentMap._resolve_pool(pool, False, max_workers)
+            max_workers = pool.max_workers
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = threads_per_worker * 2
+        
+        # 使用partial固定额外参数
+        if args or kwargs:
+            func = partial(func, *args, **kwargs)
+        
+        chunks = iter(partial(lambda it: list(islice(it, chunksize)), iter(iterable)), [])
+        task = partial(_apply_chunk_threaded, func, threads=threads_per_worker)
+        with _executor_scope(pool, False, max_workers) as executor:
+            results = []
+            for chunk_results in _bounded_map(executor, task, chunks, max_workers * 2):
+                results.extend(chunk_results)
+            return results
     
     @staticmethod
     def async_map(func: Callable, iterable: Iterable, *args, max_workers: int = None, 
-                  timeout: float = None, chunksize: int = 1, 
-                  cpu_intensive: Optional[bool] = None, **kwargs) -> List[Any]:
+                  timeout: float = None, chunksize: Optional[int] = None, 
+                  cpu_intensive: Optional[bool] = None,
+                  pool: Union[str, WorkerPool] = None, sample_size: int = 3, **kwargs) -> List[Any]:
         """
         优化的map实现，自动根据任务类型选择执行方式，支持额外参数
         
+        未指定cpu_intensive时，先在当前线程中串行执行前sample_size项并测量墙钟时间与CPU时间，
+        结合func与参数能否被pickle选择线程池、进程池或混合模式（见profile），
+        采样项的结果直接计入返回值，不会重复执行。选择结果按函数记忆，之后的调用不再采样。
+        
         Args:
             func: 要执行的函数
             iterable: 可迭代对象
             *args: 传递给函数的额外位置参数
             max_workers: 最大工作线程/进程数
             timeout: 超时时间（秒）
-            chunksize: 分块大小，用于ProcessPoolExecutor提高性能
+            chunksize: 分块大小，用于ProcessPoolExecutor提高性能，默认为None（自动调整）
             cpu_intensive: 手动指定是否是CPU密集型任务，None表示自动判断
+            pool: 共享工作池或其名称（见get_pool），已存在时由工作池类型决定执行方式
+            sample_size: 自动判断时采样的项数
             **kwargs: 传递给函数的额外关键字参数
         
         Returns:
             处理结果列表
         """
-        # 判断是否是CPU密集型任务
+        if isinstance(pool, str) and pool in _POOLS:
+            pool = _POOLS[pool]
+        if isinstance(pool, WorkerPool):
+            cpu_intensive = not pool.use_thread
+        
+        prefix = []
         if cpu_intensive is None:
-            cpu_intensive = ConcurrentMap._is_cpu_intensive(func)
+            decision = ConcurrentMap.explain(func)
+            if decision is None:
+                iterator = iter(iterable)
+                sample = list(islice(iterator, sample_size))
+                bound = partial(func, *args, **kwargs) if args or kwargs else func
+                decision, prefix = ConcurrentMap._profile_sample(bound, sample, timeout)
+                ConcurrentMap._remember(func, decision)
+                iterable = iterator
+            mode = decision.mode
+        else:
+            mode = 'process' if cpu_intensive else 'thread'
+        
+        if isinstance(pool, str):
+            pool = ConcurrentMap._resolve_pool(pool, mode == 'thread', max_workers)
         
-        if cpu_intensive:
-            return ConcurrentMap.process_map(
+        if mode == 'hybrid' and not timeout:
+            results = ConcurrentMap.hybrid_map(
+                func, iterable, *args,
+                max_workers=max_workers,
+                pool=pool,
+                **kwargs
+            )
+        elif mode != 'thread':
+            results = ConcurrentMap.process_map(
                 func, iterable, *args, 
                 max_workers=max_workers, 
                 timeout=timeout, 
                 chunksize=chunksize, 
+                pool=pool,
                 **kwargs
             )
         else:
-            return ConcurrentMap.thread_map(
+            results = ConcurrentMap.thread_map(
                 func, iterable, *args, 
                 max_workers=max_workers, 
                 timeout=timeout, 
+                pool=pool,
                 **kwargs
             )
+        return prefix + results if prefix else results
+    
+    @staticmethod
+    def profile(func: Callable, items: Iterable, *args, sample_size: int = 3, **kwargs) -> ExecutorDecision:
+        """
+        对func采样测量并记住执行方式，不执行完整的map
+        
+        Args:
+            func: 要测量的函数
+            items: 用于采样的输入，只取前sample_size项
+            *args: 传递给函数的额外位置参数
+            sample_size: 采样项数
+            **kwargs: 传递给函数的额外关键字参数
+        
+        Returns:
+            ExecutorDecision
+        """
+        bound = partial(func, *args, **kwargs) if args or kwargs else func
+        decision, _ = ConcurrentMap._profile_sample(bound, list(islice(items, sample_size)), None)
+        ConcurrentMap._remember(func, decision)
+        return decision
     
     @staticmethod
-    def _is_cpu_intensive(func: Callable) -> bool:
+    def benchmark(func: Callable, iterable: Iterable, *args, max_workers: int = None,
+                  chunksize: Optional[int] = None, shared_memory_threshold: int = None,
+                  **kwargs) -> dict:
         """
-        简单判断函数是否是CPU密集型
+        以process_map相同的方式执行一遍并报告开销构成，用于调整chunksize与shared_memory_threshold
         
-        这里可以扩展更复杂的判断逻辑
+        serialization_time为在当前进程中对参数和结果各做一次pickle.dumps/loads的耗时
+        （即不使用共享内存时的序列化成本），
+        ipc_overhead为工作进程的总可用时间（wall_time * max_workers）中没有用于计算的部分，
+        包括序列化、管道传输、调度与负载不均。
+        
+        Args:
+            func: 要执行的函数
+            iterable: 可迭代对象
+            *args: 传递给函数的额外位置参数
+            max_workers: 最大工作进程数
+            chunksize: 分块大小，默认为None（自动调整）
+            shared_memory_threshold: 同process_map
+            **kwargs: 传递给函数的额外关键字参数
+        
+        Returns:
+            dict: items, max_workers, chunksize, wall_time, compute_time, serialization_time,
+                ipc_overhead, efficiency, results
         """
-        # 简单的启发式判断
-        func_name = func.__name__.lower()
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        items = list(iterable)
+        bound = partial(func, *args, **kwargs) if args or kwargs else func
+        if shared_memory_threshold is not None:
+            from .shm import shared_call
+            bound = partial(shared_call, bound, shared_memory_threshold)
+        
+        start = time.perf_counter()
+        measured = ConcurrentMap.process_map(partial(_measured_call, bound), items,
+                                             max_workers=max_workers, chunksize=chunksize)
+        wall = time.perf_counter() - start
+        if shared_memory_threshold is not None:
+            from .shm import from_shared
+            results = [from_shared(result) for result, _, _ in measured]
+        else:
+            results = [result for result, _, _ in measured]
+        compute = sum(elapsed for _, elapsed, _ in measured)
         
-        # 一些可能表示CPU密集型的函数名关键词
-        cpu_keywords = {
-            'compute', 'calculate', 'process', 'analyze', 'simulate',
-            'train', 'fit', 'predict', 'transform', 'encode', 'decode'
+        start = time.perf_counter()
+        for obj in items + results:
+            pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+        serialization = time.perf_counter() - start
+        
+        capacity = wall * min(max_workers, max(len(items), 1))
+        return {
+            'items': len(items),
+            'max_workers': max_workers,
+            'chunksize': chunksize if chunksize is not None else 'auto',
+            'wall_time': wall,
+            'compute_time': compute,
+            'serialization_time': serialization,
+            'ipc_overhead': max(capacity - compute, 0.0),
+            'efficiency': compute / capacity if capacity > 0 else 0.0,
+            'results': results,
         }
+    
+    @staticmethod
+    def explain(func: Callable) -> Optional[ExecutorDecision]:
+        """
+        Returns:
+            async_map为func记住的执行方式及其依据，尚未采样时为None
+        """
+        store, key = _decision_store(func)
+        return store.get(key) if store is not None else None
+    
+    @staticmethod
+    def forget(func: Callable = None) -> None:
+        """清除记住的执行方式，func为None时全部清除"""
+        if func is None:
+            _DECISIONS.clear()
+            _DECISIONS_STRONG.clear()
+            _METHOD_DECISIONS.clear()
+            return
+        store, key = _decision_store(func)
+        if store is not None:
+            store.pop(key, None)
+    
+    @staticmethod
+    def _remember(func: Callable, decision: ExecutorDecision) -> None:
+        store, key = _decision_store(func, create=True)
+        if store is not None:
+            store[key] = decision
+        logger.debug(f"{getattr(func, '__qualname__', func)} 使用 {decision.mode}: {decision.reason}")
+    
+    @staticmethod
+    def _profile_sample(func: Callable, sample: List[Any], timeout: float = None) -> tuple:
+        """
+        串行执行采样项并据此决定执行方式
         
-        # 检查函数名是否包含CPU密集型关键词
-        for keyword in cpu_keywords:
-            if keyword in func_name:
-                return True
+        Returns:
+            (ExecutorDecision, 采样项的结果列表)
+        """
+        tracer = active_trace()
+        if timeout:
+            measured = ConcurrentMap.thread_map(partial(_measured_call, func), sample,
+                                                max_workers=1, timeout=timeout)
+        elif tracer is not None:
+            measured = [tracer.call(partial(_measured_call, func), item) for item in sample]
+        else:
+            measured = [_measured_call(func, item) for item in sample]
+        results = []
+        wall = cpu = 0.0
+        count = 0
+        for entry in measured:
+            if isinstance(entry, tuple):
+                results.append(entry[0])
+                wall += entry[1]
+                cpu += entry[2]
+                count += 1
+            else:
+                results.append(entry)
         
-        # 默认判断为I/O密集型，使用线程池
-        # 用户可以通过cpu_intensive参数手动指定
-        return False
+        picklable = _is_picklable(func, *sample[:1])
+        ratio = cpu / wall if wall > 0 else 0.0
+        if not count:
+            mode, reason = 'thread', '没有可用的采样，默认使用线程池'
+        elif wall / count < MIN_PROCESS_ITEM_SECONDS:
+            mode, reason = 'thread', f'单项耗时{wall / count * 1e6:.0f}µs，进程间通信的开销会超过计算本身'
+        elif ratio < IO_BOUND_RATIO:
+            mode, reason = 'thread', f'CPU时间占比{ratio:.0%}，以I/O等待为主'
+        elif not picklable:
+            mode, reason = 'thread', f'CPU时间占比{ratio:.0%}，但函数或参数无法pickle，只能使用线程池'
+        elif ratio >= CPU_BOUND_RATIO:
+            mode, reason = 'process', f'CPU时间占比{ratio:.0%}，受GIL限制需要多进程'
+        else:
+            mode, reason = 'hybrid', f'CPU时间占比{ratio:.0%}，计算与I/O混合，使用进程池+线程'
+        decision = ExecutorDecision(
+            mode=mode,
+            reason=reason,
+            cpu_ratio=ratio,
+            wall_time=wall / count if count else 0.0,
+            cpu_time=cpu / count if count else 0.0,
+            picklable=picklable,
+            sampled=len(sample),
+        )
+        return decision, results
+    
+    @staticmethod
+    def get_pool(name: str = 'default', use_thread: bool = True, max_workers: int = None,
+                 initializer: Callable = None, initargs: tuple = ()) -> WorkerPool:
+        """
+        获取命名的共享工作池，不存在时按参数创建（底层执行器在首次提交任务时才启动）。
+        已存在的同名工作池直接返回，其余参数被忽略。
+        
+        Args:
+            name: 工作池名称
+            use_thread: 是否使用线程池，False时使用进程池
+            max_workers: 最大工作线程/进程数
+            initializer: 每个工作线程/进程启动时调用一次的预热函数
+            initargs: 传递给initializer的参数
+        
+        Returns:
+            WorkerPool实例，可直接作为thread_map/process_map/imap/async_map的pool参数
+        """
+        with _POOLS_LOCK:
+            pool = _POOLS.get(name)
+            if pool is None:
+                pool = WorkerPool(name, use_thread, max_workers, initializer, initargs)
+                _POOLS[name] = pool
+            return pool
+    
+    @staticmethod
+    def get_remote_pool(name: str = 'cluster', address: tuple = ('127.0.0.1', 7100), authkey: Union[str, bytes] = None,
+                        max_workers: int = 64, **kwargs) -> WorkerPool:
+        """
+        获取命名的远程工作池并立即开始监听，工作进程通过TCP连接过来领取任务（见utils.cluster）。
+        已存在的同名工作池直接返回，其余参数被忽略。
+        
+        Args:
+            name: 工作池名称
+            address: 调度器监听的地址，默认只接受本机连接，接受其他机器的连接需显式指定'0.0.0.0'或网卡地址；
+                端口为0时由系统分配，实际地址见返回值的address属性
+            authkey: 认证密钥，默认读取GALAXYTOOLS_CLUSTER_KEY环境变量
+            max_workers: 同一次map中同时在途的任务（分块）数上限为其2倍，应不小于所有工作进程的槽数之和
+            **kwargs: 传递给RemotePool的其他参数（prefetch、heartbeat_timeout、max_retries）
+        
+        Returns:
+            RemotePool实例，可直接作为thread_map/process_map/imap/async_map/map_folder的pool参数
+        """
+        from .cluster import RemotePool
+        with _POOLS_LOCK:
+            pool = _POOLS.get(name)
+            if pool is None:
+                pool = RemotePool(name, address, authkey, max_workers, **kwargs)
+                _POOLS[name] = pool
+        pool.executor
+        return pool
+    
+    @staticmethod
+    def shutdown_pools(name: str = None, wait: bool = True) -> None:
+        """
+        关闭共享工作池，name为None时关闭全部；解释器退出时会自动调用
+        """
+        with _POOLS_LOCK:
+            names = [k for k in _POOLS if name is None or k == name]
+            pools = [_POOLS.pop(k) for k in names]
+        for pool in pools:
+            pool.shutdown(wait=wait)
+    
+    @staticmethod
+    def pool_stats() -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            所有共享工作池的统计信息
+        """
+        with _POOLS_LOCK:
+            pools = list(_POOLS.values())
+        return {pool.name: pool.stats() for pool in pools}
+    
+    @staticmethod
+    def _deadline_map(pool: Optional[WorkerPool], use_thread: bool, max_workers: int, func: Callable,
+                      iterable: Iterable, timeout: float, batch_timeout: float, hard_kill: bool,
+                      cancel_event: Optional[threading.Event], shared=None) -> List[Any]:
+        owned = pool is None
+        if owned:
+            pool = WorkerPool('', use_thread, max_workers)
+        clean = False
+        try:
+            results = _map_with_deadlines(pool, func, iterable, timeout, batch_timeout, hard_kill, cancel_event,
+                                          shared)
+            clean = not any(isinstance(r, (TaskTimeout, concurrent.futures.CancelledError)) for r in results)
+            return results
+        finally:
+            if owned:
+                # 存在超时或取消时不等待仍在运行的任务
+                pool.shutdown(wait=clean, cancel_futures=True)
+    
+    @staticmethod
+    def _resolve_pool(pool: Union[str, WorkerPool], use_thread: bool, max_workers: int = None) -> WorkerPool:
+        if isinstance(pool, str):
+            pool = ConcurrentMap.get_pool(pool, use_thread=use_thread, max_workers=max_workers)
+        return pool
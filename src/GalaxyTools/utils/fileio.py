@@ -0,0 +1,289 @@
+import os
+import mmap
+import stat
+import queue
+import codecs
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Union
+
+"""
+大文件的流式读写。
+
+读取基于 mmap：按块或按行迭代时只有当前块/行会被复制成 Python 对象，
+文件内容由操作系统按需换入换出，不会整体进入进程内存。
+
+for line in iter_lines('transcript.jsonl'):
+    ...
+with map_file('dump.bin') as view:     # 只读 memoryview，零拷贝
+    header = bytes(view[:16])
+
+写入先在内存中攒够 buffer_size 个字符再成批写出，默认写入同目录下的临时文件，关闭时再原子地 rename 到目标路径，
+读者永远不会看到写了一半的文件。background=True 时编码与写盘在后台线程中完成。
+换行符与 open() 的文本模式一致：默认把 '\n' 转换为 os.linesep，newline='' 或 '\n' 时原样写出。
+
+with TextWriter('out.jsonl', fsync='close', background=True) as writer:
+    for record in records:
+        writer.write(json.dumps(record) + '\n')
+"""
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_BUFFER_SIZE = 1 << 20
+FSYNC_POLICIES = ('never', 'close', 'batch')
+
+
+def _create_temp(directory: str, name: str) -> tuple:
+    """
+    在 directory 中创建临时文件，以 0666 创建并由内核按 umask 计算权限，与 open() 新建的文件一致。
+
+    返回:
+        tuple: (文件描述符, 临时文件路径)。
+    """
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp = os.path.join(directory, f".{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            return os.open(temp, flags, 0o666), temp
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def _mapped(file: str):
+    with open(file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # 空文件无法 mmap
+            yield b''
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield mm
+        finally:
+            mm.close()
+
+
+@contextmanager
+def map_file(file: str) -> Iterator[memoryview]:
+    """
+    以只读 memoryview 的形式映射整个文件，不复制数据。退出 with 块后 memoryview 失效。
+
+    参数:
+        file (str): 文件路径。
+    """
+    with _mapped(file) as mm:
+        view = memoryview(mm)
+        try:
+            yield view
+        finally:
+            view.release()
+
+
+def iter_chunks(file: str, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: Optional[str] = 'utf-8',
+                errors: str = 'strict') -> Iterator[Union[str, bytes]]:
+    """
+    按块迭代文件内容。
+
+    参数:
+        file (str): 文件路径。
+        chunk_size (int): 每块的字节数，默认为 1MiB。
+        encoding (str): 文本编码，默认为 'utf-8'；为 None 时产出 bytes。
+            被块边界截断的多字节字符会与下一块一起解码。
+        errors (str): 解码错误的处理方式，同 bytes.decode。
+    返回:
+        Iterator[str | bytes]: 文件内容块。
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors) if encoding else None
+    with _mapped(file) as mm:
+        for start in range(0, len(mm), chunk_size):
+            chunk = mm[start:start + chunk_size]
+            if decoder is None:
+                yield chunk
+            else:
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def iter_lines(file: str, encoding: Optional[str] = 'utf-8', errors: str = 'strict',
+               keepends: bool = False) -> Iterator[Union[str, bytes]]:
+    """
+    按行迭代文件内容，每次只复制一行。
+
+    参数:
+        file (str): 文件路径。
+        encoding (str): 文本编码，默认为 'utf-8'；为 None 时产出 bytes。
+            只适用于以 0x0A 作为换行符的编码（UTF-8、GBK 等），UTF-16 请使用 iter_chunks。
+        errors (str): 解码错误的处理方式，同 bytes.decode。
+        keepends (bool): 是否保留行尾的换行符，默认为 False（同时去掉 \\r\\n 中的 \\r）。
+    返回:
+        Iterator[str | bytes]: 文件中的每一行。
+    """
+    with _mapped(file) as mm:
+        size = len(mm)
+        pos = 0
+        while pos < size:
+            end = mm.find(b'\n', pos)
+            if end == -1:
+                end = size
+                next_pos = size
+            else:
+                next_pos = end + 1
+                if keepends:
+                    end = next_pos
+            if not keepends and end > pos and mm[end - 1] == 0x0D:
+                end -= 1
+            line = mm[pos:end]
+            yield line.decode(encoding, errors) if encoding else line
+            pos = next_pos
+
+
+def read_bytes(file: str) -> bytes:
+    """
+    读取文件的全部字节。需要避免复制时使用 map_file。
+    """
+    with open(file, 'rb') as f:
+        return f.read()
+
+
+class TextWriter:
+    """
+    成批写入、可原子替换、可在后台线程中写盘的文本写入器。
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8', buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 atomic: bool = True, fsync: str = 'never', background: bool = False,
+                 max_pending: int = 64, append: bool = False, newline: Optional[str] = None):
+        """
+        参数:
+            path (str): 目标文件路径，父目录不存在时会被创建。
+            encoding (str): 文本编码，默认为 'utf-8'。
+            buffer_size (int): 攒够多少字符后成批写出，默认为 1MiB。
+            atomic (bool): 是否先写临时文件、关闭时再 rename 到 path，默认为 True。append 为 True 时忽略。
+            fsync (str): 'never'、'close'（关闭前 fsync 一次）或 'batch'（每次成批写出后都 fsync），默认为 'never'。
+            background (bool): 是否在后台线程中编码并写盘，默认为 False。
+            max_pending (int): 后台模式下排队等待写出的批次上限，写入速度超过磁盘时 write 会阻塞。
+            append (bool): 是否追加到已有文件，默认为 False。
+            newline (str): 同 open()，默认为 None（'\n' 写为 os.linesep）；'' 或 '\n' 不转换，'\r\n'、'\r' 转换为该值。
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync 必须是 {FSYNC_POLICIES} 之一: {fsync}")
+        if newline not in (None, '', '\n', '\r', '\r\n'):
+            raise ValueError(f"非法的 newline: {newline!r}")
+        self.path = os.fspath(path)
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.atomic = atomic and not append
+        self.fsync = fsync
+        self.newline = os.linesep if newline is None else newline or '\n'
+        self.closed = False
+        self._parts = []
+        self._buffered = 0
+        self._error: Optional[BaseException] = None
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if self.atomic:
+            fd, self._temp = _create_temp(directory, os.path.basename(self.path))
+            self._file = os.fdopen(fd, 'wb')
+        else:
+            self._temp = None
+            self._file = open(self.path, 'ab' if append else 'wb')
+
+        self._queue = None
+        self._thread = None
+        if background:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._drain, name=f"TextWriter-{os.path.basename(self.path)}",
+                                            daemon=True)
+            self._thread.start()
+
+    def write(self, text: str) -> None:
+        if self.closed:
+            raise ValueError("写入已关闭的 TextWriter")
+        self._parts.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        """把已缓冲的内容交给磁盘（后台模式下交给写线程）"""
+        if self._error is not None:
+            raise self._error
+        if not self._parts:
+            return
+        parts, self._parts, self._buffered = self._parts, [], 0
+        if self._queue is not None:
+            self._queue.put(parts)
+        else:
+            self._write_batch(parts)
+
+    def _write_batch(self, parts: list) -> None:
+        text = ''.join(parts)
+        if self.newline != '\n':
+            text = text.replace('\n', self.newline)
+        self._file.write(text.encode(self.encoding))
+        if self.fsync == 'batch':
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _drain(self) -> None:
+        while True:
+            parts = self._queue.get()
+            if parts is None:
+                return
+            if self._error is None:
+                try:
+                    self._write_batch(parts)
+                except BaseException as e:
+                    self._error = e
+
+    def close(self, commit: bool = True) -> None:
+        """
+        写出剩余内容并关闭。atomic 模式下 commit 为 True 时 rename 到目标路径，否则丢弃临时文件。
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if commit:
+                self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+            try:
+                if commit and self._error is None and self.fsync != 'never':
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            finally:
+                self._file.close()
+            if self._temp is not None:
+                if commit and self._error is None:
+                    try:
+                        # 替换已有文件时保留它的权限
+                        os.chmod(self._temp, stat.S_IMODE(os.stat(self.path).st_mode))
+                    except FileNotFoundError:
+                        pass
+                    os.replace(self._temp, self.path)
+                else:
+                    os.unlink(self._temp)
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'TextWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # with 块内出错时不替换目标文件
+        self.close(commit=exc_type is None)
@@ -0,0 +1,239 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+"""
+map_folder 的增量模式：在 SQLite 中记录每个条目的 (大小, 修改时间, 内容哈希, 处理结果)，
+再次运行时未变化的条目直接返回记录的结果，不再调用 func。
+
+manifest = FolderManifest('./.corpus_manifest.db', hash_content=True)
+results = map_folder(parse, 'corpus', recursive=True, kind='file', manifest=manifest)
+print(manifest.report.summary())   # {'new': 12, 'changed': 3, 'deleted': 1, 'unchanged': 98234}
+
+大小与修改时间（纳秒）都相同即视为未变化；hash_content=True 时两者有变化但内容哈希相同的文件
+（如被 touch 或重新拷贝）同样视为未变化，哈希在工作线程/进程中计算。
+结果以 pickle 保存，无法 pickle 的结果不会被记录，下次运行时重新处理。
+清单不区分 func，处理函数变化后应使用新的清单文件。
+一次完整遍历结束后，本次未出现的条目（已删除或不再满足过滤条件）会从清单中移除并计入 deleted。
+"""
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+@dataclass
+class ManifestReport:
+    """一次增量运行的变化情况"""
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    def summary(self) -> dict:
+        return {
+            'new': len(self.new),
+            'changed': len(self.changed),
+            'deleted': len(self.deleted),
+            'unchanged': self.unchanged,
+        }
+
+
+def file_digest(path: str, algorithm: str = 'sha256') -> Optional[str]:
+    """
+    计算文件内容的哈希，目录返回 None。
+    """
+    if os.path.isdir(path):
+        return None
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# 交给工作线程/进程的任务：(路径, 大小, 修改时间, 已记录的哈希, 已记录的结果, 大小与修改时间是否未变)
+Task = Tuple[str, int, int, Optional[str], Optional[bytes], bool]
+
+
+def run_task(func: Callable, algorithm: Optional[str], task: Task) -> tuple:
+    """
+    在工作线程/进程中处理一个条目。已记录的结果保持 pickle 后的 bytes 原样返回，不在工作进程中反序列化。
+
+    返回:
+        tuple: ((路径, 大小, 修改时间), 状态, 内容哈希, 结果)，状态为 'unchanged'、'new' 或 'changed'。
+            大小与修改时间未变时结果为 None，由调用方从清单中读取，不经过工作进程。
+    """
+    path, _, _, prior_digest, stored, same_stat = task
+    head = task[:3]
+    if same_stat:
+        return head, 'unchanged', prior_digest, None
+    digest = file_digest(path, algorithm) if algorithm else None
+    if stored and digest is not None and digest == prior_digest:
+        return head, 'unchanged', digest, stored
+    return head, ('new' if stored is None else 'changed'), digest, func(path)
+
+
+class FolderManifest:
+    """
+    map_folder 增量模式使用的清单，可被多个线程和进程同时打开。
+    """
+
+    def __init__(self, path: str, hash_content: bool = False, algorithm: str = 'sha256',
+                 batch_size: int = 256):
+        """
+        参数:
+            path (str): SQLite 文件路径。
+            hash_content (bool): 大小或修改时间变化时是否比较内容哈希，默认为 False。
+            algorithm (str): hashlib 支持的哈希算法，默认为 'sha256'。
+            batch_size (int): 每多少条写入提交一次事务。
+        """
+        self.path = path
+        self.hash_content = hash_content
+        self.algorithm = algorithm
+        self.batch_size = batch_size
+        self.report = ManifestReport()
+        self._local = threading.local()
+        self._pending: List[tuple] = []
+        self._touched: List[tuple] = []
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "root TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "digest TEXT, result BLOB, seen INTEGER NOT NULL, updated REAL NOT NULL, "
+                "PRIMARY KEY (root, path))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # 与 ResponseCache 相同，按 (线程, pid) 各自打开连接
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def tasks(self, folder_path: str, item_paths: Iterable[str]) -> Iterator[Task]:
+        """
+        为每个条目生成任务，并判断其大小与修改时间是否与记录一致。
+        """
+        root = os.path.abspath(folder_path)
+        conn = self._connect()
+        for path in item_paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, folder_path)
+            row = conn.execute(
+                "SELECT size, mtime_ns, digest, result IS NOT NULL FROM entries WHERE root = ? AND path = ?",
+                (root, rel),
+            ).fetchone()
+            if row is None or not row[3]:
+                yield path, st.st_size, st.st_mtime_ns, None, None, False
+                continue
+            if row[0] == st.st_size and row[1] == st.st_mtime_ns:
+                yield path, st.st_size, st.st_mtime_ns, row[2], None, True
+                continue
+            stored = None
+            if self.hash_content:
+                stored = conn.execute("SELECT result FROM entries WHERE root = ? AND path = ?",
+                                      (root, rel)).fetchone()[0]
+            # 没有启用哈希时用空 bytes 标记“已有记录”，run_task 据此区分 new 与 changed
+            yield path, st.st_size, st.st_mtime_ns, row[2], stored if stored is not None else b'', False
+
+    def load(self, folder_path: str, path: str) -> Any:
+        """读取记录的结果"""
+        row = self._connect().execute(
+            "SELECT result FROM entries WHERE root = ? AND path = ?",
+            (os.path.abspath(folder_path), os.path.relpath(path, folder_path)),
+        ).fetchone()
+        return pickle.loads(row[0])
+
+    def record(self, folder_path: str, task: tuple, status: str, digest: Optional[str], result: Any,
+               run: int, stored: bool = False) -> None:
+        """
+        记录一个条目的处理结果。stored 为 True 时 result 是已记录结果的 pickle bytes。
+        """
+        path, size, mtime_ns = task[:3]
+        if status == 'unchanged':
+            self.report.unchanged += 1
+        elif status == 'new':
+            self.report.new.append(path)
+        else:
+            self.report.changed.append(path)
+        if stored:
+            blob = result
+        else:
+            try:
+                blob = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.warning(f"{path} 的结果无法 pickle，不会被记录: {e}")
+                blob = None
+        self._pending.append((os.path.abspath(folder_path), os.path.relpath(path, folder_path),
+                              size, mtime_ns, digest, blob, run, time.time()))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def touch(self, folder_path: str, path: str, run: int) -> None:
+        """标记未变化的条目在本次运行中出现过"""
+        self.report.unchanged += 1
+        self._touched.append((run, os.path.abspath(folder_path), os.path.relpath(path, folder_path)))
+        if len(self._touched) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """提交尚未写入的记录"""
+        if not self._pending and not self._touched:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (root, path, size, mtime_ns, digest, result, seen, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+            conn.executemany("UPDATE entries SET seen = ? WHERE root = ? AND path = ?", self._touched)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._pending = []
+        self._touched = []
+
+    def begin(self) -> int:
+        """开始一次运行，重置 report 并返回运行编号"""
+        self.report = ManifestReport()
+        self._pending = []
+        self._touched = []
+        return time.time_ns()
+
+    def finish(self, folder_path: str, run: int) -> ManifestReport:
+        """
+        完整遍历结束后调用：写入剩余记录，移除本次未出现的条目。
+        """
+        self.flush()
+        root = os.path.abspath(folder_path)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT path FROM entries WHERE root = ? AND seen <> ?", (root, run)).fetchall()
+            conn.execute("DELETE FROM entries WHERE root = ? AND seen <> ?", (root, run))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.report.deleted = [os.path.join(folder_path, row[0]) for row in rows]
+        logger.info(f"{folder_path} 增量处理完成: {self.report.summary()}")
+        return self.report
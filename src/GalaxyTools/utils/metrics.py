@@ -0,0 +1,288 @@
+import time
+import bisect
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+"""
+LLM 调用的延迟与吞吐指标。默认关闭，关闭时每次调用只多一次全局变量判断。
+
+enable_metrics()
+think, answer = siliconflow_invoke(data)
+print(metrics_text())                 # Prometheus 文本格式
+start_metrics_server(9100)            # 或者 http://127.0.0.1:9100/metrics，对外暴露需传 addr='0.0.0.0'
+write_metrics('./metrics.prom')       # 或者定期写文件交给 node_exporter 的 textfile collector
+
+每次调用记录（标签为 provider 与 model）：
+    connect_seconds       发出请求到收到响应头（含建立连接与服务端排队）
+    ttft_seconds          发出请求到第一个内容/思考/工具调用增量
+    inter_token_seconds   相邻两个增量之间的间隔
+    duration_seconds      整个调用的耗时
+    chunks_total、prompt_tokens_total、completion_tokens_total、requests_total{outcome}
+"""
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+INTER_TOKEN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HISTOGRAMS = {
+    'connect_seconds': LATENCY_BUCKETS,
+    'ttft_seconds': LATENCY_BUCKETS,
+    'inter_token_seconds': INTER_TOKEN_BUCKETS,
+    'duration_seconds': LATENCY_BUCKETS,
+}
+PREFIX = 'galaxytools_llm_'
+
+_ENABLED = False
+
+
+class Histogram:
+    """累积分布直方图，线程安全"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', '_lock')
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数，返回所在桶的上界"""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        target = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, ...], float] = {}
+
+    def histogram(self, name: str, provider: str, model: str) -> Histogram:
+        key = (name, provider, model)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram(HISTOGRAMS[name]))
+        return histogram
+
+    def add(self, key: Tuple[str, ...], value: float) -> None:
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+_REGISTRY = _Registry()
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """开启或关闭指标采集"""
+    global _ENABLED
+    _ENABLED = enabled
+
+
+def metrics_enabled() -> bool:
+    return _ENABLED
+
+
+def reset_metrics() -> None:
+    """清空已采集的指标"""
+    global _REGISTRY
+    _REGISTRY = _Registry()
+
+
+class CallTimer:
+    """
+    单次调用的计时器，由各调用函数在请求、收到响应头、收到增量与结束时调用。
+    """
+
+    __slots__ = ('provider', 'model', 'start', 'last', 'chunks', 'prompt_tokens', 'completion_tokens',
+                 '_inter', '_done')
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model or ''
+        self.start = time.perf_counter()
+        self.last = None
+        self.chunks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._inter = _REGISTRY.histogram('inter_token_seconds', provider, self.model)
+        self._done = False
+
+    def connected(self) -> None:
+        """收到响应头"""
+        _REGISTRY.histogram('connect_seconds', self.provider, self.model).observe(time.perf_counter() - self.start)
+
+    def chunk(self) -> None:
+        """收到一个内容增量"""
+        now = time.perf_counter()
+        if self.last is None:
+            _REGISTRY.histogram('ttft_seconds', self.provider, self.model).observe(now - self.start)
+        else:
+            self._inter.observe(now - self.last)
+        self.last = now
+        self.chunks += 1
+
+    def event(self, event) -> None:
+        """记录一个 StreamEvent，UsageDelta 记为 token 用量，其余记为增量"""
+        if hasattr(event, 'total_tokens'):
+            self.usage(event.prompt_tokens, event.completion_tokens)
+        else:
+            self.chunk()
+
+    def usage(self, prompt_tokens: int, completion_tokens: int) -> None:
+        self.prompt_tokens = prompt_tokens or 0
+        self.completion_tokens = completion_tokens or 0
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """结束计时，error 为 GeneratorExit 时记为 cancelled"""
+        if self._done:
+            return
+        self._done = True
+        if error is None:
+            outcome = 'ok'
+        elif isinstance(error, GeneratorExit):
+            outcome = 'cancelled'
+        else:
+            outcome = 'error'
+        provider, model = self.provider, self.model
+        _REGISTRY.histogram('duration_seconds', provider, model).observe(time.perf_counter() - self.start)
+        _REGISTRY.add(('requests_total', provider, model, outcome), 1)
+        _REGISTRY.add(('chunks_total', provider, model), self.chunks)
+        _REGISTRY.add(('prompt_tokens_total', provider, model), self.prompt_tokens)
+        _REGISTRY.add(('completion_tokens_total', provider, model), self.completion_tokens)
+
+
+def start_call(provider: str, model: str = None) -> Optional[CallTimer]:
+    """
+    开始一次调用的计时，指标未开启时返回 None。
+    """
+    if not _ENABLED:
+        return None
+    return CallTimer(provider, model)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    body = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items() if v is not None)
+    return '{' + body + '}' if body else ''
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def metrics_text() -> str:
+    """
+    以 Prometheus 文本格式导出全部指标。
+    """
+    registry = _REGISTRY
+    with registry.lock:
+        histograms = sorted(registry.histograms.items())
+        counters = sorted(registry.counters.items())
+    lines = []
+    declared = set()
+    for (name, provider, model), histogram in histograms:
+        metric = PREFIX + name
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} histogram")
+            declared.add(metric)
+        with histogram._lock:
+            counts, total, value_sum = list(histogram.counts), histogram.count, histogram.sum
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float('inf'),), counts):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_labels(provider=provider, model=model, le=_format_bound(bound))} "
+                         f"{cumulative}")
+        lines.append(f"{metric}_sum{_labels(provider=provider, model=model)} {value_sum}")
+        lines.append(f"{metric}_count{_labels(provider=provider, model=model)} {total}")
+    for key, value in counters:
+        name, provider, model = key[:3]
+        metric = PREFIX + name
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} counter")
+            declared.add(metric)
+        outcome = key[3] if len(key) > 3 else None
+        lines.append(f"{metric}{_labels(provider=provider, model=model, outcome=outcome)} {value:g}")
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_snapshot() -> dict:
+    """
+    以字典形式返回各直方图的次数、均值与 p50/p90/p99（桶上界估算）以及各计数器。
+    """
+    registry = _REGISTRY
+    with registry.lock:
+        histograms = dict(registry.histograms)
+        counters = dict(registry.counters)
+    snapshot = {'histograms': {}, 'counters': {}}
+    for (name, provider, model), histogram in histograms.items():
+        snapshot['histograms'][f"{name}{{provider={provider},model={model}}}"] = {
+            'count': histogram.count,
+            'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+            'p50': histogram.quantile(0.5),
+            'p90': histogram.quantile(0.9),
+            'p99': histogram.quantile(0.99),
+        }
+    for key, value in counters.items():
+        snapshot['counters']['/'.join(key)] = value
+    return snapshot
+
+
+def write_metrics(path: str) -> None:
+    """
+    把 Prometheus 文本格式的指标原子地写入文件。
+    """
+    from .fileio import TextWriter
+    with TextWriter(path) as writer:
+        writer.write(metrics_text())
+
+
+def start_metrics_server(port: int = 9100, addr: str = '127.0.0.1'):
+    """
+    在后台线程中启动 HTTP 服务，GET /metrics 返回 Prometheus 文本格式的指标。
+    默认只监听本机，需要由其他机器抓取时显式传入 addr='0.0.0.0'。
+
+    返回:
+        http.server.ThreadingHTTPServer: 调用 shutdown() 停止。
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = metrics_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,135 @@
+import os
+import stat
+from datetime import datetime
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+"""
+基于 os.scandir 的流式目录遍历，map_folder 用它边发现边提交任务。
+
+遍历是惰性的深度优先：每层目录只保持一个打开的 scandir 迭代器，
+内存占用与目录树的深度有关而与文件总数无关。
+只有设置了大小或修改时间过滤时才会 stat 文件。
+
+for path in scan_folder('corpus', recursive=True, include='*.json', exclude='.git', kind='file'):
+    ...
+
+模式中不含 / 时匹配条目名称，含 / 时匹配相对于根目录的路径（以 / 分隔，fnmatch 语义下 * 也匹配 /）。
+exclude 命中的目录不会进入。
+"""
+
+Patterns = Union[str, Iterable[str], None]
+Timestamp = Union[float, datetime, None]
+
+KINDS = ('all', 'file', 'dir')
+
+
+def _patterns(patterns: Patterns) -> tuple:
+    if patterns is None:
+        return ()
+    if isinstance(patterns, str):
+        return (patterns,)
+    return tuple(patterns)
+
+
+def _matches(patterns: tuple, name: str, relpath: str) -> bool:
+    for pattern in patterns:
+        if fnmatchcase(relpath if '/' in pattern else name, pattern):
+            return True
+    return False
+
+
+def _timestamp(value: Timestamp) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def scan_folder(folder_path: str, recursive: bool = False, include: Patterns = None,
+                exclude: Patterns = None, kind: str = 'all', min_size: int = None,
+                max_size: int = None, modified_after: Timestamp = None,
+                modified_before: Timestamp = None, follow_symlinks: bool = False,
+                key: Callable = None) -> Iterator[str]:
+    """
+    遍历目录并逐个产出满足条件的路径。
+
+    参数:
+        folder_path (str): 根目录。
+        recursive (bool): 是否进入子目录，默认为 False（只遍历一层，与 os.listdir 一致）。
+        include (str | Iterable[str]): 只产出匹配任一 glob 的条目，默认为 None（不限）。子目录的遍历不受影响。
+        exclude (str | Iterable[str]): 跳过匹配任一 glob 的条目，被排除的目录不会进入。
+        kind (str): 'all'、'file' 或 'dir'，默认为 'all'。
+        min_size (int): 文件大小下限（字节），只作用于文件。
+        max_size (int): 文件大小上限（字节），只作用于文件。
+        modified_after (float | datetime): 只产出修改时间不早于该时间的条目。
+        modified_before (float | datetime): 只产出修改时间早于该时间的条目。
+        follow_symlinks (bool): 递归时是否进入指向目录的符号链接，默认为 False。
+        key (Callable): 排序函数，作用于条目名称，在每个目录内排序。指定时每个目录的条目需先全部读入。
+    返回:
+        Iterator[str]: 条目路径，形如 os.path.join(folder_path, 相对路径)。
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind 必须是 {KINDS} 之一: {kind}")
+    include = _patterns(include)
+    exclude = _patterns(exclude)
+    modified_after = _timestamp(modified_after)
+    modified_before = _timestamp(modified_before)
+    check_size = min_size is not None or max_size is not None
+    check_mtime = modified_after is not None or modified_before is not None
+
+    def entries(path: str):
+        iterator = os.scandir(path)
+        if key is None:
+            return iterator
+        with iterator:
+            return iter(sorted(iterator, key=lambda e: key(e.name)))
+
+    # 栈中每一项为 (相对路径前缀, scandir 迭代器)
+    stack = [('', entries(folder_path))]
+    try:
+        while stack:
+            prefix, iterator = stack[-1]
+            entry = next(iterator, None)
+            if entry is None:
+                stack.pop()
+                if hasattr(iterator, 'close'):
+                    iterator.close()
+                continue
+            relpath = prefix + entry.name
+            if exclude and _matches(exclude, entry.name, relpath):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                descend = recursive and is_dir and (follow_symlinks or not entry.is_symlink())
+            except OSError:
+                continue
+
+            selected = kind == 'all' or (kind == 'dir') == is_dir
+            if selected and include:
+                selected = _matches(include, entry.name, relpath)
+            if selected and (check_size or check_mtime):
+                try:
+                    st = entry.stat(follow_symlinks=True)
+                except OSError:
+                    selected = False
+                else:
+                    if check_size and stat.S_ISREG(st.st_mode):
+                        selected = (min_size is None or st.st_size >= min_size) and \
+                                   (max_size is None or st.st_size <= max_size)
+                    if selected and modified_after is not None:
+                        selected = st.st_mtime >= modified_after
+                    if selected and modified_before is not None:
+                        selected = st.st_mtime < modified_before
+            if selected:
+                yield entry.path
+
+            if descend:
+                try:
+                    stack.append((relpath + '/', entries(entry.path)))
+                except OSError:
+                    # 无权限或遍历过程中被删除的目录直接跳过
+                    continue
+    finally:
+        for _, iterator in stack:
+            if hasattr(iterator, 'close'):
+                iterator.close()
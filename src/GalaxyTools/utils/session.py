@@ -0,0 +1,253 @@
+import os
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional, Iterable
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+"""
+进程内共享的 HTTP 连接池。
+
+siliconflow_invoke、call_dify 默认通过 get_session() 复用同一个 requests.Session，
+从而在多次调用之间保持 keep-alive 连接，避免每次请求都重新建立 TCP/TLS 连接。
+
+configure_session(
+    pool_maxsize=64,
+    retries=3,
+    hosts={'https://api.siliconflow.cn': 128},
+)
+session = get_session()
+print(session_stats())
+
+异步调用（siliconflow_ainvoke、acall_dify）使用 get_async_client()，
+每个事件循环各自持有一个 httpx.AsyncClient。
+"""
+
+_DEFAULT_CONFIG = {
+    'pool_connections': 16,
+    'pool_maxsize': 32,
+    'retries': 3,
+    'backoff_factor': 0.5,
+    'status_forcelist': (429, 502, 503, 504),
+    'hosts': None,
+}
+
+_LOCK = threading.Lock()
+_SESSIONS: Dict[str, requests.Session] = {}
+_CONFIGS: Dict[str, dict] = {}
+# httpx.AsyncClient 的连接与创建它的事件循环绑定，因此按事件循环分别缓存
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _reset_after_fork():
+    # 子进程不能复用父进程的 socket，丢弃后按需重建
+    global _LOCK
+    _LOCK = threading.Lock()
+    _SESSIONS.clear()
+    _ASYNC_CLIENTS.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# POST 等非幂等请求只在服务端明确表示没有处理时按状态码重试
+NON_IDEMPOTENT_RETRY_STATUS = frozenset({429, 503})
+
+
+class _Retry(Retry):
+    """
+    幂等方法按 status_forcelist 重试；POST 等非幂等方法只在 429/503 且带 Retry-After 时重试。
+    502/504 可能在上游已经接受请求之后才由网关返回，重发 LLM 请求会重复执行并计费。
+    连接失败（请求尚未发出）对所有方法都会重试。
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() not in Retry.DEFAULT_ALLOWED_METHODS:
+            return bool(self.total and self.respect_retry_after_header and has_retry_after
+                        and status_code in NON_IDEMPOTENT_RETRY_STATUS)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _build_retry(retries: int, backoff_factor: float, status_forcelist: Iterable[int]) -> Retry:
+    return _Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=tuple(status_forcelist),
+        allowed_methods=frozenset({'GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS'}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_session(config: dict) -> requests.Session:
+    retry = _build_retry(config['retries'], config['backoff_factor'], config['status_forcelist'])
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config['pool_connections'],
+        pool_maxsize=config['pool_maxsize'],
+        max_retries=retry,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # 针对单独的 host 配置不同的连接池大小，requests 按最长前缀匹配 adapter
+    for prefix, maxsize in (config['hosts'] or {}).items():
+        session.mount(prefix, HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=maxsize,
+            max_retries=retry,
+        ))
+    return session
+
+
+def configure_session(name: str = 'default', pool_connections: int = None, pool_maxsize: int = None,
+                      retries: int = None, backoff_factor: float = None,
+                      status_forcelist: Iterable[int] = None, hosts: Dict[str, int] = None) -> None:
+    """
+    配置命名连接池，已存在的同名 session 会被关闭并在下次使用时按新配置重建。
+
+    参数:
+        name (str): 连接池名称，默认为 'default'。
+        pool_connections (int): 缓存的 host 连接池数量。
+        pool_maxsize (int): 每个 host 保持的最大连接数。
+        retries (int): 重试次数。连接失败时总会重试；GET 等幂等请求返回 status_forcelist 中的状态码时重试；
+            POST 只在返回 429/503 且带 Retry-After 时重试。与 BatchRunner 等自带重试的调用方一起使用时，
+            两层重试次数相乘，可以设为 0 只保留一层。
+        backoff_factor (float): 指数退避系数，第 n 次重试前等待 backoff_factor * 2 ** (n - 1) 秒。
+        status_forcelist (Iterable[int]): 需要重试的 HTTP 状态码。
+        hosts (dict): URL 前缀到连接池大小的映射，如 {'https://api.siliconflow.cn': 128}。
+    """
+    overrides = {
+        'pool_connections': pool_connections,
+        'pool_maxsize': pool_maxsize,
+        'retries': retries,
+        'backoff_factor': backoff_factor,
+        'status_forcelist': status_forcelist,
+        'hosts': hosts,
+    }
+    with _LOCK:
+        config = dict(_CONFIGS.get(name, _DEFAULT_CONFIG))
+        config.update({k: v for k, v in overrides.items() if v is not None})
+        _CONFIGS[name] = config
+        session = _SESSIONS.pop(name, None)
+    if session is not None:
+        session.close()
+
+
+def get_session(name: str = 'default') -> requests.Session:
+    """
+    获取命名的共享 session，首次调用时创建。
+
+    参数:
+        name (str): 连接池名称，默认为 'default'。
+    返回:
+        requests.Session: 线程间共享、带 keep-alive 与重试的 session。
+    """
+    session = _SESSIONS.get(name)
+    if session is not None:
+        return session
+    with _LOCK:
+        session = _SESSIONS.get(name)
+        if session is None:
+            session = _build_session(_CONFIGS.get(name, _DEFAULT_CONFIG))
+            _SESSIONS[name] = session
+        return session
+
+
+def session_stats(name: Optional[str] = None) -> dict:
+    """
+    统计连接池命中情况。每次请求从池中取出已有连接记为 hit，新建连接记为 miss。
+
+    参数:
+        name (str): 连接池名称，默认为 None（统计全部）。
+    返回:
+        dict: {name: {'hits', 'misses', 'hosts': {host: {'hits', 'misses'}}}}
+    """
+    with _LOCK:
+        sessions = {k: v for k, v in _SESSIONS.items() if name is None or k == name}
+    stats = {}
+    for session_name, session in sessions.items():
+        hosts = {}
+        adapters = {id(a): a for a in session.adapters.values()}.values()
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = f"{key.key_scheme}://{key.key_host}:{key.key_port}"
+                entry = hosts.setdefault(host, {'hits': 0, 'misses': 0})
+                entry['misses'] += pool.num_connections
+                entry['hits'] += max(pool.num_requests - pool.num_connections, 0)
+        stats[session_name] = {
+            'hits': sum(h['hits'] for h in hosts.values()),
+            'misses': sum(h['misses'] for h in hosts.values()),
+            'hosts': hosts,
+        }
+    return stats
+
+
+def close_sessions(name: Optional[str] = None) -> None:
+    """
+    关闭共享 session 并释放连接。
+
+    参数:
+        name (str): 连接池名称，默认为 None（关闭全部）。
+    """
+    with _LOCK:
+        names = [k for k in _SESSIONS if name is None or k == name]
+        sessions = [_SESSIONS.pop(k) for k in names]
+    for session in sessions:
+        session.close()
+
+
+def get_async_client(name: str = 'default') -> httpx.AsyncClient:
+    """
+    获取当前事件循环中共享的 httpx.AsyncClient，连接池配置与 configure_session 一致。
+    单个 host 的并发连接数不设上限，pool_maxsize 仅限制保持的空闲连接数。
+
+    参数:
+        name (str): 连接池名称，默认为 'default'。
+    返回:
+        httpx.AsyncClient: 绑定到当前事件循环的客户端。
+    """
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(name)
+        if client is None or client.is_closed:
+            config = _CONFIGS.get(name, _DEFAULT_CONFIG)
+            limits = httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=config['pool_maxsize'],
+            )
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(None, connect=30.0),
+                transport=httpx.AsyncHTTPTransport(limits=limits, retries=config['retries']),
+            )
+            clients[name] = client
+        return client
+
+
+async def aclose_async_clients(name: Optional[str] = None) -> None:
+    """
+    关闭当前事件循环中的共享 httpx.AsyncClient。
+
+    参数:
+        name (str): 连接池名称，默认为 None（关闭全部）。
+    """
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.get(loop, {})
+        names = [k for k in clients if name is None or k == name]
+        closing = [clients.pop(k) for k in names]
+    for client in closing:
+        await client.aclose()
@@ -0,0 +1,262 @@
+import threading
+import traceback
+import concurrent.futures
+from multiprocessing import shared_memory, resource_tracker
+from typing import Any, Callable, Iterable, List, Set
+
+"""
+通过 multiprocessing.shared_memory 在进程间传递大块 bytes 与 NumPy 数组，避免 pickle 后经管道传输。
+
+发送方把数据复制进一段共享内存后只传递 SharedRef（名称、大小、shape、dtype），
+接收方映射同一段内存读取后负责 unlink。参数由父进程创建、工作进程释放；结果由工作进程创建、父进程释放。
+NumPy 数组参数在工作进程中以共享内存为缓冲区直接构造，不做复制。
+
+process_map 通过 SharedLedger 在任务真正提交时才把参数放入共享内存，并记录交出的每一段，
+map 结束时释放没有被工作进程读取的参数（任务被取消、超时或工作进程崩溃）与没有被取走的结果。
+"""
+
+DEFAULT_THRESHOLD = 1 << 20
+
+
+class SharedRef:
+    """共享内存中一段数据的可 pickle 引用"""
+
+    __slots__ = ('name', 'kind', 'size', 'shape', 'dtype')
+
+    def __init__(self, name: str, kind: str, size: int, shape: tuple = None, dtype: str = None):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return self.name, self.kind, self.size, self.shape, self.dtype
+
+    def __setstate__(self, state):
+        self.name, self.kind, self.size, self.shape, self.dtype = state
+
+
+def _is_ndarray(obj: Any) -> bool:
+    # 不导入 numpy 也能识别数组
+    return type(obj).__module__ == 'numpy' and type(obj).__name__ == 'ndarray'
+
+
+def _create(view) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(view.nbytes, 1))
+    shm.buf[:view.nbytes] = view
+    return shm
+
+
+def _hand_off(shm: shared_memory.SharedMemory) -> None:
+    # 由接收方 unlink，创建方不再跟踪，避免资源跟踪器在进程退出时重复清理
+    shm.close()
+    resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+def to_shared(obj: Any, threshold: int = DEFAULT_THRESHOLD) -> Any:
+    """
+    大于 threshold 字节的 bytes/bytearray/memoryview 与 NumPy 数组转为 SharedRef，其他对象原样返回。
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        view = memoryview(obj).cast('B')
+        if view.nbytes < threshold:
+            return obj
+        shm = _create(view)
+        ref = SharedRef(shm.name, 'bytes', view.nbytes)
+    elif _is_ndarray(obj) and obj.nbytes >= threshold and not obj.dtype.hasobject:
+        import numpy
+        array = numpy.ascontiguousarray(obj)
+        shm = _create(memoryview(array).cast('B'))
+        ref = SharedRef(shm.name, 'ndarray', array.nbytes, array.shape, array.dtype.str)
+    else:
+        return obj
+    _hand_off(shm)
+    return ref
+
+
+def from_shared(obj: Any) -> Any:
+    """
+    将 SharedRef 还原为 bytes 或 NumPy 数组（复制一次）并释放共享内存，其他对象原样返回。
+    """
+    if not isinstance(obj, SharedRef):
+        return obj
+    shm = shared_memory.SharedMemory(name=obj.name)
+    try:
+        if obj.kind == 'bytes':
+            return bytes(shm.buf[:obj.size])
+        import numpy
+        return numpy.ndarray(obj.shape, dtype=obj.dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _unlink(name: str) -> None:
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _release(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # 仍有对象引用这段缓冲区（例如异常中保存的数组），映射留给垃圾回收，名称照常删除
+        pass
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        # 调用方已经放弃该任务并清理了参数
+        pass
+
+
+def _call_on_array(func: Callable, ref: SharedRef, shm: shared_memory.SharedMemory) -> Any:
+    import numpy
+    array = numpy.ndarray(ref.shape, dtype=ref.dtype, buffer=shm.buf)
+    try:
+        result = func(array)
+        if _is_ndarray(result) and numpy.shares_memory(result, array):
+            result = result.copy()
+        return result
+    except BaseException as exc:
+        # 回溯中各层的局部变量仍引用数组，清掉后共享内存才能关闭
+        traceback.clear_frames(exc.__traceback__)
+        raise
+    finally:
+        del array
+
+
+def shared_call(func: Callable, threshold: int, item: Any) -> Any:
+    """
+    在工作进程中执行 func：SharedRef 参数从共享内存读取，大结果写入共享内存后返回 SharedRef。
+    """
+    if not isinstance(item, SharedRef):
+        return to_shared(func(item), threshold)
+    shm = shared_memory.SharedMemory(name=item.name)
+    try:
+        if item.kind == 'bytes':
+            result = func(bytes(shm.buf[:item.size]))
+        else:
+            result = _call_on_array(func, item, shm)
+        return to_shared(result, threshold)
+    finally:
+        _release(shm)
+
+
+def _refs(obj: Any) -> List[SharedRef]:
+    """任务参数或结果中的 SharedRef：单项、分块列表或 (分块结果, 耗时)"""
+    if isinstance(obj, SharedRef):
+        return [obj]
+    if isinstance(obj, tuple) and len(obj) == 2 and isinstance(obj[0], list):
+        obj = obj[0]
+    if isinstance(obj, list):
+        return [value for value in obj if isinstance(value, SharedRef)]
+    return []
+
+
+class _SharedSubmitter:
+    """只提供 submit 的执行器包装，提交时才把参数放入共享内存"""
+
+    use_thread = False
+
+    def __init__(self, ledger: 'SharedLedger', executor: concurrent.futures.Executor, chunked: bool):
+        self.ledger = ledger
+        self.executor = executor
+        self.chunked = chunked
+
+    def submit(self, fn: Callable, /, *args) -> concurrent.futures.Future:
+        return self.ledger._submit(self.executor, self.chunked, fn, args)
+
+
+class SharedLedger:
+    """
+    一次 map 中交出的共享内存段。参数在提交时创建，结果由工作进程创建，
+    close 时释放所有没有被接收方 unlink 的段；close 之后才完成的任务，其结果在完成时立即释放。
+    """
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._arguments: Set[str] = set()
+        self._results: Set[str] = set()
+        self._received: Set[str] = set()
+        self._closed = False
+
+    def bind(self, executor: concurrent.futures.Executor, chunked: bool = False) -> _SharedSubmitter:
+        """
+        Args:
+            executor: 进程池或 WorkerPool
+            chunked: 提交的最后一个参数是否为一个分块（列表），分块中的每一项分别放入共享内存
+
+        Returns:
+            只提供 submit 的包装
+        """
+        return _SharedSubmitter(self, executor, chunked)
+
+    def share(self, obj: Any) -> Any:
+        ref = to_shared(obj, self.threshold)
+        if isinstance(ref, SharedRef):
+            with self._lock:
+                self._arguments.add(ref.name)
+        return ref
+
+    def receive(self, obj: Any) -> Any:
+        """同 from_shared，并从待释放的结果中去掉"""
+        if isinstance(obj, SharedRef):
+            with self._lock:
+                if obj.name in self._results:
+                    self._results.discard(obj.name)
+                else:
+                    self._received.add(obj.name)
+        return from_shared(obj)
+
+    def _submit(self, executor, chunked: bool, fn: Callable, args: tuple) -> concurrent.futures.Future:
+        if args:
+            item = args[-1]
+            item = [self.share(value) for value in item] if chunked and isinstance(item, list) else self.share(item)
+            args = args[:-1] + (item,)
+        names = [ref.name for ref in _refs(args[-1] if args else None)]
+        future = executor.submit(fn, *args)
+        future.add_done_callback(lambda done: self._done(done, names))
+        return future
+
+    def _done(self, future: concurrent.futures.Future, names: List[str]) -> None:
+        results = []
+        if not future.cancelled():
+            exception = future.exception()
+            if exception is None:
+                results = [ref.name for ref in _refs(future.result())]
+            if not isinstance(exception, concurrent.futures.BrokenExecutor):
+                # 任务执行过，工作进程已经释放了参数
+                with self._lock:
+                    self._arguments.difference_update(names)
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                for name in results:
+                    if name in self._received:
+                        self._received.discard(name)
+                    else:
+                        self._results.add(name)
+        if closed:
+            self._drop(names + results)
+
+    def _drop(self, names: Iterable[str]) -> None:
+        for name in names:
+            _unlink(name)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            names = list(self._arguments | self._results)
+            self._arguments.clear()
+            self._results.clear()
+            self._received.clear()
+        self._drop(names)
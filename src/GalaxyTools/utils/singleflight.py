@@ -0,0 +1,224 @@
+import os
+import asyncio
+import threading
+import weakref
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+"""
+相同请求的合并（single-flight）：同一时刻内容完全相同的多个流式调用只向上游发起一次请求，
+所有调用方都能收到完整的事件序列，中途加入的调用方会先重放已经到达的事件。
+
+flights = SingleFlight()        # 进程内共享一个实例
+think, answer = siliconflow_invoke(data, coalesce=flights)
+for event in openai_stream(data, coalesce=flights):
+    ...
+
+键与 ResponseCache 相同，由 request_key 根据规范化的请求体计算。只合并同时进行中的调用，
+上游结束后再到来的相同请求会重新发起，需要复用已完成的结果时再配合 cache 使用。
+
+同步调用不额外启动线程：需要下一个事件的调用方中，先到的一个负责从上游读取，其余等待，
+负责读取的调用方提前退出时由其他调用方接替。异步调用在事件循环中启动一个任务读取上游，
+按事件循环分别合并。所有调用方都退出后，仍未结束的上游请求会被关闭。
+上游出错时，每个调用方在收到出错前的全部事件后抛出同一个异常。
+"""
+
+_PULL = object()
+
+
+class _Flight:
+    """一次进行中的上游调用"""
+
+    __slots__ = ('source', 'events', 'done', 'error', 'subscribers', 'pulling', 'cond', 'task', 'wakeup')
+
+    def __init__(self, source=None, cond: threading.Condition = None):
+        self.source = source
+        self.events: List = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.pulling = False
+        self.cond = cond
+        self.task = None
+        self.wakeup = None
+
+
+class SingleFlight:
+    """
+    合并同时进行中的相同流式调用，线程安全，也可在多个事件循环中使用。
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flights = {}
+        # 异步调用按事件循环分别合并，与 AsyncOpenAI 客户端的缓存方式相同
+        self._async_flights = weakref.WeakKeyDictionary()
+
+    def stats(self) -> dict:
+        """发起的上游请求数、被合并的调用数与进行中的上游请求数（含各事件循环中的异步调用）"""
+        with self._lock:
+            in_flight = len(self._flights) + sum(len(flights) for flights in self._async_flights.values())
+        return {'started': self.started, 'coalesced': self.coalesced, 'in_flight': in_flight}
+
+    def _join(self, key: str, produce: Callable[[], Iterator]) -> _Flight:
+        if self._pid != os.getpid():
+            # fork 出的子进程不能等待父进程中的上游请求
+            self._lock = threading.Lock()
+            self._flights = {}
+            self._pid = os.getpid()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight(produce(), threading.Condition(self._lock))
+                self._flights[key] = flight
+                self.started += 1
+            else:
+                self.coalesced += 1
+            flight.subscribers += 1
+            return flight
+
+    def _finish(self, key: str, flight: _Flight, error: Optional[BaseException]) -> None:
+        """调用方需持有 self._lock"""
+        flight.done = True
+        flight.error = error
+        flight.pulling = False
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.cond.notify_all()
+
+    def _pull(self, key: str, flight: _Flight) -> None:
+        try:
+            event = next(flight.source)
+        except StopIteration:
+            with self._lock:
+                self._finish(key, flight, None)
+        except BaseException as e:
+            with self._lock:
+                self._finish(key, flight, e)
+        else:
+            with self._lock:
+                flight.events.append(event)
+                flight.pulling = False
+                flight.cond.notify_all()
+
+    def _leave(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            flight.subscribers -= 1
+            abandoned = flight.subscribers == 0 and not flight.done
+            if abandoned:
+                self._finish(key, flight, None)
+        if abandoned:
+            flight.source.close()
+
+    def stream(self, key: str, produce: Callable[[], Iterator]) -> Iterator:
+        """
+        与进行中的相同调用合并，没有时由 produce() 发起。
+
+        参数:
+            key (str): 请求的规范哈希，见 request_key。
+            produce (Callable): 返回上游事件迭代器的函数。
+        返回:
+            Iterator: 上游的完整事件序列。
+        """
+        flight = self._join(key, produce)
+        index = 0
+        try:
+            while True:
+                with self._lock:
+                    while index >= len(flight.events) and not flight.done and flight.pulling:
+                        flight.cond.wait()
+                    if index < len(flight.events):
+                        event = flight.events[index]
+                    elif flight.done:
+                        break
+                    else:
+                        flight.pulling = True
+                        event = _PULL
+                if event is _PULL:
+                    self._pull(key, flight)
+                    continue
+                index += 1
+                yield event
+        finally:
+            self._leave(key, flight)
+        if flight.error is not None:
+            raise flight.error
+
+    async def _pump(self, flights: dict, key: str, flight: _Flight, produce: Callable[[], AsyncIterator]) -> None:
+        try:
+            async for event in produce():
+                flight.events.append(event)
+                flight.wakeup.set()
+                flight.wakeup = asyncio.Event()
+        except asyncio.CancelledError as e:
+            flight.error = e
+            raise
+        except BaseException as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if flights.get(key) is flight:
+                del flights[key]
+            flight.wakeup.set()
+
+    async def astream(self, key: str, produce: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """
+        stream 的异步版本。
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flights = self._async_flights.setdefault(loop, {})
+            flight = flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                flight.wakeup = asyncio.Event()
+                flights[key] = flight
+                flight.task = loop.create_task(self._pump(flights, key, flight, produce))
+                self.started += 1
+            else:
+                self.coalesced += 1
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.events):
+                    yield flight.events[index]
+                    index += 1
+                if flight.done:
+                    break
+                await flight.wakeup.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                if flights.get(key) is flight:
+                    del flights[key]
+                flight.task.cancel()
+        if flight.error is not None:
+            raise flight.error
+
+
+def shared_stream(key: str, produce: Callable[[], Iterator], cache=None, coalesce: SingleFlight = None) -> Iterator:
+    """
+    依次套上请求合并与响应缓存：先查缓存，未命中时再与进行中的相同调用合并。
+    """
+    if coalesce is not None:
+        upstream = produce
+        produce = lambda: coalesce.stream(key, upstream)
+    if cache is not None:
+        return cache.stream(key, produce)
+    return produce()
+
+
+def shared_astream(key: str, produce: Callable[[], AsyncIterator], cache=None,
+                   coalesce: SingleFlight = None) -> AsyncIterator:
+    """
+    shared_stream 的异步版本。
+    """
+    if coalesce is not None:
+        upstream = produce
+        produce = lambda: coalesce.astream(key, upstream)
+    if cache is not None:
+        return cache.astream(key, produce)
+    return produce()
@@ -0,0 +1,206 @@
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Union
+
+"""
+增量 SSE（text/event-stream）解码器，供 siliconflow、openai、dify 的流式调用共用。
+
+解码器直接在 bytes 上工作：网络数据追加到一个有上限的 bytearray 中，只在遇到完整的行时切片，
+事件的 data 以 bytes 形式交给 JSON 解析，不做额外的 str 解码与拼接。
+UTF-8 多字节序列中不会出现 0x0A 与 0x0D，因此被拆分在两个网络块中的字符会在行完整后一起解码。
+行尾按规范可以是 \n、\r\n 或单独的 \r。
+
+decoder = SSEDecoder()
+for chunk in response.iter_content(chunk_size=None):
+    for data in decoder.feed(chunk):
+        ...
+for data in decoder.close():
+    ...
+
+for obj in iter_sse_json(response.iter_content(chunk_size=None)):
+    ...
+"""
+
+DONE = b'[DONE]'
+DEFAULT_MAX_BUFFER_SIZE = 8 * 1024 * 1024
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+_loads = json.loads
+_backend = 'json'
+
+
+def set_json_backend(name: str = None) -> str:
+    """
+    设置 SSE 事件使用的 JSON 解析后端。
+
+    参数:
+        name (str): 'orjson' 或 'json'，默认为 None（已安装 orjson 时使用 orjson）。
+    返回:
+        str: 实际使用的后端名称。
+    """
+    global _loads, _backend
+    if name in (None, 'orjson'):
+        try:
+            import orjson
+            _loads, _backend = orjson.loads, 'orjson'
+            return _backend
+        except ImportError:
+            if name == 'orjson':
+                raise
+    elif name != 'json':
+        raise ValueError(f"不支持的 JSON 后端: {name}")
+    _loads, _backend = json.loads, 'json'
+    return _backend
+
+
+def loads(data: BytesLike):
+    """使用当前后端解析 JSON，bytes 直接交给解析器，不经过 str 解码"""
+    return _loads(data)
+
+
+class SSEBufferOverflow(ValueError):
+    """单行或单个事件超过了 max_buffer_size"""
+
+
+class SSEDecoder:
+    """
+    增量 SSE 解码器，每次 feed 返回已完整接收的事件 data（bytes），多行 data 以换行连接。
+    """
+
+    def __init__(self, max_buffer_size: int = DEFAULT_MAX_BUFFER_SIZE):
+        self.max_buffer_size = max_buffer_size
+        self._buffer = bytearray()
+        self._data: List[bytes] = []
+        self._data_size = 0
+
+    def feed(self, chunk: BytesLike) -> List[bytes]:
+        events = []
+        buffer = self._buffer
+        start = len(buffer)
+        if start and buffer[-1] == 0x0D:
+            # 上一块以 \r 结尾时尚不能确定是否为 \r\n，从这里重新判断
+            start -= 1
+        buffer += chunk
+        size = len(buffer)
+        pos = 0
+        # 只扫描新到达的字节，已扫描过的残行不会重复查找；行尾可以是 \n、\r\n 或单独的 \r
+        lf = buffer.find(b'\n', start)
+        while True:
+            cr = buffer.find(b'\r', start, size if lf == -1 else lf)
+            if cr == -1:
+                if lf == -1:
+                    break
+                end = lf
+                start = lf + 1
+            elif cr + 1 == size:
+                # \r 是最后一个字节，等下一块到达后再判断
+                break
+            else:
+                end = cr
+                start = cr + 2 if buffer[cr + 1] == 0x0A else cr + 1
+            self._process_line(buffer, pos, end, events)
+            pos = start
+            if lf != -1 and lf < start:
+                lf = buffer.find(b'\n', start)
+        if pos:
+            del buffer[:pos]
+        if len(buffer) > self.max_buffer_size:
+            raise SSEBufferOverflow(f"SSE 行长度超过上限 {self.max_buffer_size} 字节")
+        return events
+
+    def close(self) -> List[bytes]:
+        """处理流结束时未以空行结尾的残留数据"""
+        events = []
+        if self._buffer:
+            self._process_line(self._buffer, 0, len(self._buffer), events)
+            self._buffer.clear()
+        self._dispatch(events)
+        return events
+
+    def _process_line(self, buffer: bytearray, start: int, end: int, events: List[bytes]) -> None:
+        if end > start and buffer[end - 1] == 0x0D:
+            end -= 1
+        if end == start:
+            self._dispatch(events)
+            return
+        if buffer.startswith(b'data:', start, end):
+            start += 5
+            if start < end and buffer[start] == 0x20:
+                start += 1
+            self._data_size += end - start
+            if self._data_size > self.max_buffer_size:
+                raise SSEBufferOverflow(f"SSE 事件长度超过上限 {self.max_buffer_size} 字节")
+            with memoryview(buffer) as view:
+                self._data.append(view[start:end].tobytes())
+        # 注释行（以 : 开头）以及 event/id/retry 字段对调用方没有意义，直接忽略
+
+    def _dispatch(self, events: List[bytes]) -> None:
+        if not self._data:
+            return
+        data = self._data
+        events.append(data[0] if len(data) == 1 else b'\n'.join(data))
+        self._data = []
+        self._data_size = 0
+
+
+def iter_sse(chunks: Iterable[BytesLike], max_buffer_size: int = DEFAULT_MAX_BUFFER_SIZE) -> Iterator[bytes]:
+    """
+    将字节块流解码为事件 data 流。
+    """
+    decoder = SSEDecoder(max_buffer_size)
+    for chunk in chunks:
+        if chunk:
+            yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+async def aiter_sse(chunks: AsyncIterable[BytesLike],
+                    max_buffer_size: int = DEFAULT_MAX_BUFFER_SIZE) -> AsyncIterator[bytes]:
+    """
+    iter_sse 的异步版本。
+    """
+    decoder = SSEDecoder(max_buffer_size)
+    async for chunk in chunks:
+        if chunk:
+            for data in decoder.feed(chunk):
+                yield data
+    for data in decoder.close():
+        yield data
+
+
+def _parse(data: bytes):
+    try:
+        obj = _loads(data)
+    except ValueError:
+        # 与原实现一致，无法解析的事件（如心跳）直接跳过
+        return None
+    # 调用方按字典取字段，数字、字符串等其他 JSON 值同样跳过
+    return obj if isinstance(obj, dict) else None
+
+
+def iter_sse_json(chunks: Iterable[BytesLike], max_buffer_size: int = DEFAULT_MAX_BUFFER_SIZE) -> Iterator[dict]:
+    """
+    将字节块流解码为 JSON 对象流，遇到 [DONE] 结束。
+    """
+    for data in iter_sse(chunks, max_buffer_size):
+        if data == DONE:
+            return
+        obj = _parse(data)
+        if obj is not None:
+            yield obj
+
+
+async def aiter_sse_json(chunks: AsyncIterable[BytesLike],
+                         max_buffer_size: int = DEFAULT_MAX_BUFFER_SIZE) -> AsyncIterator[dict]:
+    """
+    iter_sse_json 的异步版本。
+    """
+    async for data in aiter_sse(chunks, max_buffer_size):
+        if data == DONE:
+            return
+        obj = _parse(data)
+        if obj is not None:
+            yield obj
+
+
+set_json_backend()
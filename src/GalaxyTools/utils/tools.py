@@ -1,3 +1,10 @@
+import os
+import logging
+from pathlib import Path
+from typing import Iterable, Union
+
+logger = logging.getLogger(__name__)
+
 def initialize_environment(env_file: str = ".env"):
     """
     默认从.env文件中加载环境变量.
@@ -6,8 +13,6 @@ def initialize_environment(env_file: str = ".env"):
         env_file (str): 环境配置文件名（默认为.env）。
     """
     from dotenv import load_dotenv
-    from pathlib import Path
-    import os
     file_path = Path(os.getcwd()) / env_file
     if not file_path.exists():
         raise FileNotFoundError(f"指定的环境配置文件不存在: {file_path}")
@@ -16,22 +21,104 @@ def initialize_environment(env_file: str = ".env"):
     else:
         load_dotenv(f".env.{env_file}")
 
-def call_dify(endpoint: str, payload: dict, headers: dict):
+def _dify_usage(timer, data: bytes):
+    # 只在开启指标时解析 message_end 事件中的 token 用量
+    if b'message_end' in data:
+        from .sse import loads
+        try:
+            usage = loads(data).get('metadata', {}).get('usage') or {}
+        except (ValueError, AttributeError):
+            return
+        timer.usage(usage.get('prompt_tokens'), usage.get('completion_tokens'))
+    else:
+        timer.chunk()
+
+def _dify_label(endpoint: str) -> str:
+    # 指标标签只保留主机名，避免 URL 中的路径、查询参数（可能含密钥）进入指标并产生大量标签组合
+    from urllib.parse import urlsplit
+    return urlsplit(endpoint).hostname or ''
+
+def _call_dify(endpoint: str, payload: dict, headers: dict, session):
+    from .sse import iter_sse
+    from .metrics import start_call
+    timer = start_call('dify', _dify_label(endpoint))
+    try:
+        with session.post(endpoint, headers=headers, json=payload, stream=True) as response:
+            response.raise_for_status()  # 抛出 HTTP 错误
+            if timer:
+                timer.connected()
+            for data in iter_sse(response.iter_content(chunk_size=None)):
+                if timer:
+                    _dify_usage(timer, data)
+                yield data.decode('utf-8', 'replace').strip()
+    except BaseException as e:
+        if timer:
+            timer.finish(e)
+        raise
+    if timer:
+        timer.finish()
+
+async def _acall_dify(endpoint: str, payload: dict, headers: dict, client):
+    from .sse import aiter_sse
+    from .metrics import start_call
+    timer = start_call('dify', _dify_label(endpoint))
+    try:
+        async with client.stream('POST', endpoint, headers=headers, json=payload) as response:
+            response.raise_for_status()
+            if timer:
+                timer.connected()
+            async for data in aiter_sse(response.aiter_bytes()):
+                if timer:
+                    _dify_usage(timer, data)
+                yield data.decode('utf-8', 'replace').strip()
+    except BaseException as e:
+        if timer:
+            timer.finish(e)
+        raise
+    if timer:
+        timer.finish()
+
+def call_dify(endpoint: str, payload: dict, headers: dict, session=None, cache=None):
     """
     调用Dify API.
 
     参数:
         endpoint (str): Dify API端点。
         payload (dict): 发送到API的负载数据。
+        session (requests.Session): 发送请求使用的 session，默认为 None（使用共享连接池）。
+        cache (ResponseCache): 响应缓存，默认为 None（不缓存）。相同 endpoint 与 payload 直接重放缓存的数据。
     返回:
         Generator[str]每次 yield 一个data:{}格式数据
     """
-    import requests
-    with requests.post(endpoint, headers=headers, json=payload, stream=True) as response:
-        response.raise_for_status()  # 抛出 HTTP 错误
-        for chunk in response.iter_lines(decode_unicode=True):
-            if chunk and chunk.startswith("data:"):  # 跳过空行（如 SSE 中的 keep-alive 空行）
-                yield chunk[5:].strip()  # 移除 "data:" 前缀并去除多余空白
+    if session is None:
+        from .session import get_session
+        session = get_session()
+    if cache is None:
+        return _call_dify(endpoint, payload, headers, session)
+    from .cache import request_key
+    key = request_key(f"dify:{endpoint}", payload)
+    return cache.stream(key, lambda: _call_dify(endpoint, payload, headers, session))
+
+def acall_dify(endpoint: str, payload: dict, headers: dict, client=None, cache=None):
+    """
+    call_dify 的异步版本.
+
+    参数:
+        endpoint (str): Dify API端点。
+        payload (dict): 发送到API的负载数据。
+        client (httpx.AsyncClient): 发送请求使用的客户端，默认为 None（使用当前事件循环的共享客户端）。
+        cache (ResponseCache): 响应缓存，默认为 None（不缓存）。
+    返回:
+        AsyncGenerator[str]每次 yield 一个data:{}格式数据
+    """
+    if client is None:
+        from .session import get_async_client
+        client = get_async_client()
+    if cache is None:
+        return _acall_dify(endpoint, payload, headers, client)
+    from .cache import request_key
+    key = request_key(f"dify:{endpoint}", payload)
+    return cache.astream(key, lambda: _acall_dify(endpoint, payload, headers, client))
 
 def random_string(length: int = 8) -> str:
     """
@@ -47,75 +134,163 @@ def random_string(length: int = 8) -> str:
     characters = string.ascii_letters + string.digits
     return ''.join(random.choice(characters) for _ in range(length))
 
-def save_text(file_position : str, content : str) -> bool:
+def save_text(file_position : str, content : Union[str, Iterable[str]], encoding: str = 'utf-8',
+              atomic: bool = True, fsync: str = 'never', background: bool = False) -> bool:
     """
     保存文本文件.
 
     参数:
         file_position (str): 文本保存的位置。
-        content (str): 文本内容。
+        content (str | Iterable[str]): 文本内容，可以是逐段产生内容的迭代器，成批写出而不在内存中拼接。
+        encoding (str): 文本编码（默认为utf-8）。
+        atomic (bool): 是否先写临时文件再 rename，写入失败时不会留下不完整的文件（默认为True）。
+        fsync (str): 'never'、'close' 或 'batch'，见 TextWriter（默认为'never'）。
+        background (bool): 是否在后台线程中编码并写盘（默认为False）。
     返回:
-        str: 生成的随机字符串。
+        bool: 是否保存成功。
     """
+    from .fileio import TextWriter
     try:
-        from pathlib import Path
         path = Path(file_position)
-        import os
-        env = os.getenv('env', 'development')
-        if env != 'production':
-            import logging
-            logger = logging.getLogger(__name__)
+        if os.getenv('env', 'development') != 'production':
             logger.info(f"文件将保存在{path.parent}中")
-        path.parent.mkdir(exist_ok=True)
-        with open(path, 'w') as f:
-            f.write(content)
+        with TextWriter(path, encoding=encoding, atomic=atomic, fsync=fsync, background=background) as writer:
+            if isinstance(content, str):
+                writer.write(content)
+            else:
+                writer.writelines(content)
         return True
-    except:
+    except Exception:
+        logger.exception(f"保存文件失败: {file_position}")
         return False
 
-from typing import Callable, List, Any
-import os
+from typing import Callable, Iterator, List, Any
+def imap_folder(func: Callable, folder_path: str, *args, concurrent: int = 1,
+                key: Callable = None, use_thread: bool = True, pool = None,
+                recursive: bool = False, include = None, exclude = None, kind: str = 'all',
+                min_size: int = None, max_size: int = None, modified_after = None,
+                modified_before = None, follow_symlinks: bool = False,
+                queue_size: int = None, ordered: bool = True, manifest = None, **kwargs) -> Iterator[Any]:
+    """
+    map_folder 的流式版本：边遍历目录边提交任务，结果一旦可用就产出。
+
+    Args:
+        queue_size (int, optional): 同时在执行或排队的任务数上限。默认为 None（并发数的 2 倍）。
+        ordered (bool, optional): 是否按遍历顺序产出结果，False 时按完成顺序产出。默认为 True。
+        其余参数同 map_folder
+
+    Returns:
+        Iterator: 每个条目的处理结果
+    """
+    from .scan import scan_folder
+    item_paths = scan_folder(
+        folder_path, recursive=recursive, include=include, exclude=exclude, kind=kind,
+        min_size=min_size, max_size=max_size, modified_after=modified_after,
+        modified_before=modified_before, follow_symlinks=follow_symlinks, key=key,
+    )
+    if manifest is not None:
+        return _imap_incremental(func, folder_path, item_paths, args, kwargs, manifest,
+                                 concurrent, use_thread, pool, queue_size, ordered)
+    return _imap_paths(func, item_paths, args, kwargs, concurrent, use_thread, pool, queue_size, ordered)
+
+def _imap_paths(func: Callable, item_paths, args: tuple, kwargs: dict, concurrent: int,
+                use_thread: bool, pool, queue_size: int, ordered: bool) -> Iterator[Any]:
+    if concurrent == 1 and pool is None:
+        from .tracing import active_trace
+        tracer = active_trace()
+        if tracer is not None:
+            return (tracer.call(lambda path: func(path, *args, **kwargs), item) for item in item_paths)
+        return (func(item, *args, **kwargs) for item in item_paths)
+    from .concurrent import ConcurrentMap
+    return ConcurrentMap.imap(func, item_paths, *args, max_workers=concurrent, use_thread=use_thread,
+                              window=queue_size, ordered=ordered, chunksize=1 if use_thread else None,
+                              pool=pool, **kwargs)
+
+def _imap_incremental(func: Callable, folder_path: str, item_paths, args: tuple, kwargs: dict,
+                      manifest, concurrent: int, use_thread: bool, pool,
+                      queue_size: int, ordered: bool) -> Iterator[Any]:
+    import pickle
+    from functools import partial
+    from .manifest import FolderManifest, run_task
+    if isinstance(manifest, str):
+        manifest = FolderManifest(manifest)
+    if args or kwargs:
+        func = partial(func, *args, **kwargs)
+    algorithm = manifest.algorithm if manifest.hash_content else None
+    task_func = partial(run_task, func, algorithm)
+
+    run = manifest.begin()
+    tasks = manifest.tasks(folder_path, item_paths)
+    for head, status, digest, result in _imap_paths(task_func, tasks, (), {}, concurrent,
+                                                     use_thread, pool, queue_size, ordered):
+        path = head[0]
+        if status == 'unchanged' and result is None:
+            result = manifest.load(folder_path, path)
+            manifest.touch(folder_path, path, run)
+        elif status == 'unchanged':
+            manifest.record(folder_path, head, status, digest, result, run, stored=True)
+            result = pickle.loads(result)
+        else:
+            manifest.record(folder_path, head, status, digest, result, run)
+        yield result
+    manifest.finish(folder_path, run)
+
 def map_folder(func: Callable, folder_path: str, *args, concurrent: int = 1, 
                key: Callable = None, use_thread: bool = True, 
-               **kwargs) -> List[Any]:
+               pool = None, recursive: bool = False, include = None, exclude = None,
+               kind: str = 'all', min_size: int = None, max_size: int = None,
+               modified_after = None, modified_before = None, follow_symlinks: bool = False,
+               queue_size: int = None, manifest = None, **kwargs) -> List[Any]:
     """
     对 folder_path 中的每个文件（或子项）调用 func(item_path, *args, **kwargs)
 
+    目录通过 os.scandir 流式遍历，发现一个条目就提交一个任务，
+    同时在执行或排队的任务数受 queue_size 限制，内存占用与目录大小无关。
+
     Args:
         func (Callable): 待调用函数
         folder_path (str): 文件夹路径
         concurrent (int, optional): 并发数。默认为 1（串行）。
-        key (Callable, optional): 排序函数。默认为 None（不排序）。
+        key (Callable, optional): 排序函数，作用于条目名称，在每个目录内排序。默认为 None（不排序）。
         use_thread (bool, optional): 是否使用线程池。默认为 True（使用线程池）。
+        pool (str | WorkerPool, optional): 共享工作池或其名称，指定时忽略 concurrent。默认为 None。
+        recursive (bool, optional): 是否递归进入子目录。默认为 False。
+        include (str | list, optional): 只处理匹配任一 glob 的条目，如 '*.json'。默认为 None（不限）。
+        exclude (str | list, optional): 跳过匹配任一 glob 的条目，被排除的目录不会进入。默认为 None。
+        kind (str, optional): 'all'、'file' 或 'dir'。默认为 'all'（文件与目录都处理）。
+        min_size (int, optional): 文件大小下限（字节）。默认为 None。
+        max_size (int, optional): 文件大小上限（字节）。默认为 None。
+        modified_after (float | datetime, optional): 只处理修改时间不早于该时间的条目。默认为 None。
+        modified_before (float | datetime, optional): 只处理修改时间早于该时间的条目。默认为 None。
+        follow_symlinks (bool, optional): 递归时是否进入指向目录的符号链接。默认为 False。
+        queue_size (int, optional): 同时在执行或排队的任务数上限。默认为 None（并发数的 2 倍）。
+        manifest (str | FolderManifest, optional): 增量模式使用的清单或其 SQLite 路径，
+            未变化的条目直接返回上次的结果而不调用 func，变化情况见 manifest.report。默认为 None。
         *args: 传递给 func 的其他位置参数
         **kwargs: 传递给 func 的其他关键字参数
 
     Returns:
-        list: 每个文件处理结果形成的列表
+        list: 每个文件处理结果形成的列表，顺序与遍历顺序一致
     """
-    items = os.listdir(folder_path)
-    if key:
-        items.sort(key=key)
-    item_paths = [os.path.join(folder_path, item) for item in items]
-
-    if concurrent == 1:
-        return [func(item, *args, **kwargs) for item in item_paths]
-    else:
-        from .concurrent import ConcurrentMap
-        if use_thread:
-            return ConcurrentMap.thread_map(func, item_paths, *args, max_workers=concurrent, **kwargs)
-        else:
-            return ConcurrentMap.process_map(func, item_paths, *args, max_workers=concurrent, **kwargs)
+    return list(imap_folder(
+        func, folder_path, *args, concurrent=concurrent, key=key, use_thread=use_thread,
+        pool=pool, recursive=recursive, include=include, exclude=exclude, kind=kind,
+        min_size=min_size, max_size=max_size, modified_after=modified_after,
+        modified_before=modified_before, follow_symlinks=follow_symlinks,
+        queue_size=queue_size, manifest=manifest, **kwargs
+    ))
 
 def read_text(file:str, encoding='utf-8') -> str:
     """读取文本文件
 
+    大文件请使用 iter_lines/iter_chunks 逐行或逐块读取，避免一次性载入内存。
+
     Args:
         file (str): 文件路径
-        use_logger (str): 文件编码方式. Defaults to utf-8.
+        encoding (str): 文件编码方式. Defaults to utf-8.
 
     Returns:
         str: 文本内容
     """
-    with open(file, encoding='utf-8') as f:
-        return f.read()
\ No newline at end of file
+    with open(file, encoding=encoding) as f:
+        return f.read()
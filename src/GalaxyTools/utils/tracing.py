@@ -0,0 +1,373 @@
+import os
+import json
+import math
+import time
+import pickle
+import socket
+import itertools
+import threading
+import concurrent.futures
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+"""
+ConcurrentMap 与 map_folder 的逐任务追踪。默认关闭，关闭时每次 map 只多一次全局变量判断。
+
+with TaskTrace() as trace:
+    ConcurrentMap.async_map(parse, items)
+    map_folder(convert, './data', concurrent=8)
+print(trace.summary())                    # 吞吐、各工作线程/进程的利用率、排队与执行耗时的尾延迟
+trace.write_chrome_trace('trace.json')    # 在 chrome://tracing 或 Perfetto 中按时间线查看
+
+每个任务（提交给执行器的一个单元，分块执行时为一个分块）记录：
+    submit          调用方提交任务的时间
+    start/end       在工作线程/进程中开始与结束执行的时间
+    finish          调用方拿到结果的时间
+    host/pid/tid    执行它的主机、进程号与线程号
+    serialization   参数与结果的 pickle/unpickle 耗时，只有进程池与远程工作池有
+
+追踪期间进程池的参数与结果由调用方与工作进程显式 pickle 以便计时。
+时间戳使用 time.time()，远程工作池的记录依赖各机器的时钟同步。
+追踪对进程内所有线程发起的 map 生效。
+"""
+
+_HOST = socket.gethostname()
+_SPAN_ATTR = '_galaxytools_task_span'
+_LABEL_LENGTH = 120
+
+_ACTIVE: Optional['TaskTrace'] = None
+
+
+def active_trace() -> Optional['TaskTrace']:
+    """当前生效的 TaskTrace，未开启追踪时为 None"""
+    return _ACTIVE
+
+
+@dataclass
+class TaskRecord:
+    """一个任务的追踪记录，时间均为 time.time() 的秒数"""
+    id: int
+    label: Optional[str]
+    items: int
+    submit: float = 0.0
+    start: Optional[float] = None
+    end: Optional[float] = None
+    finish: Optional[float] = None
+    host: str = ''
+    pid: int = 0
+    tid: int = 0
+    serialization: float = 0.0
+    status: str = 'pending'     # 'pending' | 'ok' | 'error' | 'cancelled'
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        return None if self.start is None else max(self.start - self.submit, 0.0)
+
+    @property
+    def run_time(self) -> Optional[float]:
+        return None if self.start is None or self.end is None else self.end - self.start
+
+    @property
+    def latency(self) -> Optional[float]:
+        return None if self.finish is None else self.finish - self.submit
+
+    @property
+    def worker(self) -> str:
+        worker = f"{self.pid}/{self.tid}"
+        return worker if self.host == _HOST else f"{self.host}:{worker}"
+
+
+def _label(item: Any, chunked: bool) -> Optional[str]:
+    if chunked and isinstance(item, list):
+        if not item:
+            return None
+        first = _label(item[0], False)
+        if first is None or len(item) == 1:
+            return first
+        return f"{first} (+{len(item) - 1})"
+    if isinstance(item, str):
+        return item[:_LABEL_LENGTH]
+    if isinstance(item, os.PathLike):
+        return os.fspath(item)[:_LABEL_LENGTH]
+    return None
+
+
+def _run_traced(fn: Callable, args: Any, encoded: bool) -> tuple:
+    """在工作线程/进程中执行一个任务，返回 (结果, 执行区间)；encoded 时参数与结果均为 pickle 后的 bytes"""
+    serialization = 0.0
+    if encoded:
+        started = time.perf_counter()
+        args = pickle.loads(args)
+        serialization = time.perf_counter() - started
+    start = time.time()
+    try:
+        result = fn(*args)
+    except BaseException as exc:
+        # 异常对象按原样交给调用方，执行区间附在它上面，由调用方取下
+        try:
+            setattr(exc, _SPAN_ATTR, (_HOST, os.getpid(), threading.get_native_id(), start, time.time(),
+                                      serialization))
+        except Exception:
+            pass
+        raise
+    end = time.time()
+    if encoded:
+        started = time.perf_counter()
+        result = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        serialization += time.perf_counter() - started
+    return result, (_HOST, os.getpid(), threading.get_native_id(), start, end, serialization)
+
+
+class _TracedFuture(concurrent.futures.Future):
+    """交给调用方的 Future：底层任务完成后去掉追踪信息再设置结果，取消时一并取消底层任务"""
+
+    def __init__(self, inner: concurrent.futures.Future):
+        super().__init__()
+        self._inner = inner
+
+    def cancel(self) -> bool:
+        return self._inner.cancel() and super().cancel()
+
+
+class _TracedExecutor:
+    """只提供 submit 的执行器包装，提交的每个任务都记录到 trace 中"""
+
+    def __init__(self, trace: 'TaskTrace', executor: concurrent.futures.Executor, chunked: bool):
+        self.trace = trace
+        self.executor = executor
+        self.chunked = chunked
+        use_thread = getattr(executor, 'use_thread', None)
+        if use_thread is None:
+            self.processes = isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+        else:
+            self.processes = not use_thread
+
+    def submit(self, fn: Callable, /, *args) -> concurrent.futures.Future:
+        return self.trace._submit(self.executor, self.processes, self.chunked, fn, args)
+
+
+class TaskTrace:
+    """
+    逐任务追踪，作为上下文管理器使用，期间所有 ConcurrentMap 调用与 map_folder 的任务都会被记录。
+    """
+
+    def __init__(self):
+        self.records: List[TaskRecord] = []
+        self.pid = os.getpid()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._previous = None
+
+    def __enter__(self) -> 'TaskTrace':
+        global _ACTIVE
+        self._previous, _ACTIVE = _ACTIVE, self
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        global _ACTIVE
+        _ACTIVE = self._previous
+        self._previous = None
+
+    def bind(self, executor: concurrent.futures.Executor, chunked: bool = False) -> _TracedExecutor:
+        """
+        Args:
+            executor: 线程池、进程池或 WorkerPool
+            chunked: 提交的最后一个参数是否为一个分块（列表）
+
+        Returns:
+            只提供 submit 的包装，任务的最后一个参数视为输入项，用于生成标签
+        """
+        return _TracedExecutor(self, executor, chunked)
+
+    def call(self, fn: Callable, item: Any) -> Any:
+        """在当前线程中执行 fn(item) 并记录，用于串行执行的路径"""
+        record = self._new(item, False)
+        record.submit = time.time()
+        try:
+            result, span = _run_traced(fn, (item,), False)
+        except BaseException as exc:
+            self._failed(record, exc)
+            raise
+        self._fill(record, span)
+        record.finish = time.time()
+        record.status = 'ok'
+        return result
+
+    def _new(self, item: Any, chunked: bool) -> TaskRecord:
+        items = len(item) if chunked and isinstance(item, list) else 1
+        with self._lock:
+            record = TaskRecord(id=next(self._ids), label=_label(item, chunked), items=items)
+            self.records.append(record)
+        return record
+
+    def _submit(self, executor, processes: bool, chunked: bool, fn: Callable, args: tuple):
+        record = self._new(args[-1] if args else None, chunked)
+        payload, encoded = args, False
+        if processes:
+            started = time.perf_counter()
+            try:
+                payload, encoded = pickle.dumps(args, pickle.HIGHEST_PROTOCOL), True
+            except Exception:
+                # 无法 pickle 时原样提交，由执行器按原来的方式报错
+                pass
+            record.serialization = time.perf_counter() - started
+        record.submit = time.time()
+        inner = executor.submit(_run_traced, fn, payload, encoded)
+        outer = _TracedFuture(inner)
+        inner.add_done_callback(partial(self._done, record, outer, encoded))
+        return outer
+
+    def _done(self, record: TaskRecord, outer: _TracedFuture, encoded: bool,
+              inner: concurrent.futures.Future) -> None:
+        if inner.cancelled():
+            record.finish = time.time()
+            record.status = 'cancelled'
+            concurrent.futures.Future.cancel(outer)
+            outer.set_running_or_notify_cancel()
+            return
+        exception = inner.exception()
+        if exception is not None:
+            self._failed(record, exception)
+            outer.set_exception(exception)
+            return
+        result, span = inner.result()
+        self._fill(record, span)
+        if encoded:
+            started = time.perf_counter()
+            try:
+                result = pickle.loads(result)
+            except BaseException as exc:
+                self._failed(record, exc)
+                outer.set_exception(exc)
+                return
+            record.serialization += time.perf_counter() - started
+        record.finish = time.time()
+        record.status = 'ok'
+        outer.set_result(result)
+
+    def _fill(self, record: TaskRecord, span: tuple) -> None:
+        record.host, record.pid, record.tid, record.start, record.end, serialization = span
+        record.serialization += serialization
+
+    def _failed(self, record: TaskRecord, exception: BaseException) -> None:
+        span = getattr(exception, _SPAN_ATTR, None)
+        if span is not None:
+            try:
+                delattr(exception, _SPAN_ATTR)
+            except Exception:
+                pass
+            self._fill(record, span)
+        record.finish = time.time()
+        record.status = 'error'
+
+    def summary(self, top: int = 5) -> Dict[str, Any]:
+        """
+        汇总已记录的任务
+
+        wall_time 为第一个任务提交到最后一个任务完成的时间，utilization 为各工作线程/进程执行任务的时间
+        占 wall_time 的比例（只统计执行过任务的工作者），concurrency 为平均同时执行的任务数。
+
+        Args:
+            top: slowest 中列出的最慢任务数
+
+        Returns:
+            dict: tasks, items, errors, cancelled, wall_time, throughput, workers, utilization, concurrency,
+                queue_wait, run_time, latency, serialization_time, per_worker, slowest
+        """
+        with self._lock:
+            records = list(self.records)
+        begin = min((r.submit for r in records), default=0.0)
+        end = max((r.finish or r.submit for r in records), default=0.0)
+        wall = end - begin
+        ran = [r for r in records if r.run_time is not None]
+        finished = [r for r in records if r.status in ('ok', 'error')]
+
+        workers: Dict[str, Dict[str, Any]] = {}
+        for r in ran:
+            stats = workers.setdefault(r.worker, {'worker': r.worker, 'tasks': 0, 'items': 0, 'busy': 0.0})
+            stats['tasks'] += 1
+            stats['items'] += r.items
+            stats['busy'] += r.run_time
+        for stats in workers.values():
+            stats['utilization'] = stats['busy'] / wall if wall > 0 else 0.0
+        busy = sum(r.run_time for r in ran)
+        items = sum(r.items for r in finished)
+
+        slowest = sorted(ran, key=lambda r: r.run_time, reverse=True)[:top]
+        return {
+            'tasks': len(records),
+            'items': items,
+            'errors': sum(r.status == 'error' for r in records),
+            'cancelled': sum(r.status == 'cancelled' for r in records),
+            'wall_time': wall,
+            'throughput': items / wall if wall > 0 else 0.0,
+            'workers': len(workers),
+            'utilization': busy / (wall * len(workers)) if wall > 0 and workers else 0.0,
+            'concurrency': busy / wall if wall > 0 else 0.0,
+            'queue_wait': _distribution([r.queue_wait for r in ran]),
+            'run_time': _distribution([r.run_time for r in ran]),
+            'latency': _distribution([r.latency for r in finished]),
+            'serialization_time': sum(r.serialization for r in records),
+            'per_worker': sorted(workers.values(), key=lambda s: s['worker']),
+            'slowest': [
+                {'id': r.id, 'label': r.label, 'items': r.items, 'run_time': r.run_time,
+                 'queue_wait': r.queue_wait, 'worker': r.worker}
+                for r in slowest
+            ],
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Chrome trace-event 格式的 dict：每个工作进程一行进程、每个线程一条轨道，任务为完整事件，
+            调用方进程中的 queued 异步事件表示提交到开始执行之间的排队
+        """
+        with self._lock:
+            records = list(self.records)
+        origin = min((r.submit for r in records), default=0.0)
+        us = lambda t: round((t - origin) * 1e6, 3)
+
+        # 远程主机的进程号可能重复，按 (主机, 进程号) 重新编号
+        processes = {(_HOST, self.pid): 1}
+        events = [{'ph': 'M', 'name': 'process_name', 'pid': 1, 'tid': 0,
+                   'args': {'name': f'caller {self.pid}'}}]
+        for r in records:
+            if r.start is None:
+                continue
+            key = (r.host, r.pid)
+            pid = processes.get(key)
+            if pid is None:
+                pid = processes[key] = len(processes) + 1
+                name = f'worker {r.pid}' if r.host == _HOST else f'worker {r.host}:{r.pid}'
+                events.append({'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0, 'args': {'name': name}})
+            args = {'id': r.id, 'items': r.items, 'status': r.status,
+                    'queue_wait_ms': r.queue_wait * 1e3, 'serialization_ms': r.serialization * 1e3}
+            if r.latency is not None:
+                args['latency_ms'] = r.latency * 1e3
+            events.append({'ph': 'X', 'cat': 'task', 'name': r.label or f'task {r.id}', 'pid': pid, 'tid': r.tid,
+                           'ts': us(r.start), 'dur': round(max(r.run_time or 0.0, 0.0) * 1e6, 3), 'args': args})
+            events.append({'ph': 'b', 'cat': 'queue', 'name': 'queued', 'id': r.id, 'pid': 1, 'tid': 0,
+                           'ts': us(r.submit)})
+            events.append({'ph': 'e', 'cat': 'queue', 'name': 'queued', 'id': r.id, 'pid': 1, 'tid': 0,
+                           'ts': us(max(r.start, r.submit))})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str) -> None:
+        """将 chrome_trace() 写入 JSON 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {}
+    pick = lambda q: values[max(0, math.ceil(q * len(values)) - 1)]
+    return {
+        'mean': sum(values) / len(values),
+        'p50': pick(0.5),
+        'p90': pick(0.9),
+        'p99': pick(0.99),
+        'max': values[-1],
+    }
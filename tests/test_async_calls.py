@@ -0,0 +1,70 @@
+import json
+import asyncio
+
+import httpx
+from openai import AsyncOpenAI
+
+from GalaxyTools.llm.openai_client import openai_ainvoke
+from GalaxyTools.llm.siliconflow import siliconflow_ainvoke, siliconflow_astream
+from GalaxyTools.llm.events import ContentDelta, ReasoningDelta, UsageDelta
+from GalaxyTools.utils.tools import acall_dify
+
+CHAT = [
+    {'choices': [{'delta': {'reasoning_content': '想'}}]},
+    {'choices': [{'delta': {'content': '你'}}]},
+    {'choices': [{'delta': {'content': '好'}}]},
+    {'choices': [], 'usage': {'prompt_tokens': 3, 'completion_tokens': 2, 'total_tokens': 5}},
+]
+
+
+def _sse(objects, done=True):
+    body = b''.join(b'data: ' + json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n\n' for obj in objects)
+    return body + (b'data: [DONE]\n\n' if done else b'')
+
+
+def _client(body, requests):
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, headers={'Content-Type': 'text/event-stream'}, content=body)
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_siliconflow_astream_and_ainvoke():
+    requests = []
+
+    async def main():
+        async with _client(_sse(CHAT), requests) as client:
+            events = [event async for event in siliconflow_astream({'model': 'm', 'messages': []}, client)]
+            result = await siliconflow_ainvoke({'model': 'm', 'messages': []}, client)
+        return events, result
+
+    events, result = asyncio.run(main())
+    assert events == [ReasoningDelta('想'), ContentDelta('你'), ContentDelta('好'), UsageDelta(3, 2, 5)]
+    assert result == ('想', '你好')
+    assert requests[0]['stream'] is True
+
+
+def test_acall_dify_streams_events():
+    messages = [{'event': 'message', 'answer': '你'},
+                {'event': 'message_end', 'metadata': {'usage': {'prompt_tokens': 1}}}]
+    requests = []
+
+    async def main():
+        async with _client(_sse(messages, done=False), requests) as client:
+            return [data async for data in acall_dify('https://dify.example.com/v1/chat-messages',
+                                                      {'query': 'hi'}, {}, client)]
+
+    assert [json.loads(data) for data in asyncio.run(main())] == messages
+    assert requests == [{'query': 'hi'}]
+
+
+def test_openai_ainvoke():
+    requests = []
+
+    async def main():
+        async with _client(_sse(CHAT), requests) as http_client:
+            client = AsyncOpenAI(api_key='sk-test', base_url='https://api.example.com/v1', http_client=http_client)
+            return await openai_ainvoke({'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}]}, client)
+
+    assert asyncio.run(main()) == ('想', '你好')
+    assert requests[0]['model'] == 'm' and requests[0]['stream'] is True
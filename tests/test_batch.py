@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from GalaxyTools.llm.batch import BatchRunner, TokenBucket, RateLimiter
+
+
+class _Throttled(Exception):
+    status_code = 429
+
+
+class _Overloaded(Exception):
+    status_code = 503
+
+
+def _payloads(count):
+    return [{'model': 'm', 'messages': [{'role': 'user', 'content': str(i)}]} for i in range(count)]
+
+
+def _echo(calls):
+    def invoke(payload):
+        calls.append(payload['messages'][0]['content'])
+        return '', payload['messages'][0]['content']
+    return invoke
+
+
+def test_resume_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'batch.jsonl')
+    calls = []
+    runner = BatchRunner(_echo(calls), provider='test-resume', max_concurrency=4, checkpoint=checkpoint)
+    assert sorted(index for index, _ in runner.run(_payloads(5))) == list(range(5))
+
+    calls.clear()
+    results = dict(runner.run(_payloads(10)))
+    assert sorted(results) == list(range(10))
+    assert sorted(calls, key=int) == [str(i) for i in range(5, 10)]
+    # 检查点中的结果经 JSON 往返
+    assert results[0] == ['', '0'] and results[9] == ('', '9')
+
+
+def test_token_bucket_limits():
+    bucket = TokenBucket(600, capacity=2)       # 每秒补充 10 个
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    started = time.monotonic()
+    assert bucket.acquire() > 0
+    assert time.monotonic() - started >= 0.08
+
+    limiter = RateLimiter(tpm=6000)             # 每秒 100 个 token
+    limiter.consume(6000 + 20)                  # 事后补扣使余额为负
+    started = time.monotonic()
+    limiter.acquire(10)
+    assert time.monotonic() - started >= 0.25
+
+
+def test_iterator_error_is_raised_after_drain():
+    def payloads():
+        yield from _payloads(5)
+        raise RuntimeError('boom')
+
+    received = []
+    runner = BatchRunner(_echo([]), provider='test-error', max_concurrency=2)
+    with pytest.raises(RuntimeError, match='boom'):
+        for item in runner.run(payloads()):
+            received.append(item)
+    assert len(received) == 5
+
+
+def test_throttle_and_overload_shrink_concurrency():
+    def failing(error):
+        def invoke(payload):
+            raise error()
+        return invoke
+
+    for error in (_Throttled, _Overloaded):
+        runner = BatchRunner(failing(error), provider=f'test-{error.status_code}', max_concurrency=8,
+                             max_retries=1, backoff_factor=0)
+        assert isinstance(next(runner.run(_payloads(1)))[1], error)
+        assert runner.concurrency.limit == 4
+
+    # 连接错误只退避重试，不收缩并发
+    runner = BatchRunner(failing(ConnectionError), provider='test-conn', max_concurrency=8,
+                         max_retries=1, backoff_factor=0)
+    assert isinstance(next(runner.run(_payloads(1)))[1], ConnectionError)
+    assert runner.concurrency.limit == 8
@@ -0,0 +1,75 @@
+import time
+import asyncio
+
+from GalaxyTools.utils.cache import ResponseCache, request_key
+
+
+def test_request_key_ignores_key_order():
+    assert request_key('ns', {'a': 1, 'b': [1, 2]}) == request_key('ns', {'b': [1, 2], 'a': 1})
+    assert request_key('ns', {'a': 1}) != request_key('other', {'a': 1})
+
+
+def test_memory_lru_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl=0.2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    # 最近访问过的 a 保留，最久未访问的 b 被淘汰
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+    time.sleep(0.25)
+    assert cache.get('a') is None
+
+
+def test_sqlite_replay_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    calls = []
+
+    def produce():
+        calls.append(1)
+        yield from ('think', 'a', 'b')
+
+    first = ResponseCache(path)
+    assert list(first.stream('k', produce)) == ['think', 'a', 'b']
+    # 新实例的内存层为空，从 SQLite 读取后按原顺序重放，不再调用 produce
+    second = ResponseCache(path)
+    assert list(second.stream('k', produce)) == ['think', 'a', 'b']
+    assert len(calls) == 1 and second.hits == 1
+
+    async def produce_async():
+        calls.append(1)
+        for item in ('x', 'y'):
+            yield item
+
+    async def consume(cache):
+        return [item async for item in cache.astream('ak', produce_async)]
+
+    assert asyncio.run(consume(first)) == ['x', 'y']
+    assert asyncio.run(consume(ResponseCache(path))) == ['x', 'y']
+    assert len(calls) == 2
+
+
+def test_interrupted_stream_is_not_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+
+    def produce():
+        yield 'a'
+        raise ConnectionError('reset')
+
+    try:
+        list(cache.stream('k', produce))
+    except ConnectionError:
+        pass
+    assert cache.get('k') is None
+
+
+def test_disk_eviction_by_size(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_entries=1, max_bytes=2500)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, 'x' * 1000)
+        time.sleep(0.01)
+    fresh = ResponseCache(cache.path)
+    assert fresh.get('a') is None
+    assert fresh.get('b') is not None and fresh.get('c') is not None
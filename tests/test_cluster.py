@@ -0,0 +1,67 @@
+import os
+import time
+import inspect
+import threading
+
+import pytest
+
+from GalaxyTools.utils.concurrent import ConcurrentMap
+from GalaxyTools.utils.cluster import RemotePool, WorkerLost, start_local_workers
+
+
+def _square(x):
+    return x * x
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_remote_pool_map_and_requeue_after_worker_lost():
+    pool = RemotePool('test-cluster', address=('127.0.0.1', 0), authkey=b'test', max_workers=8, heartbeat_timeout=2)
+    try:
+        with start_local_workers(pool.address, b'test', count=2, slots=2, heartbeat_interval=0.2) as workers:
+            assert pool.wait_for_workers(2, timeout=30) == 2
+            assert ConcurrentMap.process_map(_square, range(100), pool=pool) == [x * x for x in range(100)]
+
+            # 执行中杀掉一个工作进程，它持有的任务重新排队到另一个上
+            threading.Timer(0.3, workers.kill, args=(0,)).start()
+            assert ConcurrentMap.process_map(_sleep, [0.1] * 20, pool=pool, chunksize=1) == [0.1] * 20
+            assert len(pool.workers()) == 1
+    finally:
+        pool.shutdown()
+
+
+def _crash_once(marker):
+    # 第一次执行时让本机进程池中的进程崩溃，重新排队后正常返回
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return marker
+
+
+def _crash():
+    os._exit(1)
+
+
+def test_broken_local_pool_requeues_task(tmp_path):
+    pool = RemotePool('test-cluster-broken', address=('127.0.0.1', 0), authkey=b'test', max_retries=1)
+    try:
+        with start_local_workers(pool.address, b'test', count=1, slots=1, heartbeat_interval=0.2):
+            assert pool.wait_for_workers(1, timeout=30) == 1
+            marker = str(tmp_path / 'crashed')
+            assert pool.executor.submit(_crash_once, marker).result(timeout=60) == marker
+            with pytest.raises(WorkerLost):
+                pool.executor.submit(_crash).result(timeout=60)
+            # 工作进程没有断开，重建的进程池继续执行任务
+            assert len(pool.workers()) == 1
+            assert pool.executor.submit(_square, 3).result(timeout=60) == 9
+    finally:
+        pool.shutdown()
+
+
+def test_default_address_is_loopback():
+    assert RemotePool('test-cluster-default', authkey=b'test').address_hint[0] == '127.0.0.1'
+    default = inspect.signature(ConcurrentMap.get_remote_pool).parameters['address'].default
+    assert default[0] == '127.0.0.1'
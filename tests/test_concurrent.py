@@ -0,0 +1,151 @@
+import os
+import time
+import itertools
+import threading
+import concurrent.futures
+
+from GalaxyTools.utils.concurrent import ConcurrentMap, TaskTimeout, WorkerPool, _bounded_map
+
+
+def _busy(x):
+    deadline = time.thread_time() + 0.01
+    while time.thread_time() < deadline:
+        pass
+    return x
+
+
+def _wait(x):
+    time.sleep(0.01)
+    return x
+
+
+class _Model:
+    def predict(self, x):
+        return x + 1
+
+
+def test_executor_selection():
+    ConcurrentMap.forget()
+    square = lambda x: x * x
+    assert ConcurrentMap.async_map(square, range(100)) == [x * x for x in range(100)]
+    # 微秒级的函数不因为CPU时间占比的噪声启动进程池
+    assert ConcurrentMap.explain(square).mode == 'thread'
+    assert ConcurrentMap.profile(abs, iter(range(3))).mode == 'thread'
+
+    assert ConcurrentMap.profile(_busy, iter(range(3))).mode == 'process'
+    assert ConcurrentMap.profile(_wait, iter(range(3))).mode == 'thread'
+    # 无法 pickle 的 CPU 密集函数只能使用线程池
+    assert ConcurrentMap.profile(lambda x: _busy(x), iter(range(3))).mode == 'thread'
+    assert ConcurrentMap.explain(_busy).mode == 'process'
+
+
+def test_bound_method_decision_is_remembered():
+    ConcurrentMap.forget()
+    model = _Model()
+    assert ConcurrentMap.async_map(model.predict, range(10)) == list(range(1, 11))
+    assert ConcurrentMap.explain(model.predict) is not None
+    assert ConcurrentMap.explain(_Model().predict) is None
+    ConcurrentMap.forget(model.predict)
+    assert ConcurrentMap.explain(model.predict) is None
+
+
+def _sleep_or_fail(x):
+    if x < 0:
+        raise ValueError(x)
+    time.sleep(x)
+    return x
+
+
+def test_deadline_map_keeps_order_with_timeout_markers():
+    results = ConcurrentMap.thread_map(_sleep_or_fail, [0.3, 0.0, -1, 0.05], max_workers=4, timeout=0.15)
+    assert isinstance(results[0], TaskTimeout)
+    assert results[1] == 0.0 and results[3] == 0.05
+    assert isinstance(results[2], ValueError)
+
+    results = ConcurrentMap.thread_map(_sleep_or_fail, [0.0, 0.5, 0.5], max_workers=1, batch_timeout=0.2)
+    assert results[0] == 0.0
+    assert all(isinstance(r, TaskTimeout) for r in results[1:])
+
+
+def test_hard_kill_terminates_pool_and_resubmits_others():
+    pool = WorkerPool('test-hard-kill', use_thread=False, max_workers=2)
+    try:
+        started = time.perf_counter()
+        results = ConcurrentMap.process_map(_sleep_or_fail, [5.0, 0.3, 0.0, 1.5], pool=pool, timeout=1.0, hard_kill=True)
+        assert time.perf_counter() - started < 4
+        assert isinstance(results[0], TaskTimeout)
+        # 与超时任务同时在途的任务在终止后重新执行，同样超时
+        assert results[1:3] == [0.3, 0.0]
+        assert isinstance(results[3], TaskTimeout)
+        # 被终止的进程池在下一次提交时重建
+        assert pool.submit(_sleep_or_fail, 0.0).result(timeout=30) == 0.0
+        assert pool.stats()['restarts'] >= 1
+    finally:
+        pool.shutdown()
+    assert WorkerPool('test-thread', use_thread=True).terminate() is False
+
+
+def test_imap_reads_input_lazily():
+    consumed = []
+
+    def source():
+        for i in itertools.count():
+            consumed.append(i)
+            yield i
+
+    results = ConcurrentMap.imap(lambda x: x * 2, source(), max_workers=2, window=4)
+    assert [next(results) for _ in range(3)] == [0, 2, 4]
+    # 无限输入只读取了在途窗口加上已产出的部分
+    assert len(consumed) <= 3 + 4
+    results.close()
+
+
+def test_bounded_map_window_and_unordered():
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def work(x):
+        with lock:
+            active.append(x)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.02 if x % 3 else 0.1)
+        with lock:
+            active.remove(x)
+        return x
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(_bounded_map(executor, work, range(20), window=3)) == list(range(20))
+        assert peak[0] <= 3
+        unordered = list(_bounded_map(executor, work, range(20), window=6, ordered=False))
+        assert sorted(unordered) == list(range(20)) and unordered != list(range(20))
+        assert list(_bounded_map(executor, work, range(10), window=2, chunksize=3)) == list(range(10))
+        assert list(_bounded_map(executor, abs, range(-50, 0), window=4, chunksize=None)) == list(range(50, 0, -1))
+
+
+def _crash(x):
+    os._exit(1)
+
+
+def _pid(x):
+    return os.getpid()
+
+
+def test_named_pool_is_shared_and_rebuilt_after_crash():
+    pool = ConcurrentMap.get_pool('test-shared', use_thread=False, max_workers=2)
+    try:
+        assert ConcurrentMap.get_pool('test-shared', use_thread=True) is pool
+        pids = set(ConcurrentMap.process_map(_pid, range(4), pool='test-shared'))
+        pids |= set(ConcurrentMap.process_map(_pid, range(4), pool=pool))
+        # 进程在两次调用之间保留，不超过max_workers个
+        assert len(pids) <= 2
+        try:
+            pool.submit(_crash, 0).result(timeout=30)
+        except concurrent.futures.BrokenExecutor:
+            pass
+        assert ConcurrentMap.process_map(abs, [-1, -2], pool=pool) == [1, 2]
+        stats = ConcurrentMap.pool_stats()['test-shared']
+        assert stats['restarts'] == 1 and stats['failed'] == 1 and stats['pending'] == 0
+    finally:
+        ConcurrentMap.shutdown_pools('test-shared')
+    assert 'test-shared' not in ConcurrentMap.pool_stats()
@@ -0,0 +1,76 @@
+import io
+import json
+import asyncio
+
+import requests
+from requests.adapters import BaseAdapter
+
+from GalaxyTools.llm.events import (ContentDelta, ReasoningDelta, ToolCallDelta, UsageDelta, acollect, collect,
+                                    events_from_chunk)
+from GalaxyTools.llm.siliconflow import siliconflow_stream
+
+
+def _delta(**delta):
+    return {'choices': [{'index': 0, 'delta': delta}]}
+
+
+CHUNKS = [
+    _delta(reasoning_content='想'),
+    _delta(think='一想'),
+    _delta(content='答'),
+    _delta(tool_calls=[{'index': 0, 'id': 'call_a', 'function': {'name': 'search', 'arguments': '{"q": '}}]),
+    _delta(tool_calls=[{'index': 1, 'id': 'call_b', 'function': {'name': 'open', 'arguments': '{}'}}]),
+    _delta(tool_calls=[{'index': 0, 'function': {'arguments': '"x"}'}}]),
+    _delta(content='案'),
+    {'choices': [], 'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15}},
+]
+
+
+def test_events_from_chunk():
+    # reasoning_content 与旧的 think 字段都解析为 ReasoningDelta
+    assert list(events_from_chunk(CHUNKS[0])) == [ReasoningDelta('想')]
+    assert list(events_from_chunk(CHUNKS[1])) == [ReasoningDelta('一想')]
+    assert list(events_from_chunk(_delta(content='', reasoning_content=None))) == []
+    assert list(events_from_chunk(CHUNKS[5])) == [ToolCallDelta(index=0, arguments='"x"}')]
+    # 只有 usage 的最后一个 chunk
+    assert list(events_from_chunk(CHUNKS[-1])) == [UsageDelta(10, 5, 15)]
+
+
+def test_collect_assembles_tool_calls():
+    events = [event for chunk in CHUNKS for event in events_from_chunk(chunk)]
+    assert collect(events) == ('想一想', '答案')
+    think, answer, tool_calls = collect(events, tool_calls=True)
+    assert (think, answer) == ('想一想', '答案')
+    assert tool_calls == [
+        {'id': 'call_a', 'type': 'function', 'function': {'name': 'search', 'arguments': '{"q": "x"}'}},
+        {'id': 'call_b', 'type': 'function', 'function': {'name': 'open', 'arguments': '{}'}},
+    ]
+
+    async def stream():
+        for event in events:
+            yield event
+
+    assert asyncio.run(acollect(stream(), tool_calls=True)) == (think, answer, tool_calls)
+
+
+class _SSEAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/event-stream'
+        body = b''.join(b'data: ' + json.dumps(chunk).encode('utf-8') + b'\n\n' for chunk in CHUNKS)
+        response.raw = io.BytesIO(body + b'data: [DONE]\n\n')
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_siliconflow_stream_yields_typed_events():
+    session = requests.Session()
+    session.mount('https://', _SSEAdapter())
+    events = list(siliconflow_stream({'model': 'm', 'messages': []}, session=session))
+    assert events[0] == ReasoningDelta('想') and events[2] == ContentDelta('答')
+    assert events[-1] == UsageDelta(10, 5, 15)
+    assert [type(event) for event in events].count(ToolCallDelta) == 3
@@ -0,0 +1,49 @@
+import os
+import stat
+
+import pytest
+
+from GalaxyTools.utils.fileio import TextWriter, iter_lines, iter_chunks
+from GalaxyTools.utils.tools import save_text
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_write_modes_and_rollback(tmp_path):
+    target = tmp_path / 'out.txt'
+    previous = os.umask(0o027)
+    try:
+        assert save_text(str(target), (f'{i}\n' for i in range(1000)))
+        assert _mode(target) == 0o640
+    finally:
+        os.umask(previous)
+    assert list(iter_lines(str(target))) == [str(i) for i in range(1000)]
+
+    # 替换已有文件时保留其权限
+    os.chmod(target, 0o600)
+    with TextWriter(str(target), background=True, buffer_size=16, fsync='batch') as writer:
+        writer.writelines(['a\n', 'b\n'] * 100)
+    assert _mode(target) == 0o600
+    assert ''.join(iter_chunks(str(target), chunk_size=7)) == 'a\nb\n' * 100
+
+    # with 块内出错时目标文件不变，也不留下临时文件
+    with pytest.raises(RuntimeError):
+        with TextWriter(str(target)) as writer:
+            writer.write('partial')
+            raise RuntimeError('stop')
+    assert target.read_text() == 'a\nb\n' * 100
+    assert os.listdir(tmp_path) == ['out.txt']
+
+
+def test_newline_translation(tmp_path):
+    target = tmp_path / 'crlf.txt'
+    with TextWriter(str(target), newline='\r\n') as writer:
+        writer.write('x\ny\n')
+    assert target.read_bytes() == b'x\r\ny\r\n'
+    assert list(iter_lines(str(target))) == ['x', 'y']
+
+    with TextWriter(str(target)) as writer:
+        writer.write('x\n')
+    assert target.read_bytes() == ('x' + os.linesep).encode()
@@ -0,0 +1,62 @@
+import json
+import queue
+import logging
+
+from GalaxyTools.Logger.formatter import JsonFormatter, bind, log_context
+from GalaxyTools.Logger.logger import BoundedQueueHandler
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(name):
+    log = logging.getLogger(name)
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    handler = _Collect()
+    log.handlers = [handler]
+    return log, handler
+
+
+def test_json_fields_merge_in_order():
+    log, handler = _logger('test.json.merge')
+    formatter = JsonFormatter(backend='json', static_fields={'service': 'svc', 'model': 'static'})
+    bound = bind(log, model='qwen', provider='siliconflow').bind(provider='openai')
+    with log_context(request_id='abc', model='context'):
+        with log_context(step=2):
+            bound.info('调用完成 %d', 1, extra={'latency': 1.5})
+            entry = json.loads(formatter.format(handler.records[-1]))
+    assert entry['message'] == '调用完成 1'
+    assert entry['level'] == 'INFO' and entry['logger'] == 'test.json.merge'
+    assert entry['service'] == 'svc' and entry['request_id'] == 'abc' and entry['step'] == 2
+    # log_context 覆盖 static_fields，bind 覆盖 log_context，extra 覆盖 bind
+    assert entry['model'] == 'qwen' and entry['provider'] == 'openai' and entry['latency'] == 1.5
+    assert 'context' not in entry and 'log_context' not in entry
+    # 离开 log_context 后不再附带
+    log.info('plain')
+    assert 'request_id' not in json.loads(formatter.format(handler.records[-1]))
+
+
+def test_json_exception_and_queued_context():
+    log, handler = _logger('test.json.queue')
+    formatter = JsonFormatter(backend='json')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        log.exception('失败')
+    entry = json.loads(formatter.format(handler.records[-1]))
+    assert entry['level'] == 'ERROR' and 'ValueError: boom' in entry['exc']
+
+    # 经过队列时上下文在调用方线程中取出，后台线程格式化时仍然可见
+    log_queue = queue.Queue()
+    queue_handler = BoundedQueueHandler(log_queue)
+    with log_context(request_id='xyz'):
+        queue_handler.emit(logging.LogRecord('q', logging.INFO, __file__, 1, 'n=%d', (3,), None))
+    entry = json.loads(formatter.format(log_queue.get_nowait()))
+    assert entry['request_id'] == 'xyz' and entry['message'] == 'n=3'
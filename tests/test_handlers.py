@@ -0,0 +1,55 @@
+import os
+import time
+import logging
+import threading
+
+from GalaxyTools.Logger import handlers
+from GalaxyTools.Logger.handlers import RotatingFileHandler
+
+
+def _record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message, None, None)
+
+
+def _backups(path):
+    directory, base = os.path.split(path)
+    return sorted(name for name in os.listdir(directory) if name.startswith(base + '.') and not name.endswith('.lock'))
+
+
+def test_size_rotation_counts_encoded_bytes(tmp_path):
+    path = str(tmp_path / 'info.log')
+    handler = RotatingFileHandler(path, when=None, max_bytes=100, backup_count=0)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    try:
+        # 每条 21 个字符，UTF-8 编码后 61 字节：按字符数不会切分，按字节数每条一个文件
+        for _ in range(3):
+            handler.emit(_record('日志' * 10))
+            time.sleep(0.01)
+    finally:
+        handler.close()
+    assert len(_backups(path)) == 2
+    assert os.path.getsize(path) == 61
+
+
+def test_close_waits_only_for_own_compression(tmp_path, monkeypatch):
+    gate = threading.Event()
+    compress = handlers._compress_file
+
+    def slow_compress(path, method):
+        gate.wait(10)
+        return compress(path, method)
+
+    monkeypatch.setattr(handlers, '_compress_file', slow_compress)
+    busy = RotatingFileHandler(str(tmp_path / 'busy.log'), when=None, max_bytes=10, compress='gzip')
+    other = RotatingFileHandler(str(tmp_path / 'other.log'), when=None, max_bytes=10, compress='gzip')
+    try:
+        busy.emit(_record('first line'))
+        busy.emit(_record('second line'))
+        started = time.perf_counter()
+        other.close()
+        assert time.perf_counter() - started < 1
+    finally:
+        gate.set()
+    busy.close()
+    assert [name for name in _backups(str(tmp_path / 'busy.log')) if name.endswith('.gz')]
+    assert not [name for name in _backups(str(tmp_path / 'busy.log')) if not name.endswith('.gz')]
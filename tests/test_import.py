@@ -0,0 +1,44 @@
+import os
+import sys
+import json
+import subprocess
+
+HEAVY = ('openai', 'requests', 'httpx')
+
+
+def _run(code: str) -> dict:
+    # 在新的解释器中运行，避免受到本进程已导入模块的影响
+    env = {k: v for k, v in os.environ.items() if k != 'TZ'}
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def test_import_is_light_and_has_no_side_effects():
+    result = _run(
+        "import sys, os, json, GalaxyTools\n"
+        f"print(json.dumps({{'loaded': [m for m in {HEAVY!r} if m in sys.modules], 'tz': os.environ.get('TZ')}}))"
+    )
+    assert result == {'loaded': [], 'tz': None}
+
+
+def test_lazy_attributes():
+    result = _run(
+        "import sys, json, GalaxyTools\n"
+        "from GalaxyTools import random_string, setup_logger, map_folder\n"
+        "from GalaxyTools.utils import FolderManifest\n"
+        "light = [m for m in ('openai', 'requests', 'httpx') if m in sys.modules]\n"
+        "from GalaxyTools import *\n"
+        "print(json.dumps({'light': light, 'missing': [n for n in GalaxyTools.__all__ if n not in globals()], "
+        "'dir': set(GalaxyTools.__all__) <= set(dir(GalaxyTools))}))"
+    )
+    assert result == {'light': [], 'missing': [], 'dir': True}
+
+
+def test_unknown_attribute():
+    import GalaxyTools
+    try:
+        GalaxyTools.no_such_name
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError('unknown attribute should raise AttributeError')
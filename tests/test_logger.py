@@ -0,0 +1,96 @@
+import time
+import queue
+import logging
+import threading
+
+from GalaxyTools.Logger import logger as logger_module
+from GalaxyTools.Logger.logger import BoundedQueueHandler, RateLimitFilter, shutdown_logger
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(name, rate_filter):
+    log = logging.getLogger(name)
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    handler = _Collect()
+    handler.addFilter(rate_filter)
+    log.handlers = [handler]
+    return log, handler
+
+
+def test_rate_limit_summary_is_emitted_after_flood():
+    rate_filter = RateLimitFilter(rate=1, burst=1, summary_interval=0.2)
+    log, handler = _logger('test.rate.timer', rate_filter)
+    for i in range(10):
+        log.warning('retry %d', i)
+    assert len(handler.records) == 1
+    # 洪峰停止后由定时器写出汇总，不需要等下一条同模板日志
+    time.sleep(0.5)
+    summary = handler.records[-1]
+    assert summary.suppressed == 9 and summary.levelno == logging.WARNING
+    assert 'retry %d' in summary.getMessage()
+    assert rate_filter.pending_summary() == {}
+
+
+def test_shutdown_flushes_pending_summary(monkeypatch):
+    rate_filter = RateLimitFilter(rate=1, burst=1, summary_interval=None)
+    log, handler = _logger('test.rate.shutdown', rate_filter)
+    for _ in range(5):
+        log.info('flood')
+    monkeypatch.setattr(logger_module, '_RATE_FILTER', rate_filter)
+    shutdown_logger()
+    assert [r.suppressed for r in handler.records if hasattr(r, 'suppressed')] == [4]
+
+
+def _record(level=logging.INFO, msg='m'):
+    return logging.LogRecord('test.queue', level, __file__, 1, msg, None, None)
+
+
+def test_overflow_drop_never_blocks():
+    log_queue = queue.Queue(maxsize=4)
+    handler = BoundedQueueHandler(log_queue, overflow='drop')
+    for _ in range(6):
+        handler.emit(_record(logging.ERROR))
+    assert log_queue.qsize() == 4
+    assert handler.dropped == 2
+
+
+def test_overflow_sample_thins_low_levels_and_keeps_errors():
+    log_queue = queue.Queue(maxsize=8)
+    handler = BoundedQueueHandler(log_queue, overflow='sample', sample_every=3)
+    for i in range(10):
+        handler.emit(_record(msg=f'info {i}'))
+    # 前 4 条在半满之前全部入队，之后每 3 条保留 1 条
+    kept = [log_queue.get_nowait().msg for _ in range(log_queue.qsize())]
+    assert kept == ['info 0', 'info 1', 'info 2', 'info 3', 'info 6', 'info 9']
+    assert handler.dropped == 4
+
+    for _ in range(8):
+        log_queue.put_nowait(_record())
+    handler.emit(_record(logging.WARNING))
+    assert handler.dropped == 5
+    # 队列已满时 ERROR 等待入队而不是被丢弃
+    threading.Timer(0.2, log_queue.get_nowait).start()
+    handler.emit(_record(logging.ERROR, 'error'))
+    assert handler.dropped == 5
+    assert list(log_queue.queue)[-1].msg == 'error'
+
+
+def test_overflow_block_waits_for_space():
+    log_queue = queue.Queue(maxsize=1)
+    handler = BoundedQueueHandler(log_queue, overflow='block')
+    handler.emit(_record(msg='first'))
+    threading.Timer(0.2, log_queue.get_nowait).start()
+    started = time.perf_counter()
+    handler.emit(_record(msg='second'))
+    assert time.perf_counter() - started >= 0.15
+    assert handler.dropped == 0
+    assert log_queue.get_nowait().msg == 'second'
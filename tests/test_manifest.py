@@ -0,0 +1,56 @@
+import os
+
+from GalaxyTools.utils.manifest import FolderManifest
+from GalaxyTools.utils.tools import map_folder
+
+CALLS = []
+
+
+def _size(path):
+    CALLS.append(os.path.basename(path))
+    with open(path, 'rb') as f:
+        return len(f.read())
+
+
+def _run(folder, manifest):
+    CALLS.clear()
+    results = map_folder(_size, folder, kind='file', key=str, manifest=manifest)
+    return results, sorted(CALLS), manifest.report.summary()
+
+
+def test_manifest_new_changed_deleted_unchanged(tmp_path):
+    folder = tmp_path / 'corpus'
+    folder.mkdir()
+    for name, size in (('a', 1), ('b', 2), ('c', 3)):
+        (folder / name).write_bytes(b'x' * size)
+    manifest = FolderManifest(str(tmp_path / 'manifest.db'))
+
+    assert _run(str(folder), manifest) == ([1, 2, 3], ['a', 'b', 'c'],
+                                           {'new': 3, 'changed': 0, 'deleted': 0, 'unchanged': 0})
+    # 未变化的条目直接返回上次的结果，不调用 func
+    assert _run(str(folder), manifest) == ([1, 2, 3], [], {'new': 0, 'changed': 0, 'deleted': 0, 'unchanged': 3})
+
+    (folder / 'b').write_bytes(b'x' * 20)
+    (folder / 'c').unlink()
+    (folder / 'd').write_bytes(b'x' * 4)
+    results, calls, summary = _run(str(folder), manifest)
+    assert results == [1, 20, 4] and calls == ['b', 'd']
+    assert summary == {'new': 1, 'changed': 1, 'deleted': 1, 'unchanged': 1}
+    assert manifest.report.deleted == [os.path.join(str(folder), 'c')]
+
+    # 重新打开清单文件后状态保留
+    assert _run(str(folder), FolderManifest(manifest.path))[1] == []
+
+
+def test_hash_content_ignores_touch(tmp_path):
+    folder = tmp_path / 'corpus'
+    folder.mkdir()
+    (folder / 'a').write_bytes(b'abc')
+    manifest = FolderManifest(str(tmp_path / 'manifest.db'), hash_content=True)
+    _run(str(folder), manifest)
+    stat = os.stat(folder / 'a')
+    os.utime(folder / 'a', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    # 修改时间变化但内容相同，仍视为未变化
+    assert _run(str(folder), manifest) == ([3], [], {'new': 0, 'changed': 0, 'deleted': 0, 'unchanged': 1})
+    (folder / 'a').write_bytes(b'abd')
+    assert _run(str(folder), manifest)[2]['changed'] == 1
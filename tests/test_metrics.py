@@ -0,0 +1,69 @@
+import inspect
+import urllib.request
+
+from GalaxyTools.utils.metrics import (Histogram, enable_metrics, metrics_snapshot, metrics_text, reset_metrics,
+                                       start_call, start_metrics_server)
+from GalaxyTools.utils.tools import _dify_label
+
+
+def test_histogram_buckets_and_quantile():
+    histogram = Histogram((0.1, 1, 10))
+    for value in (0.05, 0.1, 0.5, 2, 20):
+        histogram.observe(value)
+    # 等于上界的值落在该桶中，超过最大上界的落在 +Inf
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert abs(histogram.sum - 22.65) < 1e-9
+    assert histogram.quantile(0.4) == 0.1
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(1.0) == float('inf')
+    assert Histogram((1,)).quantile(0.5) == 0.0
+
+
+def test_prometheus_text_and_server():
+    reset_metrics()
+    enable_metrics()
+    try:
+        timer = start_call('test', 'm"1')
+        timer.connected()
+        timer.chunk()
+        timer.chunk()
+        timer.usage(10, 2)
+        timer.finish()
+        start_call('test', 'm"1').finish(RuntimeError())
+    finally:
+        enable_metrics(False)
+    assert start_call('test') is None
+
+    text = metrics_text()
+    lines = text.splitlines()
+    assert '# TYPE galaxytools_llm_ttft_seconds histogram' in lines
+    assert '# TYPE galaxytools_llm_requests_total counter' in lines
+    assert lines.count('# TYPE galaxytools_llm_duration_seconds histogram') == 1
+    assert 'galaxytools_llm_duration_seconds_bucket{provider="test",model="m\\"1",le="+Inf"} 2' in lines
+    assert 'galaxytools_llm_duration_seconds_count{provider="test",model="m\\"1"} 2' in lines
+    assert 'galaxytools_llm_ttft_seconds_count{provider="test",model="m\\"1"} 1' in lines
+    assert 'galaxytools_llm_requests_total{provider="test",model="m\\"1",outcome="ok"} 1' in lines
+    assert 'galaxytools_llm_requests_total{provider="test",model="m\\"1",outcome="error"} 1' in lines
+    assert 'galaxytools_llm_prompt_tokens_total{provider="test",model="m\\"1"} 10' in lines
+    assert 'galaxytools_llm_chunks_total{provider="test",model="m\\"1"} 2' in lines
+    # 桶计数是累积的
+    buckets = [int(line.rsplit(' ', 1)[1]) for line in lines if line.startswith('galaxytools_llm_duration_seconds_bucket')]
+    assert buckets == sorted(buckets)
+    assert metrics_snapshot()['histograms']['inter_token_seconds{provider=test,model=m"1}']['count'] == 1
+
+    assert inspect.signature(start_metrics_server).parameters['addr'].default == '127.0.0.1'
+    server = start_metrics_server(0)
+    try:
+        host, port = server.server_address
+        assert host == '127.0.0.1'
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+            assert response.read().decode('utf-8') == metrics_text()
+    finally:
+        server.shutdown()
+        server.server_close()
+        reset_metrics()
+
+
+def test_dify_label_is_host_only():
+    assert _dify_label('https://api.dify.ai/v1/chat-messages?key=secret') == 'api.dify.ai'
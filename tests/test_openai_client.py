@@ -0,0 +1,38 @@
+import asyncio
+
+from GalaxyTools.llm import openai_client
+from GalaxyTools.llm.openai_client import (close_openai_clients, get_async_openai_client, get_openai_client,
+                                           refresh_openai_client)
+
+BASE_URL = 'http://127.0.0.1:9/v1'
+
+
+def test_client_registry():
+    close_openai_clients()
+    client = get_openai_client('sk-a', BASE_URL)
+    assert get_openai_client('sk-a', BASE_URL) is client
+    other = get_openai_client('sk-b', BASE_URL)
+    assert other is not client
+
+    close_openai_clients('sk-a')
+    assert ('sk-a', BASE_URL) not in openai_client._CLIENTS
+    assert ('sk-b', BASE_URL) in openai_client._CLIENTS
+    assert get_openai_client('sk-a', BASE_URL) is not client
+
+    refreshed = refresh_openai_client('sk-b', BASE_URL)
+    assert refreshed is not other and get_openai_client('sk-b', BASE_URL) is refreshed
+    close_openai_clients()
+    assert not openai_client._CLIENTS
+
+
+def test_registry_is_empty_after_fork():
+    get_openai_client('sk-a', BASE_URL)
+
+    async def main():
+        return get_async_openai_client('sk-a', BASE_URL)
+
+    asyncio.run(main())
+    lock = openai_client._CLIENTS_LOCK
+    openai_client._reset_clients_after_fork()
+    assert not openai_client._CLIENTS and not openai_client._ASYNC_CLIENTS
+    assert openai_client._CLIENTS_LOCK is not lock
@@ -0,0 +1,137 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from GalaxyTools.llm.router import Endpoint, Router, siliconflow_endpoint
+
+DATA = {'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}]}
+
+
+def _stub(delay=0.0, status=200):
+    """返回 (server, handler)，handler.delay/status/count 可在测试中修改"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.0'
+
+        def do_POST(self):
+            Handler.count += 1
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if Handler.status != 200:
+                self.send_response(Handler.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            time.sleep(Handler.delay)
+            try:
+                for text in ('a', 'b'):
+                    chunk = {'choices': [{'delta': {'content': text}}]}
+                    self.wfile.write(b'data: ' + json.dumps(chunk).encode() + b'\n\n')
+                    self.wfile.flush()
+                self.wfile.write(b'data: [DONE]\n\n')
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    Handler.delay, Handler.status, Handler.count = delay, status, 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, Handler
+
+
+def _endpoint(server, name):
+    return siliconflow_endpoint(f'http://127.0.0.1:{server.server_port}/v1/chat/completions', token='x', name=name)
+
+
+def test_failover_and_circuit_breaker():
+    good, good_handler = _stub()
+    bad, bad_handler = _stub(status=500)
+    router = Router([_endpoint(good, 'good'), _endpoint(bad, 'bad')], failure_threshold=2, recovery_time=0.3)
+    for _ in range(10):
+        assert router.invoke(DATA) == ('', 'ab')
+    # 失败的请求切换到 good，bad 熔断后不再收到请求
+    assert bad_handler.count == 2
+    assert {s['name']: s['state'] for s in router.stats()}['bad'] == 'open'
+
+    bad_handler.status = 200
+    time.sleep(0.35)
+    for _ in range(5):
+        router.invoke(DATA)
+    assert {s['name']: s['state'] for s in router.stats()}['bad'] == 'closed'
+    good.shutdown()
+    bad.shutdown()
+
+
+def test_hedged_request_beats_slow_endpoint():
+    fast, _ = _stub()
+    slow, _ = _stub(delay=0.8)
+    router = Router([_endpoint(fast, 'fast'), _endpoint(slow, 'slow')], hedge=True, hedge_delay=0.1)
+
+    async def main():
+        return await asyncio.gather(*(router.ainvoke(DATA) for _ in range(4)))
+
+    for _ in range(4):
+        started = time.perf_counter()
+        assert router.invoke(DATA) == ('', 'ab')
+        assert time.perf_counter() - started < 0.6
+    started = time.perf_counter()
+    assert asyncio.run(main()) == [('', 'ab')] * 4
+    assert time.perf_counter() - started < 0.6
+    fast.shutdown()
+    slow.shutdown()
+
+
+def test_half_open_endpoint_admits_single_probe():
+    router = Router([Endpoint('a', iter), Endpoint('b', iter)], recovery_time=0.1)
+    health = router._health['a']
+    health.ttft, health.opened_at = 0.0, time.monotonic() - 1
+    router._health['b'].ttft = 1.0
+    barrier = threading.Barrier(8)
+    attempts = []
+
+    def acquire():
+        barrier.wait()
+        attempts.append(router._acquire([]))
+
+    threads = [threading.Thread(target=acquire) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 并发选择时只有一个请求作为探测发往半开的接口
+    assert sorted(attempt.health.endpoint.name for attempt in attempts) == ['a'] + ['b'] * 7
+    assert [attempt.probe for attempt in attempts if attempt.health is health] == [True]
+
+
+def test_hedge_deadline_counts_from_first_launch():
+    release = threading.Event()
+
+    def failing(data):
+        time.sleep(0.3)
+        raise ConnectionError('down')
+        yield
+
+    def slow(data):
+        release.wait(5)
+        yield 'slow'
+
+    def fast(data):
+        yield 'fast'
+
+    router = Router([Endpoint('failing', failing), Endpoint('slow', slow), Endpoint('fast', fast)],
+                    hedge=True, hedge_delay=0.4)
+    for name, ttft in (('failing', 0.1), ('slow', 0.2), ('fast', 0.3)):
+        router._health[name].ttft = ttft
+    started = time.perf_counter()
+    try:
+        # failing 在 0.3 秒时出错并切换到 slow，对冲仍在首个请求发出后 0.4 秒发往 fast，而不是重新计时
+        assert list(router.stream(DATA)) == ['fast']
+        assert time.perf_counter() - started < 0.6
+    finally:
+        release.set()
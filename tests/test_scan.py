@@ -0,0 +1,42 @@
+import os
+import time
+
+from GalaxyTools.utils.scan import scan_folder
+
+
+def _tree(root):
+    for relpath, size in (('a.json', 10), ('b.txt', 1), ('sub/c.json', 100), ('sub/deep/d.json', 5),
+                          ('.git/e.json', 1)):
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * size)
+    return str(root)
+
+
+def _rel(root, paths):
+    return sorted(os.path.relpath(path, root).replace(os.sep, '/') for path in paths)
+
+
+def test_scan_filters(tmp_path):
+    root = _tree(tmp_path)
+    assert _rel(root, scan_folder(root)) == ['.git', 'a.json', 'b.txt', 'sub']
+    assert _rel(root, scan_folder(root, recursive=True, include='*.json', exclude='.git', kind='file')) == \
+        ['a.json', 'sub/c.json', 'sub/deep/d.json']
+    # 含 / 的模式匹配相对路径，被排除的目录不会进入
+    assert _rel(root, scan_folder(root, recursive=True, include='sub/*.json', kind='file')) == \
+        ['sub/c.json', 'sub/deep/d.json']
+    assert _rel(root, scan_folder(root, recursive=True, exclude=['.git', 'deep'], kind='dir')) == ['sub']
+    assert _rel(root, scan_folder(root, recursive=True, kind='file', exclude='.git', min_size=5, max_size=50)) == \
+        ['a.json', 'sub/deep/d.json']
+
+
+def test_scan_mtime_and_order(tmp_path):
+    root = _tree(tmp_path)
+    old = time.time() - 3600
+    os.utime(tmp_path / 'a.json', (old, old))
+    assert 'a.json' not in _rel(root, scan_folder(root, kind='file', modified_after=old + 1))
+    assert _rel(root, scan_folder(root, kind='file', modified_before=old + 1)) == ['a.json']
+    names = [os.path.basename(path) for path in scan_folder(root, key=lambda name: name.lower(), kind='file')]
+    assert names == ['a.json', 'b.txt']
+    assert [os.path.basename(p) for p in scan_folder(root, key=lambda name: name, kind='file', recursive=True,
+                                                     exclude='.git')] == ['a.json', 'b.txt', 'c.json', 'd.json']
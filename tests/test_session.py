@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from GalaxyTools.utils.session import (aclose_async_clients, configure_session, get_async_client, get_session,
+                                       session_stats, close_sessions)
+
+
+def _server(status, retry_after=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self):
+            Handler.count += 1
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(status)
+            if retry_after is not None:
+                self.send_header('Retry-After', retry_after)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    Handler.count = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, Handler, f'http://127.0.0.1:{server.server_port}/'
+
+
+def test_post_is_not_retried_on_gateway_errors():
+    configure_session('test-retry', retries=2, backoff_factor=0)
+    session = get_session('test-retry')
+    try:
+        server, handler, url = _server(502)
+        assert session.post(url, json={}).status_code == 502
+        assert handler.count == 1
+        assert session.get(url).status_code == 502
+        assert handler.count == 1 + 3
+        server.shutdown()
+
+        server, handler, url = _server(503, retry_after='0')
+        assert session.post(url, json={}).status_code == 503
+        assert handler.count == 3
+        server.shutdown()
+
+        server, handler, url = _server(503)
+        session.post(url, json={})
+        assert handler.count == 1
+        server.shutdown()
+    finally:
+        close_sessions('test-retry')
+
+
+def test_session_reuses_connections():
+    server, handler, url = _server(200)
+    configure_session('test-stats', retries=0)
+    session = get_session('test-stats')
+    assert get_session('test-stats') is session
+    for _ in range(3):
+        session.get(url)
+    stats = session_stats('test-stats')['test-stats']
+    assert (stats['misses'], stats['hits']) == (1, 2)
+    close_sessions('test-stats')
+    assert session_stats('test-stats') == {}
+    server.shutdown()
+
+
+def test_async_client_is_per_event_loop():
+    async def clients():
+        first = get_async_client()
+        assert get_async_client() is first
+        await aclose_async_clients()
+        assert first.is_closed
+        # 关闭后再次获取会新建
+        second = get_async_client()
+        assert second is not first
+        await aclose_async_clients()
+        return second
+
+    # 新的事件循环使用新的客户端
+    assert asyncio.run(clients()) is not asyncio.run(clients())
@@ -0,0 +1,47 @@
+import os
+import time
+
+import pytest
+
+from GalaxyTools.utils.concurrent import ConcurrentMap, TaskTimeout
+from GalaxyTools.utils.shm import SharedRef, shared_call, to_shared
+
+
+def _segments():
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')}
+
+
+def _slow_len(data):
+    time.sleep(0.3)
+    return len(data)
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='需要 /dev/shm')
+def test_abandoned_tasks_leave_no_segments():
+    before = _segments()
+    results = ConcurrentMap.process_map(_slow_len, [b'x' * 4096] * 8, max_workers=1,
+                                        batch_timeout=0.2, shared_memory_threshold=1024)
+    assert any(isinstance(result, TaskTimeout) for result in results)
+    # 仍在运行的任务结束后也不应留下共享内存
+    time.sleep(0.5)
+    assert _segments() <= before
+
+    before = _segments()
+    assert ConcurrentMap.process_map(len, [b'x' * 4096] * 8, max_workers=2,
+                                     shared_memory_threshold=1024) == [4096] * 8
+    assert _segments() <= before
+
+
+def test_exception_from_array_function_is_not_masked():
+    numpy = pytest.importorskip('numpy')
+
+    def fail(array):
+        raise ValueError('bad array')
+
+    ref = to_shared(numpy.arange(1024), 0)
+    assert isinstance(ref, SharedRef)
+    with pytest.raises(ValueError, match='bad array'):
+        shared_call(fail, 0, ref)
+    with pytest.raises(FileNotFoundError):
+        from multiprocessing import shared_memory
+        shared_memory.SharedMemory(name=ref.name)
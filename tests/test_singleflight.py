@@ -0,0 +1,80 @@
+import time
+import asyncio
+import threading
+
+from GalaxyTools.utils.singleflight import SingleFlight
+
+
+def _upstream(calls, fail=False):
+    calls.append(1)
+    for i in range(5):
+        time.sleep(0.02)
+        yield i
+    if fail:
+        raise RuntimeError('upstream failed')
+
+
+def test_threads_share_one_upstream_and_replay():
+    flights = SingleFlight()
+    calls = []
+    results = []
+    first = flights.stream('k', lambda: _upstream(calls))
+    assert next(first) == 0
+    threads = [threading.Thread(target=lambda: results.append(list(flights.stream('k', lambda: _upstream(calls)))))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert list(first) == [1, 2, 3, 4]
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [[0, 1, 2, 3, 4]] * 8
+
+
+def test_error_reaches_every_subscriber():
+    flights = SingleFlight()
+    calls = []
+    received = []
+
+    def consume():
+        events = []
+        try:
+            for event in flights.stream('k', lambda: _upstream(calls, fail=True)):
+                events.append(event)
+        except RuntimeError:
+            received.append(events)
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert received == [[0, 1, 2, 3, 4]] * 4
+
+
+def test_asyncio_late_subscriber():
+    flights = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        for i in range(5):
+            await asyncio.sleep(0.02)
+            yield i
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        return [event async for event in flights.astream('k', upstream)]
+
+    async def main():
+        consumers = asyncio.gather(*(consume(i * 0.02) for i in range(4)))
+        await asyncio.sleep(0.05)
+        # 进行中的异步调用同样计入 in_flight
+        stats = flights.stats()
+        assert stats['started'] == 1 and stats['in_flight'] == 1
+        return await consumers
+
+    assert asyncio.run(main()) == [[0, 1, 2, 3, 4]] * 4
+    assert len(calls) == 1
+    assert flights.stats() == {'started': 1, 'coalesced': 3, 'in_flight': 0}
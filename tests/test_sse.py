@@ -0,0 +1,55 @@
+from GalaxyTools.utils.sse import SSEDecoder, SSEBufferOverflow, iter_sse, iter_sse_json
+
+STREAM = (
+    'data: {"text": "你好"}\r\n\r\n'
+    ': keep-alive\n\n'
+    'event: message\ndata: first\ndata: second\n\n'
+    'data: [DONE]\n\n'
+).encode('utf-8')
+
+
+def test_byte_by_byte_split():
+    chunks = [STREAM[i:i + 1] for i in range(len(STREAM))]
+    assert list(iter_sse(chunks)) == ['{"text": "你好"}'.encode('utf-8'), b'first\nsecond', b'[DONE]']
+
+
+def test_memoryview_chunks_and_json():
+    view = memoryview(STREAM)
+    chunks = [view[i:i + 7] for i in range(0, len(view), 7)]
+    assert list(iter_sse_json(chunks)) == [{'text': '你好'}]
+
+
+def test_trailing_event_without_blank_line():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: a\n\ndata: b') == [b'a']
+    assert decoder.close() == [b'b']
+
+
+def test_bounded_buffer():
+    decoder = SSEDecoder(max_buffer_size=8)
+    try:
+        decoder.feed(b'data: 0123456789')
+    except SSEBufferOverflow:
+        pass
+    else:
+        raise AssertionError('buffer should be bounded')
+
+
+def test_bare_cr_and_split_crlf():
+    stream = b'data: a\rdata: b\r\rdata: c\r\n\r\ndata: d\n\n'
+    expected = [b'a\nb', b'c', b'd']
+    assert list(iter_sse([stream])) == expected
+    assert list(iter_sse([stream[i:i + 1] for i in range(len(stream))])) == expected
+    # \r\n 被拆在两个块中时不能当作两个行尾
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: x\r') == []
+    assert decoder.feed(b'\ndata: y\r') == []
+    assert decoder.feed(b'\n\r') == []
+    assert decoder.feed(b'\n') == [b'x\ny']
+    assert decoder.feed(b'data: z\r') == []
+    assert decoder.close() == [b'z']
+
+
+def test_json_skips_non_objects():
+    stream = b'data: 1\n\ndata: "ping"\n\ndata: [1, 2]\n\ndata: null\n\ndata: {"a": 1}\n\ndata: [DONE]\n\n'
+    assert list(iter_sse_json([stream])) == [{'a': 1}]
@@ -0,0 +1,37 @@
+import time
+import json
+
+import pytest
+
+from GalaxyTools.utils.concurrent import ConcurrentMap
+from GalaxyTools.utils.tracing import TaskTrace, active_trace
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail(x):
+    raise ValueError(x)
+
+
+def test_trace_records_tasks_and_exports_chrome_trace(tmp_path):
+    with TaskTrace() as trace:
+        assert ConcurrentMap.thread_map(_sleep, [0.01] * 7 + [0.2], max_workers=4) == [0.01] * 7 + [0.2]
+        assert ConcurrentMap.process_map(_sleep, [0.01] * 4, max_workers=2, chunksize=1) == [0.01] * 4
+        with pytest.raises(ValueError):
+            ConcurrentMap.thread_map(_fail, ['bad'], max_workers=1)
+    assert active_trace() is None
+
+    summary = trace.summary()
+    assert summary['tasks'] == 13 and summary['items'] == 13 and summary['errors'] == 1
+    assert summary['slowest'][0]['run_time'] >= 0.2
+    assert summary['run_time']['max'] >= 0.2 > summary['run_time']['p50']
+    assert summary['serialization_time'] > 0
+    assert 0 < summary['utilization'] <= 1
+
+    path = tmp_path / 'trace.json'
+    trace.write_chrome_trace(str(path))
+    events = json.loads(path.read_text())['traceEvents']
+    assert sum(event['ph'] == 'X' for event in events) == 13